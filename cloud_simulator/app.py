@@ -1,91 +1,371 @@
-from flask import Flask, request
+from flask import Flask, Response, request
 import logging
 from influxdb_client import InfluxDBClient, Point, WritePrecision
-from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client.client.write_api import SYNCHRONOUS, WriteOptions
 import os
+import gzip
 import json
-import datetime
+import time
+import atexit
+import itertools
+import threading
 from pathlib import Path
+from ingest_queue import IngestQueue
+from telemetry_archive import TelemetryArchive, series_key
 
 INFLUX_URL = os.getenv("INFLUX_URL", "http://influxdb:8086")
 INFLUX_TOKEN = os.getenv("INFLUX_TOKEN", "my-secret-token")
 INFLUX_ORG = os.getenv("INFLUX_ORG", "hvac-org")
 INFLUX_BUCKET = os.getenv("INFLUX_BUCKET", "hvac_data")
 
+# "sync" writes each request in large batches before answering, "batching"
+# hands the points to the client's background writer and answers immediately
+INFLUX_WRITE_MODE = os.getenv("INFLUX_WRITE_MODE", "sync")
+INFLUX_BATCH_SIZE = int(os.getenv("INFLUX_BATCH_SIZE", "5000"))
+INFLUX_FLUSH_INTERVAL_MS = int(os.getenv("INFLUX_FLUSH_INTERVAL_MS", "1000"))
+
 TELEMETRY_DIR = os.getenv("TELEMETRY_DIR", "/app/telemetry_logs")
 Path(TELEMETRY_DIR).mkdir(parents=True, exist_ok=True)
 
+# "sync" stores a request before answering it, "async" acknowledges it once it
+# is in the durable ingest queue and stores it from background workers
+INGEST_MODE = os.getenv("INGEST_MODE", "sync")
+INGEST_QUEUE_PATH = os.getenv(
+    "INGEST_QUEUE_PATH", os.path.join(TELEMETRY_DIR, "ingest_queue.db")
+)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(TELEMETRY_DIR, "archive"))
+ARCHIVE_SEGMENT_BYTES = int(os.getenv("ARCHIVE_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+ARCHIVE_SEGMENT_AGE_S = int(os.getenv("ARCHIVE_SEGMENT_AGE_S", "3600"))
+
 app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 
+archive = TelemetryArchive(
+    ARCHIVE_DIR,
+    max_segment_bytes=ARCHIVE_SEGMENT_BYTES,
+    max_segment_age_s=ARCHIVE_SEGMENT_AGE_S,
+)
+archive.start_rotation_timer()
+
 client = InfluxDBClient(url=INFLUX_URL, token=INFLUX_TOKEN, org=INFLUX_ORG)
-write_api = client.write_api(write_options=SYNCHRONOUS)
 
 
-def save_telemetry_to_file(room_id, telemetries):
-    """Save telemetry data to a local JSONL file."""
+def on_batch_error(conf, data, exception):
+    logging.error(f"❌ Background InfluxDB batch write failed: {exception}")
+
+
+if INFLUX_WRITE_MODE == "batching":
+    write_api = client.write_api(
+        write_options=WriteOptions(
+            batch_size=INFLUX_BATCH_SIZE, flush_interval=INFLUX_FLUSH_INTERVAL_MS
+        ),
+        error_callback=on_batch_error,
+    )
+else:
+    write_api = client.write_api(write_options=SYNCHRONOUS)
+
+
+def close_influx_client():
+    """Flush the points still buffered by the batching writer on shutdown."""
+    if ingest_queue is not None:
+        ingest_queue.stop()
     try:
-        today = datetime.datetime.now().strftime("%Y-%m-%d")
-        filename = f"telemetry_room_{room_id}_{today}.jsonl"
-        filepath = os.path.join(TELEMETRY_DIR, filename)
-
-        log_entry = {
-            "timestamp": datetime.datetime.now().isoformat(),
-            "room_id": room_id,
-            "telemetries_count": len(telemetries),
-            "telemetries": telemetries,
-        }
+        write_api.close()
+    finally:
+        client.close()
+
+
+atexit.register(close_influx_client)
+
+ingest_stats_lock = threading.Lock()
+ingest_stats = {
+    "requests": 0,
+    "entries": 0,
+    "points": 0,
+    "last_latency_ms": 0.0,
+    "max_latency_ms": 0.0,
+    "total_latency_ms": 0.0,
+}
+
 
-        with open(filepath, "a", encoding="utf-8") as f:
-            f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+def record_ingest(entries, points, latency_ms):
+    with ingest_stats_lock:
+        ingest_stats["requests"] += 1
+        ingest_stats["entries"] += entries
+        ingest_stats["points"] += points
+        ingest_stats["last_latency_ms"] = latency_ms
+        ingest_stats["max_latency_ms"] = max(ingest_stats["max_latency_ms"], latency_ms)
+        ingest_stats["total_latency_ms"] += latency_ms
 
-        logging.info(f"💾 Telemetries appended to local file: {filepath}")
+
+def archive_telemetries(room_id, telemetries):
+    """Append telemetry data to the room's archive segment."""
+    archive.write(room_id, telemetries)
+    logging.info(f"💾 Archived {len(telemetries)} telemetries for room {room_id}")
+
+
+def save_telemetry_to_file(room_id, telemetries):
+    try:
+        archive_telemetries(room_id, telemetries)
 
     except Exception as e:
         logging.error(f"❌ Failed to save telemetries to file: {e}")
 
 
-@app.route("/api/sync", methods=["POST"])
-def receive_sync():
-    data = request.json
-    room_id = data.get("room_id")
-    entries = data.get("telemetries", [])
+def build_point(telemetry):
+    """Convert a telemetry entry into an InfluxDB point."""
+    metadata = telemetry.get("metadata", {})
+    point = (
+        Point(telemetry["type"])
+        .tag("room_id", metadata.get("room_id"))
+        .tag("rack_id", metadata.get("rack_id") or "none")
+        .tag("object_id", metadata.get("object_id"))
+        .tag("resource_id", metadata.get("resource_id"))
+    )
+
+    if "data_value" in telemetry:
+        point = point.field("value", telemetry["data_value"])
+
+    elif "event_data" in telemetry:
+        event_data = telemetry["event_data"]
+        for key, val in event_data.get("new_state", {}).items():
+            if isinstance(val, (int, float)):
+                point = point.field(key, val)
+
+    return point.time(telemetry["timestamp"], WritePrecision.MS)
+
+
+def build_points(entries):
+    return [build_point(telemetry) for telemetry in entries]
+
 
+def write_points(points):
+    """Write points in batches of INFLUX_BATCH_SIZE instead of one call per point."""
+    for i in range(0, len(points), INFLUX_BATCH_SIZE):
+        write_api.write(
+            bucket=INFLUX_BUCKET, org=INFLUX_ORG, record=points[i : i + INFLUX_BATCH_SIZE]
+        )
+
+
+def write_telemetries(room_id, entries):
+    """Write a sync batch to InfluxDB."""
+    started = time.perf_counter()
+    points = build_points(entries)
+    write_points(points)
+
+    latency_ms = round((time.perf_counter() - started) * 1000, 3)
+    record_ingest(len(entries), len(points), latency_ms)
     logging.info(
-        f"📥 Received telemetry sync from room {room_id}: {len(entries)} entries"
+        f"⏱️ Ingested {len(points)} points from room {room_id} in {latency_ms} ms"
     )
+    return len(points), latency_ms
+
 
+def store_telemetries(room_id, entries):
+    """Append a sync batch to the JSONL archive and write it to InfluxDB."""
     save_telemetry_to_file(room_id, entries)
+    return write_telemetries(room_id, entries)
+
+
+ingest_queue = None
+if INGEST_MODE == "async":
+    # Each sink drains and retries on its own, so an InfluxDB outage does not
+    # archive the same batch again on every retry
+    ingest_queue = IngestQueue(
+        INGEST_QUEUE_PATH,
+        {"archive": archive_telemetries, "influxdb": write_telemetries},
+        num_workers=INGEST_WORKERS,
+    )
+    ingest_queue.start()
+
 
+def validate_sync(data):
+    """Return an error message if a sync payload is malformed."""
+    if not isinstance(data, dict):
+        return "payload must be a JSON object"
+    if not isinstance(data.get("room_id"), str):
+        return "room_id is required"
+    if not isinstance(data.get("telemetries", []), list):
+        return "telemetries must be a list"
+    return None
+
+
+def is_valid_telemetry(telemetry):
+    return (
+        isinstance(telemetry, dict)
+        and "type" in telemetry
+        and isinstance(telemetry.get("timestamp"), int)
+    )
+
+
+def read_json_body():
+    """Decode the request body, gunzipping it if the client compressed it."""
+    if request.headers.get("Content-Encoding", "").lower() == "gzip":
+        return json.loads(gzip.decompress(request.get_data()))
+    return request.get_json()
+
+
+@app.route("/api/sync", methods=["POST"])
+def receive_sync():
     try:
-        for telemetry in entries:
-            metadata = telemetry.get("metadata", {})
-            point = (
-                Point(telemetry["type"])
-                .tag("room_id", metadata.get("room_id"))
-                .tag("rack_id", metadata.get("rack_id") or "none")
-                .tag("object_id", metadata.get("object_id"))
-                .tag("resource_id", metadata.get("resource_id"))
-            )
+        data = read_json_body()
+    except (OSError, EOFError, ValueError) as e:
+        logging.error(f"❌ Invalid sync payload: {e}")
+        return {"status": "error", "message": "invalid payload"}, 400
 
-            if "data_value" in telemetry:
-                point = point.field("value", telemetry["data_value"])
+    error = validate_sync(data)
+    if error:
+        return {"status": "error", "message": error}, 400
 
-            elif "event_data" in telemetry:
-                event_data = telemetry["event_data"]
-                for key, val in event_data.get("new_state", {}).items():
-                    if isinstance(val, (int, float)):
-                        point = point.field(key, val)
+    room_id = data["room_id"]
+    received = data.get("telemetries", [])
+    # Malformed entries are skipped rather than failing the whole batch,
+    # otherwise the collector would retry it forever
+    entries = [telemetry for telemetry in received if is_valid_telemetry(telemetry)]
 
-            point = point.time(telemetry["timestamp"], WritePrecision.MS)
+    logging.info(
+        f"📥 Received telemetry sync from room {room_id}: {len(entries)} entries"
+    )
+    if len(entries) < len(received):
+        logging.warning(
+            f"⚠️ Skipped {len(received) - len(entries)} malformed entries from room {room_id}"
+        )
 
-            write_api.write(bucket=INFLUX_BUCKET, org=INFLUX_ORG, record=point)
+    if ingest_queue is not None:
+        accepted = ingest_queue.enqueue(
+            room_id, entries, request.headers.get("Idempotency-Key")
+        )
+        return {"status": "accepted", "duplicate": not accepted}, 202
+
+    try:
+        points, latency_ms = store_telemetries(room_id, entries)
 
     except Exception as e:
         logging.error(f"❌ Failed to write to InfluxDB: {e}")
         return {"status": "error", "message": str(e)}, 500
 
-    return {"status": "success"}, 200
+    return {"status": "success", "points": points, "latency_ms": latency_ms}, 200
+
+
+@app.route("/api/ingest/lag", methods=["GET"])
+def get_ingest_lag():
+    if ingest_queue is None:
+        return {"status": "error", "message": "async ingest is disabled"}, 404
+    return {"status": "success", "lag": ingest_queue.get_lag()}, 200
+
+
+@app.route("/api/stats", methods=["GET"])
+def get_ingest_stats():
+    with ingest_stats_lock:
+        stats = dict(ingest_stats)
+    requests_count = stats["requests"]
+    stats["avg_latency_ms"] = (
+        round(stats["total_latency_ms"] / requests_count, 3) if requests_count else 0.0
+    )
+    stats["write_mode"] = INFLUX_WRITE_MODE
+    stats["ingest_mode"] = INGEST_MODE
+    return {"status": "success", "stats": stats}, 200
+
+
+def parse_int_arg(name):
+    value = request.args.get(name)
+    return int(value) if value not in (None, "") else None
+
+
+def downsample(entries, bucket_ms):
+    """Aggregate numeric samples into min/max/mean per series and time bucket."""
+    buckets = {}
+    series_info = {}
+    for telemetry in entries:
+        value = telemetry.get("data_value")
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+
+        key = series_key(telemetry)
+        if key not in series_info:
+            metadata = telemetry.get("metadata") or {}
+            series_info[key] = {
+                "type": telemetry.get("type"),
+                "rack_id": metadata.get("rack_id"),
+                "object_id": metadata.get("object_id"),
+                "resource_id": metadata.get("resource_id"),
+            }
+
+        bucket_start = telemetry["timestamp"] - telemetry["timestamp"] % bucket_ms
+        bucket = buckets.get((key, bucket_start))
+        if bucket is None:
+            buckets[(key, bucket_start)] = [value, value, value, 1]
+        else:
+            bucket[0] = min(bucket[0], value)
+            bucket[1] = max(bucket[1], value)
+            bucket[2] += value
+            bucket[3] += 1
+
+    for (key, bucket_start), (low, high, total, count) in sorted(buckets.items()):
+        yield {
+            **series_info[key],
+            "bucket_start": bucket_start,
+            "min": low,
+            "max": high,
+            "mean": total / count,
+            "count": count,
+        }
+
+
+def stream_json(room_id, items):
+    """Stream a JSON response one item at a time."""
+    yield f'{{"status": "success", "room_id": {json.dumps(room_id)}, "data": ['
+    count = 0
+    for item in items:
+        yield ("," if count else "") + json.dumps(item, ensure_ascii=False)
+        count += 1
+    yield f'], "count": {count}}}'
+
+
+@app.route("/api/telemetry", methods=["GET"])
+def query_telemetry():
+    """
+    Time range query over the telemetry archive.
+    Filters: room_id (required), rack_id ("none" for room devices), object_id,
+    resource_id, type, start and end (ms). With bucket_ms the samples are
+    downsampled to min/max/mean per bucket.
+    """
+    room_id = request.args.get("room_id")
+    if not room_id:
+        return {"status": "error", "message": "room_id is required"}, 400
+
+    try:
+        start_ms = parse_int_arg("start")
+        end_ms = parse_int_arg("end")
+        bucket_ms = parse_int_arg("bucket_ms")
+        limit = parse_int_arg("limit")
+    except ValueError:
+        return {
+            "status": "error",
+            "message": "start, end, bucket_ms and limit must be integers",
+        }, 400
+
+    if (bucket_ms is not None and bucket_ms <= 0) or (limit is not None and limit <= 0):
+        return {"status": "error", "message": "bucket_ms and limit must be positive"}, 400
+
+    rack_id = request.args.get("rack_id")
+    entries = archive.query(
+        room_id,
+        start_ms,
+        end_ms,
+        type_=request.args.get("type"),
+        rack_id="" if rack_id == "none" else rack_id,
+        object_id=request.args.get("object_id"),
+        resource_id=request.args.get("resource_id"),
+    )
+
+    items = downsample(entries, bucket_ms) if bucket_ms else entries
+    if limit is not None:
+        items = itertools.islice(items, limit)
+
+    return Response(stream_json(room_id, items), mimetype="application/json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,254 @@
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shard INTEGER NOT NULL,
+    room_id TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    received_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS batches_shard ON batches (shard, id);
+CREATE TABLE IF NOT EXISTS sink_progress (
+    batch_id INTEGER NOT NULL,
+    sink TEXT NOT NULL,
+    PRIMARY KEY (batch_id, sink)
+);
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class IngestQueue:
+    """
+    Durable queue between the /api/sync endpoint and the storage backends.
+    Accepted sync requests are stored in a SQLite database and drained by
+    worker threads. ``sinks`` maps a name to a ``handler(room_id, entries)``;
+    every sink has its own workers and records in ``sink_progress`` which
+    batches it stored, so the sinks drain in parallel and a sink that fails is
+    retried without storing the batch again in the others. Rooms are sharded
+    over the workers of a sink with a stable hash so the batches of a room are
+    always stored in arrival order, and a batch is removed once every sink
+    stored it. Idempotency keys are remembered for ``key_ttl_s`` seconds so
+    client retries are not ingested twice.
+    """
+
+    def __init__(
+        self,
+        db_path,
+        sinks,
+        num_workers=4,
+        key_ttl_s=24 * 3600,
+        retry_delay_s=2.0,
+    ):
+        self.db_path = db_path
+        self.sinks = dict(sinks)
+        self.num_workers = num_workers
+        self.key_ttl_s = key_ttl_s
+        self.retry_delay_s = retry_delay_s
+
+        self._local = threading.local()
+        self._wakeups = {
+            sink: [threading.Event() for _ in range(num_workers)] for sink in self.sinks
+        }
+        self._stopped = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._threads = []
+        self._running = False
+        self._last_prune = 0.0
+
+        self.accepted = 0
+        self.duplicates = 0
+        self.processed = 0
+        self.failures = 0
+
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._stopped.clear()
+        self._reshard()
+        for sink in self.sinks:
+            for shard in range(self.num_workers):
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    args=(sink, shard),
+                    name=f"Ingest-{sink}-{shard}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5.0):
+        self._running = False
+        self._stopped.set()
+        for wakeups in self._wakeups.values():
+            for wakeup in wakeups:
+                wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def enqueue(self, room_id, entries, idempotency_key=None):
+        """
+        Durably store a sync batch. Returns False if a batch with the same
+        idempotency key was already accepted.
+        """
+        shard = self._shard_of(room_id)
+        payload = json.dumps(entries, separators=(",", ":"))
+        now = time.time()
+
+        conn = self._connection()
+        with conn:
+            if idempotency_key:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO idempotency_keys (key, created_at) VALUES (?, ?)",
+                    (idempotency_key, now),
+                )
+                if cursor.rowcount == 0:
+                    with self._stats_lock:
+                        self.duplicates += 1
+                    return False
+
+            conn.execute(
+                "INSERT INTO batches (shard, room_id, payload, received_at) VALUES (?, ?, ?, ?)",
+                (shard, room_id, payload, now),
+            )
+
+        with self._stats_lock:
+            self.accepted += 1
+        for wakeups in self._wakeups.values():
+            wakeups[shard].set()
+        self._prune_keys(now)
+        return True
+
+    def get_lag(self):
+        """Queue depth and age of the oldest pending batch for every room."""
+        now = time.time()
+        rows = self._connection().execute(
+            "SELECT room_id, COUNT(*), SUM(LENGTH(payload)), MIN(received_at) "
+            "FROM batches GROUP BY room_id"
+        )
+        rooms = {
+            room_id: {
+                "pending_batches": count,
+                "pending_bytes": size,
+                "lag_s": round(now - oldest, 3),
+            }
+            for room_id, count, size, oldest in rows
+        }
+        total = sum(room["pending_batches"] for room in rooms.values())
+        done = dict(
+            self._connection().execute(
+                "SELECT sink, COUNT(*) FROM sink_progress GROUP BY sink"
+            )
+        )
+        return {
+            "workers": self.num_workers,
+            "pending_batches": total,
+            "pending_per_sink": {sink: total - done.get(sink, 0) for sink in self.sinks},
+            "max_lag_s": max((room["lag_s"] for room in rooms.values()), default=0.0),
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "processed": self.processed,
+            "failures": self.failures,
+            "rooms": rooms,
+        }
+
+    def _shard_of(self, room_id):
+        return zlib.crc32(room_id.encode("utf-8")) % self.num_workers
+
+    def _reshard(self):
+        """
+        Move the pending batches to the shards of the current worker count,
+        so batches queued with more workers are not left on a shard nobody
+        polls. Shards are ordered by id, so the room order is kept.
+        """
+        conn = self._connection()
+        with conn:
+            rooms = conn.execute("SELECT DISTINCT room_id FROM batches").fetchall()
+            for (room_id,) in rooms:
+                shard = self._shard_of(room_id)
+                conn.execute(
+                    "UPDATE batches SET shard = ? WHERE room_id = ? AND shard != ?",
+                    (shard, room_id, shard),
+                )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _prune_keys(self, now):
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM idempotency_keys WHERE created_at < ?",
+                (now - self.key_ttl_s,),
+            )
+
+    def _worker_loop(self, sink, shard):
+        conn = self._connection()
+        handler = self.sinks[sink]
+        wakeup = self._wakeups[sink][shard]
+
+        while self._running:
+            # Cleared before the query so an enqueue in between is not missed
+            wakeup.clear()
+            row = conn.execute(
+                "SELECT id, room_id, payload FROM batches AS b WHERE shard = ? "
+                "AND NOT EXISTS (SELECT 1 FROM sink_progress AS p "
+                "WHERE p.batch_id = b.id AND p.sink = ?) ORDER BY id LIMIT 1",
+                (shard, sink),
+            ).fetchone()
+            if row is None:
+                wakeup.wait(timeout=1.0)
+                continue
+
+            batch_id, room_id, payload = row
+            try:
+                handler(room_id, json.loads(payload))
+            except Exception as e:
+                # Keep the batch at the head of the shard to preserve ordering
+                with self._stats_lock:
+                    self.failures += 1
+                logging.error(
+                    f"❌ Ingest of batch {batch_id} for room {room_id} to {sink} failed: {e}"
+                )
+                self._stopped.wait(timeout=self.retry_delay_s)
+                continue
+
+            self._mark_done(conn, batch_id, sink)
+
+    def _mark_done(self, conn, batch_id, sink):
+        """Record that a sink stored a batch, deleting it once all sinks did."""
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO sink_progress (batch_id, sink) VALUES (?, ?)",
+                (batch_id, sink),
+            )
+            (done,) = conn.execute(
+                "SELECT COUNT(*) FROM sink_progress WHERE batch_id = ?", (batch_id,)
+            ).fetchone()
+            if done < len(self.sinks):
+                return
+            conn.execute("DELETE FROM batches WHERE id = ?", (batch_id,))
+            conn.execute("DELETE FROM sink_progress WHERE batch_id = ?", (batch_id,))
+        with self._stats_lock:
+            self.processed += 1
@@ -0,0 +1,387 @@
+import os
+import re
+import gzip
+import json
+import time
+import shutil
+import logging
+import datetime
+import threading
+
+SEGMENT_SUFFIX = ".jsonl"
+COMPRESSED_SUFFIX = ".jsonl.gz"
+INDEX_SUFFIX = ".idx.json"
+
+
+def series_key(telemetry):
+    """Identify the sensor resource a telemetry entry belongs to."""
+    metadata = telemetry.get("metadata") or {}
+    return "|".join(
+        str(part or "")
+        for part in (
+            telemetry.get("type"),
+            metadata.get("rack_id"),
+            metadata.get("object_id"),
+            metadata.get("resource_id"),
+        )
+    )
+
+
+def _in_range(time_range, start_ms, end_ms):
+    if start_ms is not None and time_range["max_ts"] < start_ms:
+        return False
+    if end_ms is not None and time_range["min_ts"] > end_ms:
+        return False
+    return True
+
+
+def safe_room_dir(room_id):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", room_id).lstrip(".") or "_"
+
+
+class SegmentIndex:
+    """Time range, series and byte offsets of the entries of one segment."""
+
+    def __init__(self, room_id, file):
+        self.room_id = room_id
+        self.file = file
+        self.count = 0
+        self.bytes = 0
+        self.min_ts = None
+        self.max_ts = None
+        self.series = {}
+
+    def add(self, key, timestamp, offset):
+        self.count += 1
+        if self.min_ts is None or timestamp < self.min_ts:
+            self.min_ts = timestamp
+        if self.max_ts is None or timestamp > self.max_ts:
+            self.max_ts = timestamp
+
+        entry = self.series.get(key)
+        if entry is None:
+            self.series[key] = {
+                "count": 1,
+                "min_ts": timestamp,
+                "max_ts": timestamp,
+                "first_offset": offset,
+                "last_offset": offset,
+            }
+            return
+        entry["count"] += 1
+        entry["min_ts"] = min(entry["min_ts"], timestamp)
+        entry["max_ts"] = max(entry["max_ts"], timestamp)
+        entry["last_offset"] = offset
+
+    def overlaps(self, start_ms=None, end_ms=None):
+        return self.min_ts is not None and _in_range(self.to_dict(), start_ms, end_ms)
+
+    def select_series(self, start_ms=None, end_ms=None, wanted=(None,) * 4):
+        """
+        Return the series of the segment matching ``wanted`` (type, rack_id,
+        object_id, resource_id; None matches anything) with samples in range.
+        """
+        selected = set()
+        for key, series_range in self.series.items():
+            parts = key.split("|")
+            if all(value is None or value == part for value, part in zip(wanted, parts)):
+                if _in_range(series_range, start_ms, end_ms):
+                    selected.add(key)
+        return selected
+
+    def snapshot(self):
+        """Copy of the index that later writes to the segment do not change."""
+        data = self.to_dict()
+        data["series"] = {key: dict(entry) for key, entry in self.series.items()}
+        return SegmentIndex.from_dict(data)
+
+    def to_dict(self):
+        return {
+            "room_id": self.room_id,
+            "file": self.file,
+            "count": self.count,
+            "bytes": self.bytes,
+            "min_ts": self.min_ts,
+            "max_ts": self.max_ts,
+            "series": self.series,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls(data["room_id"], data["file"])
+        index.count = data["count"]
+        index.bytes = data["bytes"]
+        index.min_ts = data["min_ts"]
+        index.max_ts = data["max_ts"]
+        index.series = data["series"]
+        return index
+
+
+class _OpenSegment:
+    def __init__(self, path, index):
+        self.path = path
+        self.index = index
+        self.handle = open(path, "ab")
+        self.opened_at = time.monotonic()
+
+
+class TelemetryArchive:
+    """
+    Append-only telemetry archive with one directory per room.
+    Entries are written one JSON line each to an open segment that rotates
+    by size and age. Closed segments are gzip compressed in the background
+    and get a sidecar index with their time range and, per series, the time
+    range and the byte offsets of the first and last entry, so a query only
+    opens the segments and byte ranges it needs.
+    """
+
+    def __init__(self, base_dir, max_segment_bytes=64 * 1024 * 1024, max_segment_age_s=3600):
+        self.base_dir = base_dir
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age_s = max_segment_age_s
+
+        self._open = {}
+        self._closed = {}
+        self._lock = threading.Lock()
+        self._room_locks = {}
+
+        os.makedirs(base_dir, exist_ok=True)
+        self._recover()
+
+    def write(self, room_id, entries):
+        """Append a sync batch, rotating the room segment when needed."""
+        with self._room_lock(room_id):
+            segment = self._open.get(room_id)
+            if segment is not None and self._should_rotate(segment):
+                self._close_segment(room_id, segment)
+                segment = None
+            if segment is None:
+                segment = self._open_segment(room_id)
+
+            index = segment.index
+            offset = index.bytes
+            lines = []
+            updates = []
+            for telemetry in entries:
+                line = json.dumps(telemetry, ensure_ascii=False, separators=(",", ":"))
+                line = line.encode("utf-8") + b"\n"
+                updates.append((series_key(telemetry), telemetry.get("timestamp", 0), offset))
+                offset += len(line)
+                lines.append(line)
+
+            try:
+                segment.handle.write(b"".join(lines))
+                segment.handle.flush()
+            except Exception:
+                # Drop a partial write so the next batch starts at index.bytes
+                segment.handle.truncate(index.bytes)
+                raise
+
+            # Published only once the lines are flushed, readers compute the
+            # byte range to read from these offsets
+            for key, timestamp, line_offset in updates:
+                index.add(key, timestamp, line_offset)
+            index.bytes = offset
+
+    def start_rotation_timer(self, interval_s=60):
+        """Periodically close segments that reached their maximum age."""
+
+        def rotation_loop():
+            while True:
+                time.sleep(interval_s)
+                self.rotate_expired()
+
+        threading.Thread(target=rotation_loop, daemon=True).start()
+
+    def rotate_expired(self):
+        """Close segments older than the maximum age even if no data arrives."""
+        for room_id in list(self._open):
+            with self._room_lock(room_id):
+                segment = self._open.get(room_id)
+                if segment is not None and self._should_rotate(segment):
+                    self._close_segment(room_id, segment)
+
+    def close(self):
+        for room_id in list(self._open):
+            with self._room_lock(room_id):
+                segment = self._open.get(room_id)
+                if segment is not None:
+                    self._close_segment(room_id, segment, background=False)
+
+    def query(
+        self,
+        room_id,
+        start_ms=None,
+        end_ms=None,
+        type_=None,
+        rack_id=None,
+        object_id=None,
+        resource_id=None,
+    ):
+        """Yield the archived entries of a room matching a time range and series filter."""
+        wanted = (type_, rack_id, object_id, resource_id)
+        for index in self.find_segments(room_id, start_ms, end_ms):
+            series = index.select_series(start_ms, end_ms, wanted)
+            if series:
+                yield from self.read_entries(index, start_ms, end_ms, series)
+
+    def find_segments(self, room_id, start_ms=None, end_ms=None):
+        """Return the indexes of the segments overlapping a time range."""
+        with self._room_lock(room_id):
+            indexes = list(self._closed.get(room_id, []))
+            segment = self._open.get(room_id)
+            if segment is not None:
+                # The open index keeps growing, queries work on a snapshot
+                indexes.append(segment.index.snapshot())
+        return [
+            index
+            for index in sorted(indexes, key=lambda index: index.min_ts or 0)
+            if index.overlaps(start_ms, end_ms)
+        ]
+
+    def read_entries(self, index, start_ms=None, end_ms=None, series=None):
+        """
+        Yield the entries of a segment in a time range, restricted to a set of
+        series keys if given. Only the byte range holding them is read.
+        """
+        room_dir = os.path.join(self.base_dir, safe_room_dir(index.room_id))
+        path = os.path.join(room_dir, index.file)
+        if not os.path.exists(path) and path.endswith(SEGMENT_SUFFIX):
+            # The segment was compressed after the index was taken
+            path = path[: -len(SEGMENT_SUFFIX)] + COMPRESSED_SUFFIX
+
+        # Entries starting before end_offset, which also keeps a reader of the
+        # open segment away from lines written after the index was taken
+        first_offset, end_offset = 0, index.bytes
+        if series is not None:
+            first_offset = min(index.series[key]["first_offset"] for key in series)
+            end_offset = max(index.series[key]["last_offset"] for key in series) + 1
+
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as f:
+            f.seek(first_offset)
+            offset = first_offset
+            for line in f:
+                if offset >= end_offset:
+                    break
+                offset += len(line)
+                telemetry = json.loads(line)
+                if series is not None and series_key(telemetry) not in series:
+                    continue
+                timestamp = telemetry.get("timestamp", 0)
+                if start_ms is not None and timestamp < start_ms:
+                    continue
+                if end_ms is not None and timestamp > end_ms:
+                    continue
+                yield telemetry
+
+    def _room_lock(self, room_id):
+        with self._lock:
+            lock = self._room_locks.get(room_id)
+            if lock is None:
+                lock = self._room_locks[room_id] = threading.RLock()
+            return lock
+
+    def _should_rotate(self, segment):
+        return (
+            segment.index.bytes >= self.max_segment_bytes
+            or time.monotonic() - segment.opened_at >= self.max_segment_age_s
+        )
+
+    def _open_segment(self, room_id):
+        room_dir = os.path.join(self.base_dir, safe_room_dir(room_id))
+        os.makedirs(room_dir, exist_ok=True)
+
+        name = datetime.datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        segment = _OpenSegment(
+            os.path.join(room_dir, name + SEGMENT_SUFFIX),
+            SegmentIndex(room_id, name + SEGMENT_SUFFIX),
+        )
+        self._open[room_id] = segment
+        return segment
+
+    def _close_segment(self, room_id, segment, background=True):
+        segment.handle.close()
+        del self._open[room_id]
+        self._closed.setdefault(room_id, []).append(segment.index)
+
+        if background:
+            threading.Thread(
+                target=self._finalize, args=(segment.path, segment.index), daemon=True
+            ).start()
+        else:
+            self._finalize(segment.path, segment.index)
+
+    def _finalize(self, path, index):
+        """Compress a closed segment and write its sidecar index."""
+        try:
+            compressed_path = path[: -len(SEGMENT_SUFFIX)] + COMPRESSED_SUFFIX
+            with open(path, "rb") as src, gzip.open(compressed_path + ".tmp", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(compressed_path + ".tmp", compressed_path)
+
+            compressed_index = SegmentIndex.from_dict(index.to_dict())
+            compressed_index.file = os.path.basename(compressed_path)
+            index_path = path[: -len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+            with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(compressed_index.to_dict(), f)
+            os.replace(index_path + ".tmp", index_path)
+
+            index.file = compressed_index.file
+            os.remove(path)
+            logging.info(f"🗜️ Archived telemetry segment {compressed_path}")
+        except Exception as e:
+            logging.error(f"❌ Failed to finalize telemetry segment {path}: {e}")
+
+    def _recover(self):
+        """Load the sidecar indexes and finalize segments left open by a crash."""
+        for room_dir in sorted(os.listdir(self.base_dir)):
+            room_path = os.path.join(self.base_dir, room_dir)
+            if not os.path.isdir(room_path):
+                continue
+
+            for name in sorted(os.listdir(room_path)):
+                path = os.path.join(room_path, name)
+                if name.endswith(INDEX_SUFFIX):
+                    with open(path, encoding="utf-8") as f:
+                        index = SegmentIndex.from_dict(json.load(f))
+                    self._closed.setdefault(index.room_id, []).append(index)
+                elif name.endswith(SEGMENT_SUFFIX):
+                    index_path = path[: -len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+                    if os.path.exists(index_path):
+                        # Finalized before the crash, only the removal was missed
+                        os.remove(path)
+                        continue
+                    index = self._scan_segment(path, room_dir)
+                    if index is None:
+                        continue
+                    self._finalize(path, index)
+                    self._closed.setdefault(index.room_id, []).append(index)
+
+    @staticmethod
+    def _scan_segment(path, default_room_id):
+        index = None
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    telemetry = json.loads(line)
+                except ValueError:
+                    break
+                if index is None:
+                    metadata = telemetry.get("metadata") or {}
+                    room_id = metadata.get("room_id") or default_room_id
+                    index = SegmentIndex(room_id, os.path.basename(path))
+                index.add(series_key(telemetry), telemetry.get("timestamp", 0), offset)
+                offset += len(line)
+
+        if index is None:
+            os.remove(path)
+            return None
+        index.bytes = offset
+        if offset < os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        return index
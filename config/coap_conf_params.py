@@ -1,4 +1,4 @@
-from typing import ClassVar
+from typing import ClassVar, List
 
 
 class CoapConfigurationParameters(object):
@@ -10,6 +10,30 @@ class CoapConfigurationParameters(object):
     GATEWAY_URI: ClassVar[str] = (
         f"coap://{COAP_SERVER_ADDRESS}:{COAP_GATEWAY_PORT}/proxy/forward"
     )
+    GATEWAY_BATCH_URI: ClassVar[str] = (
+        f"coap://{COAP_SERVER_ADDRESS}:{COAP_GATEWAY_PORT}/proxy/forward-batch"
+    )
+    GATEWAY_OBSERVE_URI: ClassVar[str] = (
+        f"coap://{COAP_SERVER_ADDRESS}:{COAP_GATEWAY_PORT}/proxy/observe"
+    )
+
+    # Hosts probed by the gateway discovery: "host", "host:port" or a CIDR block
+    DISCOVERY_TARGETS: ClassVar[List[str]] = [COAP_SERVER_ADDRESS]
+    DISCOVERY_INTERVAL: ClassVar[float] = 60.0
+    DISCOVERY_CONCURRENCY: ClassVar[int] = 32
+    DISCOVERY_TIMEOUT: ClassVar[float] = 5.0
+
+    # Seconds between two writes of the gateway registry file
+    REGISTRY_FLUSH_INTERVAL: ClassVar[float] = 5.0
+
+    # Outstanding forwarded requests allowed per device server, and their timeout
+    FORWARD_MAX_IN_FLIGHT_PER_HOST: ClassVar[int] = 8
+    FORWARD_REQUEST_TIMEOUT: ClassVar[float] = 10.0
+    # Maximum number of commands accepted by the batch forward resource
+    FORWARD_BATCH_MAX_ITEMS: ClassVar[int] = 64
+
+    # Minimum seconds between two state notifications of an actuator resource
+    ACTUATOR_NOTIFY_MIN_INTERVAL: ClassVar[float] = 0.5
 
     @staticmethod
     def build_coap_room_path(room_id: str, device_id: str, resource_id: str) -> str:
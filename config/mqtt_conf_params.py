@@ -10,6 +10,9 @@ class MqttConfigurationParameters(object):
     TELEMETRY_TOPIC: ClassVar[str] = "telemetry"
     EVENT_TOPIC: ClassVar[str] = "event"
     CONTROL_TOPIC: ClassVar[str] = "control"
+    BATCH_TOPIC: ClassVar[str] = "batch"
+    # Seconds a partial telemetry batch waits for the missing resources
+    TELEMETRY_BATCH_MAX_DELAY: ClassVar[float] = 2.0
 
     @staticmethod
     def build_telemetry_room_topic(
@@ -76,3 +79,29 @@ class MqttConfigurationParameters(object):
             MqttConfigurationParameters.CONTROL_TOPIC,
             resource_id,
         )
+
+    @staticmethod
+    def build_telemetry_batch_room_topic(room_id: str) -> str:
+        """Build the batched telemetry topic of the room level smart objects.
+        e.g., hvac/room/{room_id}/batch/telemetry
+        """
+        return "{0}/{1}/{2}/{3}".format(
+            MqttConfigurationParameters.BASIC_TOPIC,
+            room_id,
+            MqttConfigurationParameters.BATCH_TOPIC,
+            MqttConfigurationParameters.TELEMETRY_TOPIC,
+        )
+
+    @staticmethod
+    def build_telemetry_batch_rack_topic(room_id: str, rack_id: str) -> str:
+        """Build the batched telemetry topic of a rack.
+        e.g., hvac/room/{room_id}/rack/{rack_id}/batch/telemetry
+        """
+        return "{0}/{1}/{2}/{3}/{4}/{5}".format(
+            MqttConfigurationParameters.BASIC_TOPIC,
+            room_id,
+            MqttConfigurationParameters.RACK_TOPIC,
+            rack_id,
+            MqttConfigurationParameters.BATCH_TOPIC,
+            MqttConfigurationParameters.TELEMETRY_TOPIC,
+        )
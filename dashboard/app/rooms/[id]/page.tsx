@@ -9,7 +9,7 @@ import { Sensor } from "@/types/sensor"
 import { CoolingSystemHub, RackList } from "@/components/room/smartobject"
 import { formatName } from "@/lib/utils"
 import GraficSensors from "@/components/room/smartobject/sensors/GraficSensors"
-import { convertSmartObjectData } from "@/lib/utils"
+import { convertSmartObjectData, parseTelemetrySamples } from "@/lib/utils"
 import { useMQTTClient } from "@/hooks/useMqttClient"
 import { PolicyDialog } from "@/components/room/PolicyDialog"
 import { toast } from "sonner"
@@ -61,9 +61,13 @@ export default function RoomDetailPage() {
     fetchRoom()
   }, [roomId])
 
-  const mqttTopics = roomInfo?.smart_objects?.flatMap(obj =>
-    (obj.sensors?.map((sensor: Sensor) => `hvac/room/${roomId}/device/${obj.id}/telemetry/${sensor.resource_id}`) ?? [])
-  ) || []
+  // Con HVAC_BATCH_TELEMETRY la telemetria arriva solo sul topic batch della stanza
+  const mqttTopics = roomInfo ? [
+    ...(roomInfo.smart_objects?.flatMap(obj =>
+      (obj.sensors?.map((sensor: Sensor) => `hvac/room/${roomId}/device/${obj.id}/telemetry/${sensor.resource_id}`) ?? [])
+    ) ?? []),
+    `hvac/room/${roomId}/batch/telemetry`,
+  ] : []
 
 
   useMQTTClient({
@@ -78,31 +82,29 @@ export default function RoomDetailPage() {
             .replace(/"(\d+\.?\d*)"}/g, '$1}').replace(/"(\d+\.?\d*)",/g, '$1,"').replace(/":"(\d+\.?\d*)",/g, '":$1,"')
         }
         const telemetryData = JSON.parse(jsonMessage)
-        const topicParts = topic.split("/")
-        const resourceId = topicParts[topicParts.length - 1]
-        const value = telemetryData.data_value ?? telemetryData.data__value
-        const timestamp = telemetryData.timestamp || Date.now()
-
-        const newHistoryEntry = { time: new Date(timestamp).toLocaleTimeString(), value }
-        setRoomInfo(prev =>
-          prev ? {
-            ...prev,
-            smart_objects: prev.smart_objects.map(obj => ({
-              ...obj,
-              sensors: obj.sensors?.map(sensor => {
-                if (sensor.resource_id === resourceId) {
-                  const updatedHistory = [
-                    ...(sensor.history ?? []),
-                    newHistoryEntry
-                  ].slice(-5)
-                  localStorage.setItem(`sensor-history-${sensor.resource_id}`, JSON.stringify(updatedHistory))
-                  return { ...sensor, value, timestamp, history: updatedHistory }
-                }
-                return sensor
-              }) ?? [],
-            }))
-          } : prev
-        )
+
+        for (const { resourceId, value, timestamp } of parseTelemetrySamples(topic, telemetryData)) {
+          const newHistoryEntry = { time: new Date(timestamp).toLocaleTimeString(), value }
+          setRoomInfo(prev =>
+            prev ? {
+              ...prev,
+              smart_objects: prev.smart_objects.map(obj => ({
+                ...obj,
+                sensors: obj.sensors?.map(sensor => {
+                  if (sensor.resource_id === resourceId) {
+                    const updatedHistory = [
+                      ...(sensor.history ?? []),
+                      newHistoryEntry
+                    ].slice(-5)
+                    localStorage.setItem(`sensor-history-${sensor.resource_id}`, JSON.stringify(updatedHistory))
+                    return { ...sensor, value, timestamp, history: updatedHistory }
+                  }
+                  return sensor
+                }) ?? [],
+              }))
+            } : prev
+          )
+        }
       } catch (error) {
         toast.error("Error parsing MQTT message: " + error)
       }
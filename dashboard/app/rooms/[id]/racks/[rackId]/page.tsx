@@ -6,7 +6,7 @@ import { RackStatusCard, SmartObjectSection } from "@/components/rack"
 import { Rack } from "@/types/rack"
 import { Sensor } from "@/types/sensor"
 import { SmartObject } from "@/types/smartobject"
-import { convertSmartObjectData } from "@/lib/utils"
+import { convertSmartObjectData, parseTelemetrySamples } from "@/lib/utils"
 import { useMQTTClient } from "@/hooks/useMqttClient"
 import Loader from "@/components/loader"
 import { toast } from "sonner"
@@ -68,12 +68,16 @@ export default function RackDetailPage() {
         fetchRackData()
     }, [rackId, roomId])
 
-    // Genera i topic MQTT per i sensori del rack
-    const mqttTopics = rackInfo?.smart_objects?.flatMap(obj =>
-    (obj.sensors?.map((sensor: Sensor) =>
-        `hvac/room/${roomId}/rack/${rackId}/device/${obj.id}/telemetry/${sensor.resource_id}`
-    ) ?? [])
-    ) || []
+    // Genera i topic MQTT per i sensori del rack, più il topic batch del rack
+    // usato al posto dei topic per risorsa con HVAC_BATCH_TELEMETRY
+    const mqttTopics = rackInfo ? [
+        ...(rackInfo.smart_objects?.flatMap(obj =>
+        (obj.sensors?.map((sensor: Sensor) =>
+            `hvac/room/${roomId}/rack/${rackId}/device/${obj.id}/telemetry/${sensor.resource_id}`
+        ) ?? [])
+        ) ?? []),
+        `hvac/room/${roomId}/rack/${rackId}/batch/telemetry`,
+    ] : []
 
     // Gestione MQTT per le telemetrie dei sensori
     useMQTTClient({
@@ -96,49 +100,47 @@ export default function RackDetailPage() {
                 }
 
                 const telemetryData = JSON.parse(jsonMessage)
-                const topicParts = topic.split("/")
-                const resourceId = topicParts[topicParts.length - 1]
-                const value = telemetryData.data_value ?? telemetryData.data__value
-                const timestamp = telemetryData.timestamp || Date.now()
-
-                if (value === undefined) {
-                    console.warn("⚠️ No valid data_value found in rack telemetry message:", telemetryData)
-                    return
-                }
-
-                const newHistoryEntry = {
-                    time: new Date(timestamp).toLocaleTimeString(),
-                    value
-                }
 
-                setRackInfo(prev =>
-                    prev ? {
-                        ...prev,
-                        smart_objects: prev.smart_objects.map(obj => ({
-                            ...obj,
-                            sensors: obj.sensors?.map(sensor => {
-                                if (sensor.resource_id === resourceId) {
-
-                                    const updatedHistory = [
-                                        ...(sensor.history ?? []),
-                                        newHistoryEntry
-                                    ].slice(-10) // Mantieni solo le ultime 10 telemetrie
-
-                                    // Salva la history in localStorage
-                                    localStorage.setItem(`sensor-history-${sensor.resource_id}`, JSON.stringify(updatedHistory))
-
-                                    return {
-                                        ...sensor,
-                                        value,
-                                        timestamp,
-                                        history: updatedHistory
+                for (const { resourceId, value, timestamp } of parseTelemetrySamples(topic, telemetryData)) {
+                    if (value === undefined) {
+                        console.warn("⚠️ No valid data_value found in rack telemetry message:", telemetryData)
+                        continue
+                    }
+
+                    const newHistoryEntry = {
+                        time: new Date(timestamp).toLocaleTimeString(),
+                        value
+                    }
+
+                    setRackInfo(prev =>
+                        prev ? {
+                            ...prev,
+                            smart_objects: prev.smart_objects.map(obj => ({
+                                ...obj,
+                                sensors: obj.sensors?.map(sensor => {
+                                    if (sensor.resource_id === resourceId) {
+
+                                        const updatedHistory = [
+                                            ...(sensor.history ?? []),
+                                            newHistoryEntry
+                                        ].slice(-10) // Mantieni solo le ultime 10 telemetrie
+
+                                        // Salva la history in localStorage
+                                        localStorage.setItem(`sensor-history-${sensor.resource_id}`, JSON.stringify(updatedHistory))
+
+                                        return {
+                                            ...sensor,
+                                            value,
+                                            timestamp,
+                                            history: updatedHistory
+                                        }
                                     }
-                                }
-                                return sensor
-                            }) ?? [],
-                        }))
-                    } : prev
-                )
+                                    return sensor
+                                }) ?? [],
+                            }))
+                        } : prev
+                    )
+                }
             } catch (error) {
                 toast.error("❌ Error parsing rack MQTT message: " + error)
                 toast.error("❌ Raw message: " + message)
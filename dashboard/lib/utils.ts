@@ -51,4 +51,35 @@ export function convertSmartObjectData(smartObject: SmartObject): SmartObject {
 
 export function findSensorById(smartObject: SmartObject, sensorId: string): Sensor | undefined {
     return smartObject.sensors?.find(sensor => sensor.resource_id === sensorId)
-}
\ No newline at end of file
+}
+
+export interface TelemetrySample {
+    resourceId: string
+    value: any
+    timestamp: number
+}
+
+// Campi di ogni sample di un messaggio telemetry_batch, vedi TelemetryBatchMessage
+type BatchSample = [string, string, string, number, any]
+
+/**
+ * Estrae i sample da un messaggio di telemetria: un messaggio per risorsa,
+ * con la risorsa nell'ultimo segmento del topic, oppure un batch di rack/stanza
+ * pubblicato con HVAC_BATCH_TELEMETRY
+ */
+export function parseTelemetrySamples(topic: string, data: any): TelemetrySample[] {
+    if (data?.type === "telemetry_batch") {
+        return (data.samples ?? []).map(([, , resourceId, timestamp, value]: BatchSample) => ({
+            resourceId,
+            value,
+            timestamp: timestamp || Date.now(),
+        }))
+    }
+
+    const topicParts = topic.split("/")
+    return [{
+        resourceId: topicParts[topicParts.length - 1],
+        value: data.data_value ?? data.data__value,
+        timestamp: data.timestamp || Date.now(),
+    }]
+}
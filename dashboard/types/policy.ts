@@ -1,6 +1,9 @@
 export interface PolicyCondition {
   operator: "<" | ">" | "==" | "<=" | ">=" | "!="
   value: number
+  cooldown_s?: number
+  hysteresis?: number
+  consecutive_samples?: number
 }
 
 export interface PolicyAction {
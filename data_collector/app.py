@@ -6,6 +6,7 @@ from data_collector.resources.device import DeviceControlAPI
 from data_collector.resources.policy import PolicyUpdateAPI
 from data_collector.resources.policy import PolicyRoomAPI
 from data_collector.resources.policy import PolicyRackAPI
+from data_collector.resources.stats import SystemStatsAPI
 from flask_cors import CORS
 import json
 
@@ -14,6 +15,16 @@ import os
 
 BASE_URL = "/hvac/api"
 CLOUD_URL = "http://127.0.0.1:5002/api"
+# Directory of the on-disk telemetry spool, unsynced data is kept in memory if unset
+SPOOL_DIR = os.getenv("HVAC_SPOOL_DIR")
+# Simulate the temperatures with the thermal model, independent random values if unset
+THERMAL_MODEL = os.getenv("HVAC_THERMAL_MODEL", "").lower() in ("1", "true", "yes")
+# Update the sensors of each type with one vectorized SensorFleet step per tick
+SENSOR_FLEETS = os.getenv("HVAC_SENSOR_FLEETS", "").lower() in ("1", "true", "yes")
+# Publish the telemetry of each rack as one batch message per tick
+BATCH_TELEMETRY = os.getenv("HVAC_BATCH_TELEMETRY", "").lower() in ("1", "true", "yes")
+# Payload codec of the smart objects: json, cbor (cbor2) or msgpack (msgpack)
+PAYLOAD_CODEC = os.getenv("HVAC_PAYLOAD_CODEC", "json")
 
 
 def create_app() -> Flask:
@@ -32,7 +43,14 @@ def create_app() -> Flask:
         room_configs = json.load(f).get("rooms", [])
 
     system_manager = HVACSystemManager(
-        room_configs=room_configs, policy_file=policy_file_path, cloud_url=CLOUD_URL
+        room_configs=room_configs,
+        policy_file=policy_file_path,
+        cloud_url=CLOUD_URL,
+        spool_dir=SPOOL_DIR,
+        thermal_model=THERMAL_MODEL,
+        batch_telemetry=BATCH_TELEMETRY,
+        payload_codec=PAYLOAD_CODEC,
+        sensor_fleets=SENSOR_FLEETS,
     )
 
     # Room endpoints
@@ -74,6 +92,12 @@ def create_app() -> Flask:
         resource_class_kwargs={"system_manager": system_manager},
     )
 
+    api.add_resource(
+        SystemStatsAPI,
+        f"{BASE_URL}/stats",
+        resource_class_kwargs={"system_manager": system_manager},
+    )
+
     @app.errorhandler(404)
     def not_found(error):
         return {"message": "Resource not found"}, 404
@@ -0,0 +1,69 @@
+import time
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# (rack_id, object_id), the granularity at which the gateway routes commands
+ActuatorKey = Tuple[Optional[str], Optional[str]]
+
+IGNORED_COMMAND_FIELDS = ("event_type", "event_data")
+
+
+class ActuatorStateCache:
+    """
+    Last known state of the actuators of a room.
+    Entries are refreshed from the control events the actuators publish on
+    MQTT and expire after ``ttl_s`` seconds, so a command is only considered
+    redundant while the cached state is recent.
+    """
+
+    def __init__(self, ttl_s: float = 60.0):
+        self.ttl_s = ttl_s
+        self._states: Dict[ActuatorKey, Tuple[Dict[str, Any], float]] = {}
+        self._lock = threading.Lock()
+        self.deduplicated = 0
+
+    def update_from_event(self, event: Dict[str, Any]) -> None:
+        """Record the new state carried by an actuator control event."""
+        event_data = event.get("event_data") or {}
+        new_state = event_data.get("new_state")
+        if not isinstance(new_state, dict):
+            return
+
+        metadata = event.get("metadata", {})
+        key = (metadata.get("rack_id"), metadata.get("object_id"))
+        with self._lock:
+            self._states[key] = (dict(new_state), time.monotonic())
+
+    def is_redundant(self, payload: Dict[str, Any]) -> bool:
+        """
+        Tell whether a gateway payload would leave the actuator unchanged.
+        Unknown or expired actuators are never considered redundant.
+        """
+        key = (payload.get("rack_id"), payload.get("object_id"))
+        with self._lock:
+            entry = self._states.get(key)
+            if entry is None:
+                return False
+
+            state, updated_at = entry
+            if time.monotonic() - updated_at > self.ttl_s:
+                del self._states[key]
+                return False
+
+            for field, value in payload.get("command", {}).items():
+                if field in IGNORED_COMMAND_FIELDS:
+                    continue
+                if field == "status" and isinstance(value, str):
+                    value = value.upper()
+                if state.get(field) != value:
+                    return False
+
+            self.deduplicated += 1
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._states),
+            "ttl_s": self.ttl_s,
+            "deduplicated": self.deduplicated,
+        }
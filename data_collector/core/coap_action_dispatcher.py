@@ -0,0 +1,186 @@
+import json
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+from aiocoap import Message, Context, POST
+from config.coap_conf_params import CoapConfigurationParameters
+
+
+class CoapActionDispatcher:
+    """
+    Sends policy actions to the CoAP gateway from one long-lived event loop.
+    A single client Context is shared by every request; callers on other
+    threads hand payloads over through a bounded queue drained by a fixed
+    number of worker coroutines.
+    """
+
+    def __init__(
+        self,
+        gateway_uri: str = CoapConfigurationParameters.GATEWAY_URI,
+        max_queue_size: int = 256,
+        max_in_flight: int = 16,
+        request_timeout: float = 10.0,
+    ):
+        self.gateway_uri = gateway_uri
+        self.max_queue_size = max_queue_size
+        self.max_in_flight = max_in_flight
+        self.request_timeout = request_timeout
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._context: Optional[Context] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+        self.failed = 0
+
+        self.logger = logging.getLogger("CoapActionDispatcher")
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        """Start the event loop thread. Safe to call more than once."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run_loop, name="CoapActionDispatcher", daemon=True
+            )
+            self._thread.start()
+        self._ready.wait(timeout=5)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Cancel the workers, release the client context and stop the loop."""
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout)
+        except Exception as e:
+            self.logger.error(f"Error shutting down CoAP action dispatcher: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+
+    def submit(self, payload: Dict[str, Any]) -> bool:
+        """
+        Queue a payload for delivery to the gateway.
+        Returns False if the queue is full and the action was dropped.
+        Must not be called from the dispatcher event loop thread.
+        """
+        if self._thread is None:
+            self.start()
+
+        if self._loop is None:
+            self._record_drop(payload)
+            return False
+
+        # The queue is only touched on the loop thread, wait for its verdict
+        future = asyncio.run_coroutine_threadsafe(self._enqueue(payload), self._loop)
+        try:
+            return future.result(timeout=self.request_timeout)
+        except Exception as e:
+            future.cancel()
+            self.logger.error(f"Failed to queue action for {payload.get('object_id')}: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.max_queue_size,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    def _record_drop(self, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self.dropped += 1
+        self.logger.warning(
+            f"Action queue full, dropping command for {payload.get('object_id')}"
+        )
+
+    def _run_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._setup())
+            self._loop = loop
+        except Exception as e:
+            self.logger.error(f"Failed to start CoAP action dispatcher: {e}")
+            loop.close()
+            return
+        finally:
+            self._ready.set()
+
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    async def _setup(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._context = await Context.create_client_context()
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.max_in_flight)
+        ]
+
+    async def _shutdown(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._context is not None:
+            await self._context.shutdown()
+            self._context = None
+
+    async def _enqueue(self, payload: Dict[str, Any]) -> bool:
+        try:
+            self._queue.put_nowait(payload)
+            self.submitted += 1
+            return True
+        except asyncio.QueueFull:
+            self._record_drop(payload)
+            return False
+
+    async def _worker(self) -> None:
+        while True:
+            payload = await self._queue.get()
+            self.in_flight += 1
+            try:
+                await self._send_coap_command(payload)
+            finally:
+                self.in_flight -= 1
+                self._queue.task_done()
+
+    async def _send_coap_command(self, payload: Dict[str, Any]) -> None:
+        """
+        Send a CoAP command to a specific actuator through the gateway.
+        """
+        try:
+            payload_dump = json.dumps(payload).encode("utf-8")
+            request = Message(code=POST, uri=self.gateway_uri, payload=payload_dump)
+
+            response = await asyncio.wait_for(
+                self._context.request(request).response, self.request_timeout
+            )
+            self.completed += 1
+            self.logger.info(
+                f"CoAP Response for {payload.get('object_id')}: {response.code}"
+            )
+
+        except Exception as e:
+            self.failed += 1
+            self.logger.error(
+                f"Failed to send CoAP command to actuator {payload.get('object_id')}: {e}"
+            )
@@ -0,0 +1,140 @@
+import time
+from typing import Any, Callable, Dict
+
+
+class PolicyTriggerState:
+    """In-memory trigger state of a single policy."""
+
+    __slots__ = (
+        "active",
+        "streak",
+        "last_fired",
+        "last_triggered_at",
+        "trigger_count",
+        "suppressed_count",
+        "dropped_count",
+        "previous_fire",
+    )
+
+    def __init__(self):
+        self.active = False
+        self.streak = 0
+        self.last_fired = float("-inf")
+        self.last_triggered_at = None
+        self.trigger_count = 0
+        self.suppressed_count = 0
+        self.dropped_count = 0
+        # (last_fired, last_triggered_at) before the latest fire, to undo it
+        self.previous_fire = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "trigger_count": self.trigger_count,
+            "suppressed_count": self.suppressed_count,
+            "dropped_count": self.dropped_count,
+            "last_triggered_at": self.last_triggered_at,
+        }
+
+
+class CompiledPolicy:
+    """
+    Pre-processed form of a policy used on the evaluation hot path.
+    The operator, threshold and action payload are resolved once when the
+    policy is loaded, added or updated, so evaluating a telemetry sample is a
+    single comparison.
+
+    Actions are edge triggered: a policy fires when its condition has held for
+    ``consecutive_samples`` samples and stays quiet until the value crosses
+    back past the threshold by ``hysteresis``. ``cooldown_s`` is the minimum
+    time between two actions of the same policy.
+    """
+
+    __slots__ = (
+        "policy",
+        "policy_id",
+        "operator_fn",
+        "threshold",
+        "release_fn",
+        "release_threshold",
+        "cooldown_s",
+        "consecutive_samples",
+        "payload",
+        "state",
+    )
+
+    def __init__(
+        self,
+        policy: Dict[str, Any],
+        operator_fn: Callable[[Any, Any], bool],
+        threshold: float,
+        release_fn: Callable[[Any, Any], bool],
+        release_threshold: float,
+        cooldown_s: float,
+        consecutive_samples: int,
+        payload: Dict[str, Any],
+    ):
+        self.policy = policy
+        self.policy_id = policy.get("id")
+        self.operator_fn = operator_fn
+        self.threshold = threshold
+        self.release_fn = release_fn
+        self.release_threshold = release_threshold
+        self.cooldown_s = cooldown_s
+        self.consecutive_samples = consecutive_samples
+        self.payload = payload
+        self.state = PolicyTriggerState()
+
+    def should_fire(self, value: float, now: float) -> bool:
+        """
+        Update the trigger state with a new sample and tell whether the
+        action must be emitted. Samples that match the condition but do not
+        cause an action are counted as suppressed.
+        """
+        state = self.state
+
+        if state.active:
+            if self.release_fn(value, self.release_threshold):
+                state.active = False
+            elif self.operator_fn(value, self.threshold):
+                state.suppressed_count += 1
+            return False
+
+        if not self.operator_fn(value, self.threshold):
+            state.streak = 0
+            return False
+
+        state.streak += 1
+        if (
+            state.streak < self.consecutive_samples
+            or now - state.last_fired < self.cooldown_s
+        ):
+            state.suppressed_count += 1
+            return False
+
+        state.previous_fire = (state.last_fired, state.last_triggered_at)
+        state.active = True
+        state.streak = 0
+        state.last_fired = now
+        state.last_triggered_at = int(time.time() * 1000)
+        state.trigger_count += 1
+        return True
+
+    def rearm(self) -> None:
+        """
+        Undo the latest fire when its action was not sent, so the policy
+        fires again on the next matching samples instead of waiting for a
+        release that may never come.
+        """
+        state = self.state
+        if not state.active or state.previous_fire is None:
+            return
+        state.active = False
+        state.streak = 0
+        state.last_fired, state.last_triggered_at = state.previous_fire
+        state.previous_fire = None
+        state.trigger_count -= 1
+        state.dropped_count += 1
+
+    def __repr__(self) -> str:
+        return f"CompiledPolicy(id={self.policy_id}, threshold={self.threshold})"
@@ -1,25 +1,74 @@
-import paho.mqtt.client as mqtt
+import os
+import gzip
 import json
+import hashlib
+import random
+import paho.mqtt.client as mqtt
 import logging
+from typing import Iterator, List, Optional, Tuple
 from data_collector.models.Room import Room
 from data_collector.core.policy_manager import PolicyManager
+from data_collector.core.actuator_state_cache import ActuatorStateCache
+from data_collector.core.telemetry_buffer import TelemetryBuffer
+from data_collector.core.telemetry_spool import TelemetrySpool
+from data_collector.core.coap_action_dispatcher import CoapActionDispatcher
+from smart_objects.messages.telemetry_batch_message import TelemetryBatchMessage
 
 
 import threading
 import requests
+from requests.adapters import HTTPAdapter
 import time
 
 
 class DataCollector:
+    SYNC_BATCH_SIZE = 5000
+    SYNC_CHUNK_BYTES = 512 * 1024
+    SYNC_COMPRESSION_LEVEL = 6
+    SYNC_TIMEOUT = (5, 30)
+    SYNC_MAX_RETRIES = 4
+    SYNC_BACKOFF_BASE = 1.0
+    SYNC_BACKOFF_MAX = 30.0
+    SYNC_RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+    SYNC_HEADERS = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+
     def __init__(
-        self, room_id: str, policy_file: str, cloud_url: str, sync_interval: int = 30
+        self,
+        room_id: str,
+        policy_file: str,
+        cloud_url: str,
+        sync_interval: int = 30,
+        action_dispatcher: CoapActionDispatcher = None,
+        state_cache_ttl: float = 60.0,
+        buffer_capacity: int = 100_000,
+        buffer_eviction_policy: str = "drop_oldest",
+        spool_dir: Optional[str] = None,
     ):
         self.room_id = room_id
-        self.policy_manager = PolicyManager(room_id, policy_file)
+        self.state_cache = ActuatorStateCache(ttl_s=state_cache_ttl)
+        self.policy_manager = PolicyManager(
+            room_id, policy_file, action_dispatcher, self.state_cache
+        )
         self.logger = logging.getLogger(__name__)
-        self.collected_telemetries = []
+        if spool_dir:
+            # Unsynced telemetry survives restarts and is replayed on startup
+            self.telemetry_buffer = TelemetrySpool(os.path.join(spool_dir, room_id))
+        else:
+            self.telemetry_buffer = TelemetryBuffer(
+                capacity=buffer_capacity, eviction_policy=buffer_eviction_policy
+            )
         self.cloud_url = cloud_url
         self.sync_interval = sync_interval
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=2))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=2))
+        self.sync_stats = {
+            "chunks_sent": 0,
+            "bytes_raw": 0,
+            "bytes_sent": 0,
+            "retries": 0,
+            "failures": 0,
+        }
         self._start_sync_thread()
 
     def connect(self, mqtt_client: mqtt.Client):
@@ -29,55 +78,168 @@ class DataCollector:
             (f"hvac/room/{self.room_id}/device/+/control/+", 1),
             (f"hvac/room/{self.room_id}/rack/+/device/+/telemetry/+", 0),
             (f"hvac/room/{self.room_id}/rack/+/device/+/control/+", 1),
+            (f"hvac/room/{self.room_id}/batch/telemetry", 0),
+            (f"hvac/room/{self.room_id}/rack/+/batch/telemetry", 0),
         ]
         mqtt_client.subscribe(topics)
 
-    def handle_message(self, msg):
-        """Handle message for this specific room"""
+    def handle_message(self, topic: str, telemetry: dict):
+        """Handle an already decoded message for this specific room"""
         try:
-            telemetry = json.loads(msg.payload.decode())
-            if msg.topic.split("/")[-2] == "telemetry":
+            message_kind = topic.rsplit("/", 2)[-2]
+            if message_kind == "batch":
+                # A batch stands for one telemetry message per sample
+                for sample in TelemetryBatchMessage.expand(telemetry):
+                    self.policy_manager.evaluate(sample)
+                    self._collect_telemetry(sample)
+                return
+            if message_kind == "telemetry":
                 self.policy_manager.evaluate(telemetry)
+            elif message_kind == "control":
+                self.state_cache.update_from_event(telemetry)
             self._collect_telemetry(telemetry)
         except Exception as e:
             self.logger.error(f"Error handling telemetry for room {self.room_id}: {e}")
 
+    def get_stats(self) -> dict:
+        return {
+            "policies": self.policy_manager.get_policy_stats(),
+            "actuator_state_cache": self.state_cache.get_stats(),
+            "telemetry_buffer": self.telemetry_buffer.get_stats(),
+            "cloud_sync": dict(self.sync_stats),
+        }
+
     def _collect_telemetry(self, telemetry: dict):
-        self.collected_telemetries.append(telemetry)
+        self.telemetry_buffer.append(telemetry)
+
+    def close(self):
+        """Stop the sync thread and persist the pending telemetry"""
+        self._sync_stop.set()
+        close = getattr(self.telemetry_buffer, "close", None)
+        if close is not None:
+            close()
 
     def _start_sync_thread(self):
+        # A spool is also flushed on its fsync interval, so a burst followed
+        # by silence does not stay in the file buffer until the next append
+        flush = getattr(self.telemetry_buffer, "flush", None)
+        tick = self.sync_interval
+        if flush is not None:
+            tick = min(tick, self.telemetry_buffer.fsync_interval_s)
+
         def sync_loop():
-            while True:
-                time.sleep(self.sync_interval)
-                self._sync_with_cloud()
+            next_sync = time.monotonic() + self.sync_interval
+            while not self._sync_stop.wait(tick):
+                try:
+                    if flush is not None:
+                        flush()
+                    if time.monotonic() >= next_sync:
+                        next_sync = time.monotonic() + self.sync_interval
+                        self._sync_with_cloud()
+                except Exception as e:
+                    self.logger.error(f"❌ Sync loop error for room {self.room_id}: {e}")
 
+        self._sync_stop = threading.Event()
         thread = threading.Thread(target=sync_loop, daemon=True)
         thread.start()
 
     def _sync_with_cloud(self):
-        if not self.collected_telemetries:
-            return
+        """
+        Upload the buffered telemetry in size-bounded gzip chunks.
+        Each chunk is committed as soon as the cloud acknowledges it, so a
+        failure only leaves the chunks that were not delivered in the buffer.
+        """
+        while len(self.telemetry_buffer):
+            telemetries, upto_seq = self.telemetry_buffer.snapshot(self.SYNC_BATCH_SIZE)
+            if not telemetries:
+                return
 
-        try:
-            payload = {
-                "room_id": self.room_id,
-                "timestamp": int(time.time()),
-                "telemetries": self.collected_telemetries,
-            }
+            remaining = len(telemetries)
+            for count, key, body, raw_size in self._build_sync_chunks(telemetries):
+                if not self._post_sync_chunk(body, count, key):
+                    return
+                # Only acknowledged chunks count as sent
+                self.sync_stats["bytes_raw"] += raw_size
+                self.sync_stats["bytes_sent"] += len(body)
+                remaining -= count
+                self.telemetry_buffer.commit(upto_seq - remaining)
 
-            response = requests.post(f"{self.cloud_url}/sync", json=payload)
+    def _build_sync_chunks(
+        self, telemetries: List[dict]
+    ) -> Iterator[Tuple[int, str, bytes, int]]:
+        """
+        Yield (entry count, idempotency key, gzip compressed /sync body,
+        uncompressed body size)
+        """
+        header = json.dumps({"room_id": self.room_id, "timestamp": int(time.time())})
+        prefix = header[:-1].encode("utf-8") + b', "telemetries": ['
+        suffix = b"]}"
 
-            if response.status_code == 200:
-                self.logger.info(
-                    f"✅ Synced {len(self.collected_telemetries)} telemetry entries for room {self.room_id}"
+        chunk: List[bytes] = []
+        chunk_size = 0
+        for telemetry in telemetries:
+            encoded = json.dumps(telemetry, separators=(",", ":")).encode("utf-8")
+            if chunk and chunk_size + len(encoded) > self.SYNC_CHUNK_BYTES:
+                yield self._finish_chunk(prefix, chunk, suffix)
+                chunk = []
+                chunk_size = 0
+            chunk.append(encoded)
+            chunk_size += len(encoded) + 1
+
+        if chunk:
+            yield self._finish_chunk(prefix, chunk, suffix)
+
+    def _finish_chunk(
+        self, prefix: bytes, chunk: List[bytes], suffix: bytes
+    ) -> Tuple[int, str, bytes, int]:
+        entries = b",".join(chunk)
+        # Derived from the entries only, so re-sending the same chunk later
+        # reuses the key and the cloud can discard the duplicate
+        key = f"{self.room_id}-{hashlib.sha256(entries).hexdigest()}"
+        body = prefix + entries + suffix
+        compressed = gzip.compress(body, compresslevel=self.SYNC_COMPRESSION_LEVEL)
+        return len(chunk), key, compressed, len(body)
+
+    def _post_sync_chunk(self, body: bytes, count: int, key: str) -> bool:
+        """Post a chunk, retrying transient failures with exponential backoff"""
+        for attempt in range(self.SYNC_MAX_RETRIES + 1):
+            if attempt:
+                self.sync_stats["retries"] += 1
+                time.sleep(self._backoff_delay(attempt))
+
+            try:
+                response = self.session.post(
+                    f"{self.cloud_url}/sync",
+                    data=body,
+                    headers={**self.SYNC_HEADERS, "Idempotency-Key": key},
+                    timeout=self.SYNC_TIMEOUT,
                 )
-                self.collected_telemetries.clear()
-            else:
+            except requests.RequestException as e:
                 self.logger.warning(
-                    f"❌ Sync failed for room {self.room_id}: {response.status_code} - {response.text}"
+                    f"❌ Sync attempt {attempt + 1} failed for room {self.room_id}: {e}"
                 )
+                continue
 
-        except Exception as e:
-            self.logger.error(
-                f"❌ Error syncing with cloud for room {self.room_id}: {e}"
+            if response.ok:
+                self.sync_stats["chunks_sent"] += 1
+                self.logger.info(
+                    f"✅ Synced {count} telemetry entries for room {self.room_id}"
+                )
+                return True
+
+            self.logger.warning(
+                f"❌ Sync failed for room {self.room_id}: {response.status_code} - {response.text}"
             )
+            if response.status_code not in self.SYNC_RETRY_STATUS:
+                break
+
+        self.sync_stats["failures"] += 1
+        self.logger.error(
+            f"❌ Giving up syncing {count} entries for room {self.room_id}, will retry next interval"
+        )
+        return False
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        cap = min(self.SYNC_BACKOFF_MAX, self.SYNC_BACKOFF_BASE * 2 ** (attempt - 1))
+        return random.uniform(0, cap)
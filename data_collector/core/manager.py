@@ -1,24 +1,62 @@
 import paho.mqtt.client as mqtt
-import json
 import logging
-from typing import List, Dict, Any
+from functools import partial
+from typing import List, Dict, Any, Optional, Type
 from data_collector.models.Room import Room
 from smart_objects.resources.CoapServer import CoapServer
 from data_collector.core.data_collector import DataCollector
+from data_collector.core.payload_codec import decode_payload
+from data_collector.core.coap_action_dispatcher import CoapActionDispatcher
+from data_collector.core.message_dispatcher import MessageDispatcher
 from data_collector.factories.room_factory import RoomFactory
 from smart_objects.resources.CoapControllable import CoapControllable
+from smart_objects.resources.TelemetryBatcher import TelemetryBatcher
+from smart_objects.messages.message_codec import get_codec
+from smart_objects.simulation.thermal_model import ThermalModel
+from smart_objects.models.Sensor import Sensor
+from smart_objects.sensors.sensor_fleet import SensorFleet, assign_to_fleets
 from config.mqtt_conf_params import MqttConfigurationParameters
 
 
 class HVACSystemManager:
     def __init__(
-        self, room_configs: List[Dict[str, Any]], policy_file: str, cloud_url: str
+        self,
+        room_configs: List[Dict[str, Any]],
+        policy_file: str,
+        cloud_url: str,
+        message_workers: int = 4,
+        message_queue_size: int = 1000,
+        message_overflow_policy: str = "drop_oldest",
+        spool_dir: Optional[str] = None,
+        thermal_model: bool = False,
+        batch_telemetry: bool = False,
+        payload_codec: str = "json",
+        sensor_fleets: bool = False,
     ) -> None:
         self.rooms: Dict[str, Room] = {}
         self.data_collectors: Dict[str, DataCollector] = {}
         self.policy_file: str = policy_file
         self.cloud_url = cloud_url
+        self.spool_dir = spool_dir
+        # Drive the temperature sensors from a thermal model instead of random draws
+        self.thermal_model: Optional[ThermalModel] = (
+            ThermalModel() if thermal_model else None
+        )
+        # Update the sensors of each type with one vectorized fleet step per tick
+        self.use_sensor_fleets = sensor_fleets
+        self.sensor_fleets: Dict[Type[Sensor], SensorFleet] = {}
+        # Publish one telemetry batch per tick for each rack and room level group
+        self.batch_telemetry = batch_telemetry
+        self.telemetry_batchers: List[TelemetryBatcher] = []
+        # Codec of the payloads published by the smart objects, decoding
+        # detects it from the payload
+        self.payload_codec = get_codec(payload_codec)
         self.logger = logging.getLogger("HVACSystemManager")
+        self.message_dispatcher = MessageDispatcher(
+            num_workers=message_workers,
+            queue_size=message_queue_size,
+            overflow_policy=message_overflow_policy,
+        )
 
         self.mqtt_client: mqtt.Client = mqtt.Client("hvac_system_manager")
         self.mqtt_client.on_message = self.on_message
@@ -27,27 +65,47 @@ class HVACSystemManager:
             MqttConfigurationParameters.BROKER_PORT,
         )
         self.coap_server = CoapServer()
+        self.action_dispatcher = CoapActionDispatcher()
+        self.action_dispatcher.start()
 
         self.initialize_rooms(room_configs)
+        if self.thermal_model is not None:
+            self.thermal_model.start()
+        for fleet in self.sensor_fleets.values():
+            fleet.start()
+        self.message_dispatcher.start()
         self.mqtt_client.loop_start()
         self.coap_server.start_coap_server()
 
     def on_message(self, client, userdata, msg):
-        """Central message router that dispatches to appropriate DataCollector"""
+        """
+        Central message router running on the MQTT network thread.
+        Messages are only queued here; decoding and processing happen on the
+        worker that owns the room.
+        """
         try:
-            telemetry = json.loads(msg.payload.decode())
-            room_id = telemetry.get("metadata", {}).get("room_id")
+            # Topics are hvac/room/{room_id}/..., so route without the payload
+            topic_parts = msg.topic.split("/", 3)
+            room_id = topic_parts[2] if len(topic_parts) > 3 else None
 
-            if room_id and room_id in self.data_collectors:
-                self.data_collectors[room_id].handle_message(msg)
-            else:
+            if not self.message_dispatcher.has_room(room_id):
                 self.logger.warning(
                     f"No DataCollector found for room_id: {room_id}, topic: {msg.topic}"
                 )
+                return
+
+            if not self.message_dispatcher.dispatch(room_id, msg.topic, msg.payload):
+                self.logger.warning(
+                    f"Message queue of room {room_id} full, dropping {msg.topic}"
+                )
 
         except Exception as e:
             self.logger.error(f"Error routing message: {e}")
 
+    @staticmethod
+    def _process_message(collector: DataCollector, topic: str, payload: bytes) -> None:
+        collector.handle_message(topic, decode_payload(payload))
+
     def initialize_rooms(self, room_configs: List[Dict[str, Any]]) -> None:
         for room_conf in room_configs:
             room = RoomFactory.create_room(room_conf, self.mqtt_client)
@@ -58,9 +116,32 @@ class HVACSystemManager:
                 self.policy_file,
                 cloud_url=self.cloud_url,
                 sync_interval=30,
+                action_dispatcher=self.action_dispatcher,
+                spool_dir=self.spool_dir,
             )
             collector.connect(self.mqtt_client)
             self.data_collectors[room.room_id] = collector
+            self.message_dispatcher.add_room(
+                room.room_id, partial(self._process_message, collector)
+            )
+
+            for smart_object in room.smart_objects.values():
+                smart_object.set_payload_codec(self.payload_codec)
+            for rack in room.racks.values():
+                for smart_object in rack.smart_objects.values():
+                    smart_object.set_payload_codec(self.payload_codec)
+
+            if self.batch_telemetry:
+                self._attach_telemetry_batchers(room)
+
+            if self.thermal_model is not None:
+                self.thermal_model.add_smart_objects(room.smart_objects.values())
+                for rack in room.racks.values():
+                    self.thermal_model.add_smart_objects(rack.smart_objects.values())
+
+            # After the thermal model, which keeps the sensors it drives
+            if self.use_sensor_fleets:
+                self._add_to_sensor_fleets(room)
 
             for smart_object in room.smart_objects.values():
                 smart_object.start()
@@ -72,16 +153,80 @@ class HVACSystemManager:
                     if isinstance(smart_object, CoapControllable):
                         self.coap_server.add_smart_object(smart_object)
 
+    def _attach_telemetry_batchers(self, room: Room) -> None:
+        groups = [(None, room.smart_objects)] + [
+            (rack.rack_id, rack.smart_objects) for rack in room.racks.values()
+        ]
+        for rack_id, smart_objects in groups:
+            batcher = TelemetryBatcher(
+                self.mqtt_client, room.room_id, rack_id, codec=self.payload_codec
+            )
+            for smart_object in smart_objects.values():
+                smart_object.set_telemetry_batcher(batcher)
+            batcher.start()
+            self.telemetry_batchers.append(batcher)
+
+    def _add_to_sensor_fleets(self, room: Room) -> None:
+        smart_objects = list(room.smart_objects.values())
+        for rack in room.racks.values():
+            smart_objects.extend(rack.smart_objects.values())
+        sensors = [
+            resource
+            for smart_object in smart_objects
+            for resource in smart_object.resource_map.values()
+            if isinstance(resource, Sensor)
+        ]
+        added = assign_to_fleets(self.sensor_fleets, sensors)
+        self.logger.info(f"Sensor fleets drive {added} sensors of room {room.room_id}")
+
     def get_room_by_id(self, room_id: str) -> Room:
         """Retrieve a room by its ID"""
         return self.rooms.get(room_id)
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Return runtime statistics of the message and action pipelines"""
+        return {
+            "mqtt_messages": self.message_dispatcher.get_stats(),
+            "coap_actions": self.action_dispatcher.get_stats(),
+            "telemetry_batches": [
+                batcher.get_stats() for batcher in self.telemetry_batchers
+            ],
+            "thermal_model": (
+                self.thermal_model.get_stats() if self.thermal_model else None
+            ),
+            "sensor_fleets": [fleet.get_stats() for fleet in self.sensor_fleets.values()],
+            "rooms": {
+                room_id: collector.get_stats()
+                for room_id, collector in self.data_collectors.items()
+            },
+        }
+
     def disconnect(self) -> None:
         """Disconnect MQTT client and CoAP server gracefully"""
+        # Publish the pending telemetry batches while still connected
+        for batcher in getattr(self, "telemetry_batchers", []):
+            batcher.stop()
+
         if self.mqtt_client:
             self.mqtt_client.loop_stop()
             self.mqtt_client.disconnect()
 
+        if hasattr(self, "message_dispatcher"):
+            self.message_dispatcher.stop()
+
+        # Persist the telemetry spooled by the rooms
+        for collector in getattr(self, "data_collectors", {}).values():
+            collector.close()
+
+        if getattr(self, "thermal_model", None) is not None:
+            self.thermal_model.stop()
+
+        for fleet in getattr(self, "sensor_fleets", {}).values():
+            fleet.stop()
+
+        if hasattr(self, "action_dispatcher"):
+            self.action_dispatcher.stop()
+
         if hasattr(self, "coap_server"):
             self.coap_server.stop_coap_server()
 
@@ -0,0 +1,211 @@
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+MessageHandler = Callable[[str, Any], None]
+
+
+class _RoomQueue:
+    __slots__ = (
+        "room_id",
+        "handler",
+        "shard",
+        "items",
+        "enqueued",
+        "processed",
+        "dropped",
+        "last_lag",
+        "max_lag",
+    )
+
+    def __init__(self, room_id: str, handler: MessageHandler, shard: "_Shard"):
+        self.room_id = room_id
+        self.handler = handler
+        self.shard = shard
+        self.items: Deque[Tuple[float, str, Any]] = deque()
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        # The worker pops items under the shard lock
+        with self.shard.condition:
+            depth = len(self.items)
+            oldest = self.items[0][0] if depth else None
+        oldest_age = time.monotonic() - oldest if oldest is not None else 0.0
+        return {
+            "worker": self.shard.index,
+            "depth": depth,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "oldest_age_ms": round(oldest_age * 1000, 3),
+            "last_lag_ms": round(self.last_lag * 1000, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+        }
+
+
+class _Shard:
+    def __init__(self, index: int):
+        self.index = index
+        self.condition = threading.Condition()
+        self.rooms: List[_RoomQueue] = []
+        self.pending = 0
+        self.next_room = 0
+        self.thread: Optional[threading.Thread] = None
+
+
+class MessageDispatcher:
+    """
+    Moves message handling off the MQTT network thread.
+    Every room gets its own bounded queue. Rooms are sharded over a pool of
+    worker threads, so the messages of one room are always handled in order
+    by the same worker while different rooms are processed in parallel.
+
+    When a room queue is full the overflow policy decides what happens:
+    ``drop_oldest`` discards the oldest queued message, ``drop_newest``
+    rejects the incoming one and ``block`` makes the caller wait up to
+    ``block_timeout`` seconds for room before rejecting it.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 4,
+        queue_size: int = 1000,
+        overflow_policy: str = "drop_oldest",
+        block_timeout: float = 1.0,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Invalid overflow policy '{overflow_policy}'. Must be one of {OVERFLOW_POLICIES}"
+            )
+        if num_workers < 1 or queue_size < 1:
+            raise ValueError("num_workers and queue_size must be >= 1")
+
+        self.num_workers = num_workers
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+
+        self._shards: List[_Shard] = [_Shard(i) for i in range(num_workers)]
+        self._rooms: Dict[str, _RoomQueue] = {}
+        self._running = False
+
+        self.logger = logging.getLogger("MessageDispatcher")
+
+    def add_room(self, room_id: str, handler: MessageHandler) -> None:
+        """Register a room queue, assigning rooms to workers round-robin."""
+        shard = self._shards[len(self._rooms) % self.num_workers]
+        room = _RoomQueue(room_id, handler, shard)
+        with shard.condition:
+            shard.rooms.append(room)
+        self._rooms[room_id] = room
+
+    def has_room(self, room_id: str) -> bool:
+        return room_id in self._rooms
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        for shard in self._shards:
+            shard.thread = threading.Thread(
+                target=self._worker_loop,
+                args=(shard,),
+                name=f"MessageDispatcher-{shard.index}",
+                daemon=True,
+            )
+            shard.thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._running = False
+        for shard in self._shards:
+            with shard.condition:
+                shard.condition.notify_all()
+        for shard in self._shards:
+            if shard.thread is not None:
+                shard.thread.join(timeout)
+                shard.thread = None
+
+    def dispatch(self, room_id: str, topic: str, payload: Any) -> bool:
+        """
+        Queue a message for its room. Returns False if the message was
+        rejected because the room queue is full.
+        """
+        room = self._rooms.get(room_id)
+        if room is None:
+            raise KeyError(f"No queue registered for room {room_id}")
+
+        shard = room.shard
+        with shard.condition:
+            if len(room.items) >= self.queue_size:
+                if self.overflow_policy == "drop_oldest":
+                    room.items.popleft()
+                    shard.pending -= 1
+                    room.dropped += 1
+                elif self.overflow_policy == "drop_newest":
+                    room.dropped += 1
+                    return False
+                else:
+                    shard.condition.wait_for(
+                        lambda: len(room.items) < self.queue_size or not self._running,
+                        timeout=self.block_timeout,
+                    )
+                    if len(room.items) >= self.queue_size:
+                        room.dropped += 1
+                        return False
+
+            room.items.append((time.monotonic(), topic, payload))
+            room.enqueued += 1
+            shard.pending += 1
+            shard.condition.notify_all()
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.num_workers,
+            "queue_size": self.queue_size,
+            "overflow_policy": self.overflow_policy,
+            "rooms": {
+                room_id: room.to_dict() for room_id, room in list(self._rooms.items())
+            },
+        }
+
+    def _next_item(self, shard: _Shard) -> Tuple[_RoomQueue, float, str, Any]:
+        """Pop the next message of the shard, visiting its rooms round-robin."""
+        for _ in range(len(shard.rooms)):
+            room = shard.rooms[shard.next_room]
+            shard.next_room = (shard.next_room + 1) % len(shard.rooms)
+            if room.items:
+                enqueued_at, topic, payload = room.items.popleft()
+                shard.pending -= 1
+                return room, enqueued_at, topic, payload
+        raise RuntimeError(f"Worker {shard.index} has no pending message")
+
+    def _worker_loop(self, shard: _Shard) -> None:
+        while True:
+            with shard.condition:
+                shard.condition.wait_for(lambda: shard.pending > 0 or not self._running)
+                if not self._running:
+                    return
+                room, enqueued_at, topic, payload = self._next_item(shard)
+                if self.overflow_policy == "block":
+                    shard.condition.notify_all()
+
+            lag = time.monotonic() - enqueued_at
+            room.last_lag = lag
+            if lag > room.max_lag:
+                room.max_lag = lag
+
+            try:
+                room.handler(topic, payload)
+            except Exception as e:
+                self.logger.error(f"Error handling message on {topic}: {e}")
+            finally:
+                room.processed += 1
@@ -0,0 +1,10 @@
+from typing import Any
+from smart_objects.messages.message_codec import sniff_codec
+
+
+def decode_payload(payload: bytes) -> Any:
+    """
+    Decode an MQTT payload, detecting JSON, CBOR or MessagePack from its
+    first byte. JSON uses orjson when it is installed.
+    """
+    return sniff_codec(payload).decode(payload)
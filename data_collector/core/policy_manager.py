@@ -1,15 +1,19 @@
 import json
+import time
 import logging
 import operator
-from typing import Dict, List, Callable, Any
-import threading
+from typing import Dict, List, Callable, Any, Optional, Tuple
 
-import asyncio
-from aiocoap import Message, Context, POST
 from config.coap_conf_params import CoapConfigurationParameters
+from data_collector.core.compiled_policy import CompiledPolicy
+from data_collector.core.actuator_state_cache import ActuatorStateCache
+from data_collector.core.coap_action_dispatcher import CoapActionDispatcher
 
 EVENT_TYPE = "POLICY_APPLIED"
 
+# (room_id, rack_id, object_id, resource_id, sensor_type)
+PolicyKey = Tuple[Any, Any, Any, Any, Any]
+
 
 class PolicyManager:
 
@@ -22,11 +26,33 @@ class PolicyManager:
         "!=": operator.ne,
     }
 
-    def __init__(self, room_id: str, policy_file_path: str):
+    # Operator that releases a triggered policy, and the direction in which
+    # the hysteresis band moves the release threshold away from the trigger one
+    RELEASE_OPERATORS: Dict[str, Tuple[Callable[[Any, Any], bool], int]] = {
+        ">": (operator.le, -1),
+        ">=": (operator.lt, -1),
+        "<": (operator.ge, 1),
+        "<=": (operator.gt, 1),
+        "==": (operator.ne, 0),
+        "!=": (operator.eq, 0),
+    }
+
+    def __init__(
+        self,
+        room_id: str,
+        policy_file_path: str,
+        action_dispatcher: Optional[CoapActionDispatcher] = None,
+        state_cache: Optional[ActuatorStateCache] = None,
+    ):
         self.room_id = room_id
         self.policy_file_path = policy_file_path
         self.policies: List[Dict[str, Any]] = []
+        self.policy_index: Dict[PolicyKey, List[CompiledPolicy]] = {}
         self.gateway_uri = CoapConfigurationParameters.GATEWAY_URI
+        self.action_dispatcher = action_dispatcher or CoapActionDispatcher(
+            self.gateway_uri
+        )
+        self.state_cache = state_cache
         self.logger = logging.getLogger("PolicyManager")
         self.logger.setLevel(logging.DEBUG)
         self.load_policies()
@@ -39,6 +65,7 @@ class PolicyManager:
                 rooms_data = data.get("rooms", {})
 
                 self.policies = rooms_data.get(self.room_id, [])
+                self._rebuild_index()
                 self.logger.info(
                     f"Loaded {len(self.policies)} policies for room {self.room_id}."
                 )
@@ -55,6 +82,7 @@ class PolicyManager:
 
     def update_policies(self, new_policies: List[Dict[str, Any]]):
         self.policies = new_policies
+        self._rebuild_index()
         with open(self.policy_file_path, "w") as f:
             json.dump({self.room_id: self.policies}, f, indent=2)
         self.logger.info("Policies updated.")
@@ -131,7 +159,8 @@ class PolicyManager:
                     f"Policy room_id {policy['room_id']} does not match PolicyManager room_id {self.room_id}"
                 )
 
-            # Add the policy to the list
+            # Compile first so an invalid policy is rejected before it is stored
+            self._index_policy(policy)
             self.policies.append(policy)
 
             # Save policies to file
@@ -224,7 +253,14 @@ class PolicyManager:
             # Preserve the original ID
             updated_policy["id"] = policy_id
             
-            # Update the policy in the list
+            # Compile first so an invalid update leaves the old policy active
+            compiled = self._compile_policy(updated_policy)
+            previous = self._find_compiled(self.policies[policy_index])
+            if previous is not None:
+                # Same id: keep cooldown, active edge and counters
+                compiled.state = previous.state
+            self._unindex_policy(self.policies[policy_index])
+            self._insert_compiled(updated_policy, compiled)
             self.policies[policy_index] = updated_policy
             
             # Save policies to file
@@ -254,6 +290,7 @@ class PolicyManager:
             
             # Remove the policy from the list
             deleted_policy = self.policies.pop(policy_index)
+            self._unindex_policy(deleted_policy)
             
             # Save policies to file
             self._save_policies_to_file()
@@ -300,61 +337,156 @@ class PolicyManager:
             self.logger.error(f"Error saving policies to file: {e}")
             raise
 
-    def evaluate(self, telemetry: Dict[str, Any]) -> None:
-        for policy in self.policies:
-            try:
-                if self._matches_policy_sensor(policy, telemetry):
-                    value = float(telemetry.get("data_value", 0))
-                    operator_fn = self.OPERATORS[policy["condition"]["operator"]]
-                    threshold = policy["condition"]["value"]
-
-                    if operator_fn(value, threshold):
-                        self.logger.info(f"Policy {policy['id']} triggered.")
-
-                        payload = self._get_payload(policy)
-                        self._execute_policy_action_safely(payload)
-            except Exception as e:
-                self.logger.error(f"Error evaluating policy {policy['id']}: {e}")
-
-    def _matches_policy_sensor(
-        self, policy: Dict[str, Any], telemetry: Dict[str, Any]
-    ) -> bool:
+    def _policy_key(self, policy: Dict[str, Any]) -> Optional[PolicyKey]:
         """
-        Check if the telemetry matches the policy sensor.
-        Uses the policy type field to determine matching logic.
+        Build the index key of the telemetry a policy listens to.
+        Room policies only match telemetry that is not bound to a rack.
         """
-        telemetry_metadata: Dict[str, Any] = telemetry.get("metadata", {})
-        telemetry_room_id = telemetry_metadata.get("room_id")
-        telemetry_rack_id = telemetry_metadata.get("rack_id")
-        telemetry_object_id = telemetry_metadata.get("object_id")
-        telemetry_resource_id = telemetry_metadata.get("resource_id")
-        telemetry_type = telemetry.get("type")
-
-        if telemetry_room_id != policy["room_id"]:
-            return False
-
         policy_type = policy.get("type", "unknown")
 
         if policy_type == "room":
-            if telemetry_rack_id is not None:
-                return False
+            rack_id = None
+        elif policy_type == "smart_object":
+            rack_id = policy.get("rack_id")
+        else:
+            self.logger.warning(
+                f"Unknown policy type: {policy_type} for policy {policy.get('id')}"
+            )
+            return None
+
+        return (
+            policy.get("room_id"),
+            rack_id,
+            policy.get("object_id"),
+            policy.get("resource_id"),
+            policy.get("sensor_type"),
+        )
+
+    @staticmethod
+    def _telemetry_key(telemetry: Dict[str, Any]) -> PolicyKey:
+        """Build the index key of a telemetry message from its metadata."""
+        metadata: Dict[str, Any] = telemetry.get("metadata", {})
+        return (
+            metadata.get("room_id"),
+            metadata.get("rack_id"),
+            metadata.get("object_id"),
+            metadata.get("resource_id"),
+            telemetry.get("type"),
+        )
 
-            return (
-                telemetry_object_id == policy.get("object_id")
-                and telemetry_resource_id == policy.get("resource_id")
-                and telemetry_type == policy.get("sensor_type")
+    def _compile_policy(self, policy: Dict[str, Any]) -> CompiledPolicy:
+        """
+        Resolve the operator, threshold and action payload of a policy once.
+        Raises ValueError if the policy cannot be evaluated.
+        """
+        condition = policy.get("condition", {})
+        operator_fn = self.OPERATORS.get(condition.get("operator"))
+        if operator_fn is None:
+            raise ValueError(
+                f"Invalid operator: {condition.get('operator')}. Allowed: {list(self.OPERATORS.keys())}"
             )
 
-        elif policy_type == "smart_object":
-            return (
-                telemetry_rack_id == policy.get("rack_id")
-                and telemetry_object_id == policy.get("object_id")
-                and telemetry_resource_id == policy.get("resource_id")
-                and telemetry_type == policy.get("sensor_type")
+        try:
+            threshold = float(condition["value"])
+            cooldown_s = float(condition.get("cooldown_s", 0))
+            hysteresis = float(condition.get("hysteresis", 0))
+            consecutive_samples = int(condition.get("consecutive_samples", 1))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(
+                f"Invalid condition for policy {policy.get('id')}: {condition}"
             )
 
-        self.logger.warning(f"Unknown policy type: {policy_type}")
-        return False
+        if cooldown_s < 0 or hysteresis < 0 or consecutive_samples < 1:
+            raise ValueError(
+                "Invalid condition: 'cooldown_s' and 'hysteresis' must be >= 0 "
+                "and 'consecutive_samples' must be >= 1"
+            )
+
+        release_fn, direction = self.RELEASE_OPERATORS[condition["operator"]]
+
+        return CompiledPolicy(
+            policy,
+            operator_fn,
+            threshold,
+            release_fn,
+            threshold + direction * hysteresis,
+            cooldown_s,
+            consecutive_samples,
+            self._get_payload(policy),
+        )
+
+    def _insert_compiled(self, policy: Dict[str, Any], compiled: CompiledPolicy) -> None:
+        key = self._policy_key(policy)
+        if key is not None:
+            self.policy_index.setdefault(key, []).append(compiled)
+
+    def _index_policy(self, policy: Dict[str, Any]) -> None:
+        self._insert_compiled(policy, self._compile_policy(policy))
+
+    def _find_compiled(self, policy: Dict[str, Any]) -> Optional[CompiledPolicy]:
+        for compiled in self.policy_index.get(self._policy_key(policy), []):
+            if compiled.policy is policy:
+                return compiled
+        return None
+
+    def _unindex_policy(self, policy: Dict[str, Any]) -> None:
+        key = self._policy_key(policy)
+        bucket = self.policy_index.get(key)
+        if not bucket:
+            return
+
+        # Policy ids are not guaranteed unique, so match on identity
+        self.policy_index[key] = [c for c in bucket if c.policy is not policy]
+        if not self.policy_index[key]:
+            del self.policy_index[key]
+
+    def _rebuild_index(self) -> None:
+        # Trigger states of the current policies, reused for unchanged ids
+        states = {}
+        for compiled_policies in self.policy_index.values():
+            for compiled in compiled_policies:
+                states.setdefault(compiled.policy_id, compiled.state)
+
+        self.policy_index = {}
+        for policy in self.policies:
+            try:
+                compiled = self._compile_policy(policy)
+            except Exception as e:
+                self.logger.error(f"Skipping policy {policy.get('id')}: {e}")
+                continue
+            state = states.pop(policy.get("id"), None)
+            if state is not None:
+                compiled.state = state
+            self._insert_compiled(policy, compiled)
+
+    def evaluate(self, telemetry: Dict[str, Any]) -> None:
+        compiled_policies = self.policy_index.get(self._telemetry_key(telemetry))
+        if not compiled_policies:
+            return
+
+        try:
+            value = float(telemetry.get("data_value", 0))
+        except (TypeError, ValueError) as e:
+            self.logger.error(f"Invalid telemetry value for room {self.room_id}: {e}")
+            return
+
+        now = time.monotonic()
+        for compiled in compiled_policies:
+            try:
+                if compiled.should_fire(value, now):
+                    self.logger.info(f"Policy {compiled.policy_id} triggered.")
+                    if not self._execute_policy_action_safely(compiled.payload):
+                        compiled.rearm()
+            except Exception as e:
+                self.logger.error(f"Error evaluating policy {compiled.policy_id}: {e}")
+
+    def get_policy_stats(self) -> List[Dict[str, Any]]:
+        """Return trigger and suppression counters for every active policy."""
+        stats = []
+        for compiled_policies in list(self.policy_index.values()):
+            for compiled in compiled_policies:
+                stats.append({"id": compiled.policy_id, **compiled.state.to_dict()})
+        return stats
 
     def _get_payload(self, policy: Dict[str, Any]) -> Dict[str, Any]:
         policy_type = policy.get("type", "unknown")
@@ -364,7 +496,8 @@ class PolicyManager:
             "description": policy_description,
             "threshold": threshold,
         }
-        command = policy.get("action", {}).get("command", {})
+        # Copy so the stored policy command is not polluted with event fields
+        command = dict(policy.get("action", {}).get("command", {}))
         command.update(
             {
                 "event_type": EVENT_TYPE,
@@ -395,36 +528,25 @@ class PolicyManager:
             )
         return payload
 
-    def _execute_policy_action_safely(self, payload: Dict[str, Any]):
+    def _execute_policy_action_safely(self, payload: Dict[str, Any]) -> bool:
         """
-        Execute policy action safely, handling async execution in a separate thread.
-        """
-
-        def run_async_action():
-            try:
-                asyncio.run(self._send_coap_command(payload))
-            except Exception as e:
-                self.logger.error(f"Error executing policy action: {e}")
-
-        thread = threading.Thread(target=run_async_action, daemon=True)
-        thread.start()
-
-    async def _send_coap_command(self, payload: Dict[str, Any]):
-        """
-        Send a CoAP command to a specific actuator.
+        Hand the policy action over to the shared CoAP action dispatcher,
+        unless the actuator is already known to be in the commanded state.
+        Returns False if the action was not sent, so the policy can fire again.
         """
         try:
-            context = await Context.create_client_context()
-
-            payload_dump = json.dumps(payload).encode("utf-8")
-            request = Message(code=POST, uri=self.gateway_uri, payload=payload_dump)
-
-            response = await context.request(request).response
-            self.logger.info(
-                f"CoAP Response for {payload.get('object_id')}: {response.code}"
-            )
+            if self.state_cache is not None and self.state_cache.is_redundant(payload):
+                self.logger.debug(
+                    f"Actuator {payload.get('object_id')} already in commanded state, skipping"
+                )
+                return False
 
+            if not self.action_dispatcher.submit(payload):
+                self.logger.warning(
+                    f"Policy action for {payload.get('object_id')} dropped in room {self.room_id}"
+                )
+                return False
+            return True
         except Exception as e:
-            self.logger.error(
-                f"Failed to send CoAP command to actuator {payload.get('object_id')}: {e}"
-            )
+            self.logger.error(f"Error executing policy action: {e}")
+            return False
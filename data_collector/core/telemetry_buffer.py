@@ -0,0 +1,185 @@
+import time
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+EVICTION_POLICIES = ("drop_oldest", "drop_newest")
+
+# How an entry is stored in the ring
+KIND_FLOAT = 0
+KIND_INT = 1
+KIND_RAW = 2
+
+# (type, metadata items): one interned series per sensor resource
+SeriesKey = Tuple[Any, Tuple[Tuple[str, Any], ...]]
+
+
+class TelemetryBuffer:
+    """
+    Bounded ring buffer of the telemetry collected by a room.
+    Numeric samples are stored column-wise: the series (type and metadata) is
+    interned once and every sample only costs a timestamp, a value and a
+    series id in preallocated arrays. Control events and other non numeric
+    messages are kept as-is in a side table.
+
+    Entries are numbered with a monotonic sequence number. Uploads take a
+    ``snapshot`` of the oldest entries and ``commit`` them once the cloud
+    acknowledged them, so samples collected during an upload are never lost.
+    """
+
+    def __init__(self, capacity: int = 100_000, eviction_policy: str = "drop_oldest"):
+        if eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(
+                f"Invalid eviction policy '{eviction_policy}'. Must be one of {EVICTION_POLICIES}"
+            )
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+
+        self.capacity = capacity
+        self.eviction_policy = eviction_policy
+
+        self._timestamps = array("q", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._series_ids = array("l", [0]) * capacity
+        self._kinds = array("b", bytes(capacity))
+        self._raw: Dict[int, Dict[str, Any]] = {}
+
+        self._series_index: Dict[SeriesKey, int] = {}
+        self._series: List[Tuple[Any, Dict[str, Any]]] = []
+
+        self._head_seq = 0
+        self._next_seq = 0
+        self._lock = threading.Lock()
+
+        self.appended = 0
+        self.evicted = 0
+        self.rejected = 0
+        self.committed = 0
+
+    def __len__(self) -> int:
+        return self._next_seq - self._head_seq
+
+    def append(self, message: Dict[str, Any]) -> bool:
+        """
+        Store a decoded MQTT message. Returns False if the buffer is full and
+        the eviction policy rejected it.
+        """
+        kind, series_id, value = self._encode(message)
+        timestamp = message.get("timestamp")
+        if not isinstance(timestamp, int):
+            timestamp = int(time.time() * 1000)
+
+        with self._lock:
+            if self._next_seq - self._head_seq >= self.capacity:
+                if self.eviction_policy == "drop_newest":
+                    self.rejected += 1
+                    return False
+                self._raw.pop(self._head_seq, None)
+                self._head_seq += 1
+                self.evicted += 1
+
+            seq = self._next_seq
+            slot = seq % self.capacity
+            self._kinds[slot] = kind
+            self._timestamps[slot] = timestamp
+            if kind == KIND_RAW:
+                self._raw[seq] = message
+            else:
+                self._values[slot] = value
+                self._series_ids[slot] = series_id
+
+            self._next_seq = seq + 1
+            self.appended += 1
+        return True
+
+    def snapshot(
+        self, max_entries: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Return the oldest entries in the ``/sync`` message format together
+        with the sequence number to pass to ``commit`` once they are uploaded.
+        """
+        with self._lock:
+            start = self._head_seq
+            end = self._next_seq
+            if max_entries is not None:
+                end = min(end, start + max_entries)
+
+            entries = []
+            for seq in range(start, end):
+                slot = seq % self.capacity
+                kind = self._kinds[slot]
+                if kind == KIND_RAW:
+                    entries.append(self._raw[seq])
+                    continue
+
+                sensor_type, metadata = self._series[self._series_ids[slot]]
+                value = self._values[slot]
+                entries.append(
+                    {
+                        "type": sensor_type,
+                        "metadata": metadata,
+                        "timestamp": self._timestamps[slot],
+                        "data_value": int(value) if kind == KIND_INT else value,
+                    }
+                )
+        return entries, end
+
+    def commit(self, upto_seq: int) -> None:
+        """Release every entry with a sequence number lower than ``upto_seq``."""
+        with self._lock:
+            upto_seq = min(upto_seq, self._next_seq)
+            for seq in range(self._head_seq, upto_seq):
+                self._raw.pop(seq, None)
+            if upto_seq > self._head_seq:
+                self.committed += upto_seq - self._head_seq
+                self._head_seq = upto_seq
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self),
+            "capacity": self.capacity,
+            "eviction_policy": self.eviction_policy,
+            "series": len(self._series),
+            "raw_entries": len(self._raw),
+            "appended": self.appended,
+            "committed": self.committed,
+            "evicted": self.evicted,
+            "rejected": self.rejected,
+        }
+
+    def _encode(self, message: Dict[str, Any]) -> Tuple[int, int, float]:
+        value = message.get("data_value")
+        if "event_data" in message or isinstance(value, bool):
+            return KIND_RAW, 0, 0.0
+        if isinstance(value, float):
+            kind = KIND_FLOAT
+        elif isinstance(value, int) and -(2**53) <= value <= 2**53:
+            kind = KIND_INT
+        else:
+            return KIND_RAW, 0, 0.0
+
+        metadata = message.get("metadata")
+        if not isinstance(metadata, dict) or set(message) - {
+            "type",
+            "metadata",
+            "timestamp",
+            "data_value",
+        }:
+            return KIND_RAW, 0, 0.0
+
+        try:
+            key = (message.get("type"), tuple(metadata.items()))
+            series_id = self._series_index.get(key)
+        except TypeError:
+            # Unhashable metadata values cannot be interned
+            return KIND_RAW, 0, 0.0
+
+        if series_id is None:
+            with self._lock:
+                series_id = self._series_index.get(key)
+                if series_id is None:
+                    series_id = len(self._series)
+                    self._series.append((message.get("type"), dict(metadata)))
+                    self._series_index[key] = series_id
+        return kind, series_id, float(value)
@@ -0,0 +1,351 @@
+import os
+import json
+import time
+import zlib
+import struct
+import logging
+import threading
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+# Every record is framed as <payload length><crc32 of payload><payload>
+RECORD_HEADER = struct.Struct("<II")
+SEGMENT_SUFFIX = ".seg"
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+class _Segment:
+    __slots__ = ("first_seq", "count", "size", "path")
+
+    def __init__(self, first_seq: int, path: str, count: int = 0, size: int = 0):
+        self.first_seq = first_seq
+        self.path = path
+        self.count = count
+        self.size = size
+
+    @property
+    def end_seq(self) -> int:
+        return self.first_seq + self.count
+
+
+class TelemetrySpool:
+    """
+    Durable write-ahead spool of the telemetry collected by a room.
+    Messages are appended to size-bounded segment files named after the
+    sequence number of their first record; only the segment list is kept in
+    memory. A checkpoint file records the last sequence acknowledged by the
+    cloud, fully acknowledged segments are deleted and unacknowledged ones
+    are replayed when the collector restarts. A segment holding a corrupted
+    record is renamed to ``.corrupt`` and skipped from that record on.
+
+    Writes are fsynced in batches of ``fsync_batch`` records or every
+    ``fsync_interval_s`` seconds. When the spool grows beyond ``max_bytes``
+    the oldest segments are dropped. The interface is the same as
+    TelemetryBuffer so the collector can use either.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 4 * 1024 * 1024,
+        max_bytes: int = 512 * 1024 * 1024,
+        fsync_batch: int = 500,
+        fsync_interval_s: float = 1.0,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync_batch = fsync_batch
+        self.fsync_interval_s = fsync_interval_s
+        self.logger = logging.getLogger("TelemetrySpool")
+
+        self._segments: List[_Segment] = []
+        self._file: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+        self._head_seq = 0
+        self._head_offset = 0
+        self._cursor: Optional[Tuple[int, int]] = None
+        self._unsynced = 0
+        self._last_fsync = time.monotonic()
+
+        self.appended = 0
+        self.committed = 0
+        self.evicted = 0
+        self.recovered = 0
+        self.corrupted = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    def __len__(self) -> int:
+        return self._next_seq - self._head_seq
+
+    @property
+    def _next_seq(self) -> int:
+        return self._segments[-1].end_seq if self._segments else self._head_seq
+
+    def append(self, message: Dict[str, Any]) -> bool:
+        payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        record = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        with self._lock:
+            segment = self._segments[-1] if self._segments else None
+            if (
+                segment is None
+                or segment.size >= self.segment_bytes
+                or self._file is None
+            ):
+                segment = self._roll_segment()
+
+            self._file.write(record)
+            segment.count += 1
+            segment.size += len(record)
+            self.appended += 1
+
+            self._unsynced += 1
+            if (
+                self._unsynced >= self.fsync_batch
+                or time.monotonic() - self._last_fsync >= self.fsync_interval_s
+            ):
+                self._fsync()
+        return True
+
+    def flush(self) -> None:
+        """Force the pending writes to disk."""
+        with self._lock:
+            if self._unsynced:
+                self._fsync()
+
+    def snapshot(
+        self, max_entries: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Read the oldest unacknowledged entries from disk. Returns them with the
+        sequence number to pass to ``commit`` once they are uploaded.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+            entries: List[Dict[str, Any]] = []
+            seq = self._head_seq
+            offset = self._head_offset
+            limit = self._next_seq
+            if max_entries is not None:
+                limit = min(limit, seq + max_entries)
+
+            for segment in list(self._segments):
+                if seq >= limit:
+                    break
+                if segment.end_seq <= seq:
+                    continue
+                if segment.first_seq >= seq:
+                    seq = segment.first_seq
+                    offset = 0
+
+                with open(segment.path, "rb") as f:
+                    f.seek(offset)
+                    while seq < min(limit, segment.end_seq):
+                        payload = self._read_record(f)
+                        if payload is None:
+                            if entries:
+                                # Hand out what precedes it, the next
+                                # snapshot starts at the corrupted record
+                                limit = seq
+                            else:
+                                self._quarantine(segment, seq)
+                                seq, offset = self._head_seq, self._head_offset
+                            break
+                        entries.append(json.loads(payload))
+                        offset += RECORD_HEADER.size + len(payload)
+                        seq += 1
+
+            self._cursor = (seq, offset)
+            return entries, seq
+
+    def commit(self, upto_seq: int) -> None:
+        """Acknowledge every entry below ``upto_seq`` and delete spent segments."""
+        with self._lock:
+            upto_seq = min(upto_seq, self._next_seq)
+            if upto_seq <= self._head_seq:
+                return
+
+            self.committed += upto_seq - self._head_seq
+            if self._cursor is not None and self._cursor[0] == upto_seq:
+                self._head_offset = self._cursor[1]
+            else:
+                self._head_offset = self._offset_of(upto_seq)
+            self._head_seq = upto_seq
+            self._cursor = None
+
+            self._write_checkpoint()
+            self._compact()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._fsync()
+                self._file.close()
+                self._file = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self),
+            "segments": len(self._segments),
+            "bytes": sum(segment.size for segment in self._segments),
+            "max_bytes": self.max_bytes,
+            "appended": self.appended,
+            "committed": self.committed,
+            "evicted": self.evicted,
+            "recovered": self.recovered,
+            "corrupted": self.corrupted,
+        }
+
+    def _fsync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_fsync = time.monotonic()
+
+    def _roll_segment(self) -> _Segment:
+        if self._file is not None:
+            self._fsync()
+            self._file.close()
+
+        first_seq = self._next_seq
+        path = os.path.join(self.directory, f"{first_seq:020d}{SEGMENT_SUFFIX}")
+        segment = _Segment(first_seq, path)
+        self._segments.append(segment)
+        self._file = open(path, "ab")
+        self._enforce_size_cap()
+        return segment
+
+    def _enforce_size_cap(self) -> None:
+        """Drop the oldest segments, never the one being written, above max_bytes."""
+        total = sum(segment.size for segment in self._segments)
+        while total > self.max_bytes and len(self._segments) > 1:
+            segment = self._segments.pop(0)
+            total -= segment.size
+            lost = segment.end_seq - max(self._head_seq, segment.first_seq)
+            if lost > 0:
+                self.evicted += lost
+                self.logger.warning(
+                    f"Spool {self.directory} over {self.max_bytes} bytes, dropped {lost} entries"
+                )
+                self._head_seq = segment.end_seq
+                self._head_offset = 0
+            self._remove(segment.path)
+        self._write_checkpoint()
+
+    def _quarantine(self, segment: _Segment, seq: int) -> None:
+        """Set aside a segment whose record ``seq``, at the head, is corrupted."""
+        lost = segment.end_seq - seq
+        self.corrupted += lost
+        self.logger.error(
+            f"Corrupted record {seq} in {segment.path}, skipping {lost} entries"
+        )
+        if segment is self._segments[-1] and self._file is not None:
+            self._file.close()
+            self._file = None
+        self._segments.remove(segment)
+        os.replace(segment.path, segment.path + ".corrupt")
+
+        self._head_seq = segment.end_seq
+        self._head_offset = 0
+        # Acknowledged segments before it, the next append rolls a new one
+        while self._segments and self._segments[0].end_seq <= self._head_seq:
+            self._remove(self._segments.pop(0).path)
+        if self._file is None and self._segments:
+            self._file = open(self._segments[-1].path, "ab")
+        self._write_checkpoint()
+
+    def _compact(self) -> None:
+        while len(self._segments) > 1 and self._segments[0].end_seq <= self._head_seq:
+            self._remove(self._segments.pop(0).path)
+
+    def _offset_of(self, seq: int) -> int:
+        for segment in self._segments:
+            if segment.first_seq <= seq < segment.end_seq:
+                offset = 0
+                with open(segment.path, "rb") as f:
+                    for _ in range(seq - segment.first_seq):
+                        offset += RECORD_HEADER.size + len(self._read_record(f))
+                return offset
+        return 0
+
+    def _write_checkpoint(self) -> None:
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"acked_seq": self._head_seq}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _read_checkpoint(self) -> int:
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        try:
+            with open(path) as f:
+                return int(json.load(f).get("acked_seq", 0))
+        except FileNotFoundError:
+            return 0
+        except (ValueError, OSError) as e:
+            self.logger.error(f"Unreadable spool checkpoint {path}: {e}")
+            return 0
+
+    def _recover(self) -> None:
+        """Rebuild the segment list from disk and truncate a torn last record."""
+        acked_seq = self._read_checkpoint()
+        names = sorted(
+            name for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX)
+        )
+
+        for name in names:
+            path = os.path.join(self.directory, name)
+            segment = _Segment(int(name[: -len(SEGMENT_SUFFIX)]), path)
+            with open(path, "rb") as f:
+                while True:
+                    payload = self._read_record(f)
+                    if payload is None:
+                        break
+                    segment.count += 1
+                    segment.size += RECORD_HEADER.size + len(payload)
+
+            if segment.size < os.path.getsize(path):
+                self.logger.warning(f"Truncating torn tail of spool segment {path}")
+                with open(path, "r+b") as f:
+                    f.truncate(segment.size)
+            self._segments.append(segment)
+
+        self._head_seq = acked_seq
+        if self._segments and self._segments[0].first_seq > acked_seq:
+            self._head_seq = self._segments[0].first_seq
+        self._compact()
+        if self._segments and self._segments[0].end_seq <= self._head_seq:
+            self._remove(self._segments.pop(0).path)
+        self._head_offset = self._offset_of(self._head_seq)
+
+        if self._segments:
+            self._file = open(self._segments[-1].path, "ab")
+        self.recovered = len(self)
+        if self.recovered:
+            self.logger.info(
+                f"Recovered {self.recovered} unsynced entries from {self.directory}"
+            )
+
+    @staticmethod
+    def _read_record(f: BinaryIO) -> Optional[bytes]:
+        header = f.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return None
+        length, crc = RECORD_HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return None
+        return payload
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
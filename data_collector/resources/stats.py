@@ -0,0 +1,14 @@
+from typing import Any, Dict, Tuple
+from flask_restful import Resource
+from data_collector.core.manager import HVACSystemManager
+
+
+class SystemStatsAPI(Resource):
+    def __init__(self, **kwargs):
+        self.system_manager: HVACSystemManager = kwargs.get("system_manager")
+
+    def get(self) -> Tuple[Dict[str, Any], int]:
+        if not self.system_manager:
+            return {"error": "System manager not available"}, 500
+
+        return {"status": "success", "stats": self.system_manager.get_stats()}, 200
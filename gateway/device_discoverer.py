@@ -1,41 +1,130 @@
-from typing import Any
+import asyncio
+import ipaddress
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from link_header import parse
-from aiocoap import Context, Message, Code
+from aiocoap import Code
 from gateway.device_registry import DeviceRegistry
+from gateway.forward_client import ForwardClient
+
+DEFAULT_COAP_PORT = 5683
+
+
+def expand_targets(targets: Iterable[str]) -> List[Tuple[str, int]]:
+    """
+    Turn discovery targets into (host, port) pairs.
+    A target is a host ("10.0.0.5"), a host and port ("10.0.0.5:5690") or a
+    CIDR block ("10.0.0.0/28"), which expands to every host address in it.
+    """
+    expanded: List[Tuple[str, int]] = []
+    for target in targets:
+        if "/" in target:
+            network = ipaddress.ip_network(target, strict=False)
+            expanded.extend((str(ip), DEFAULT_COAP_PORT) for ip in network.hosts())
+            continue
+
+        host, _, port = target.rpartition(":")
+        if host and port.isdigit() and not host.endswith(":"):
+            expanded.append((host.strip("[]"), int(port)))
+        else:
+            expanded.append((target, DEFAULT_COAP_PORT))
+    return list(dict.fromkeys(expanded))
 
 
 class DeviceDiscoverer:
-    def __init__(self, registry: DeviceRegistry):
+    """
+    Discovers the resources of the smart object hosts through their
+    /.well-known/core. Targets are probed concurrently, at most
+    ``concurrency`` at a time, over the shared gateway client. Every pass only
+    applies the differences to the registry; resources of a host that stops
+    answering are removed after ``max_misses`` consecutive failed passes.
+    Warm-loaded hosts that are not among the targets of the first pass are
+    never probed, so they are removed by that pass.
+    """
+
+    def __init__(
+        self,
+        registry: DeviceRegistry,
+        client: ForwardClient,
+        concurrency: int = 32,
+        timeout: float = 5.0,
+        max_misses: int = 3,
+    ):
         self.registry = registry
+        self.client = client
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_misses = max_misses
+        self._misses: Dict[Tuple[str, int], int] = {}
+        self._first_pass = True
 
-    async def discover(self, host: str, port: int = 5683) -> None:
-        uri = f"coap://{host}:{port}/.well-known/core"
+    async def discover_all(self, targets: Iterable[str]) -> None:
+        """Run one discovery pass over every target"""
+        hosts = expand_targets(targets)
+        if self._first_pass:
+            self._first_pass = False
+            self._prune_untargeted(hosts)
+        semaphore = asyncio.Semaphore(self.concurrency)
 
-        try:
-            context = await Context.create_client_context()
-            request = Message(code=Code.GET, uri=uri)
-            response = await context.request(request).response
+        async def probe(host: str, port: int) -> None:
+            async with semaphore:
+                await self.discover(host, port)
 
-            payload: str = response.payload.decode()
-            links: Any = parse(payload)
+        await asyncio.gather(*(probe(host, port) for host, port in hosts))
+        # One registry write per discovery pass
+        self.registry.flush()
 
-            for link in links.links:
-                path: str = link.href.strip("/")
-                attr_dict = {key: value for key, value in link.attr_pairs}
-                self.registry.add_resource(host, port, path, attr_dict)
+    async def run_periodic(self, targets: List[str], interval_s: float) -> None:
+        """Rediscover the targets every ``interval_s`` seconds"""
+        while True:
+            await self.discover_all(targets)
+            await asyncio.sleep(interval_s)
 
-            num_resources = len(links.links)
-            print(f"🔍 Discovered {num_resources} resources on {host}:{port}")
-        except Exception as e:
-            print(f"❌ Failed to discover {host}: {e}")
+    async def discover(self, host: str, port: int = DEFAULT_COAP_PORT) -> bool:
+        """Discover one host and apply the changes, False if it did not answer"""
+        links = await self._fetch_links(host, port)
+        if links is None:
+            misses = self._misses.get((host, port), 0) + 1
+            self._misses[(host, port)] = misses
+            if misses == self.max_misses:
+                _, removed = self.registry.sync_host(host, port, {})
+                if removed:
+                    print(f"🗑️ Removed {removed} resources of unreachable {host}:{port}")
+            return False
+
+        self._misses.pop((host, port), None)
+        discovered = {
+            link.href.strip("/"): {key: value for key, value in link.attr_pairs}
+            for link in links.links
+        }
+        changed, removed = self.registry.sync_host(host, port, discovered)
+        print(
+            f"🔍 Discovered {len(discovered)} resources on {host}:{port} "
+            f"({changed} new or updated, {removed} removed)"
+        )
+        return True
 
-    async def check_connectivity(self, host: str, port: int = 5683) -> bool:
+    def _prune_untargeted(self, hosts: List[Tuple[str, int]]) -> None:
+        """Remove the registered hosts, e.g. warm-loaded, that are not targeted"""
+        for host, port in self.registry.get_host_ports() - set(hosts):
+            _, removed = self.registry.sync_host(host, port, {})
+            print(f"🗑️ Removed {removed} resources of {host}:{port}, not a discovery target")
+
+    async def check_connectivity(
+        self, host: str, port: int = DEFAULT_COAP_PORT
+    ) -> bool:
+        return await self._fetch_links(host, port) is not None
+
+    async def _fetch_links(self, host: str, port: int) -> Optional[Any]:
         uri = f"coap://{host}:{port}/.well-known/core"
         try:
-            context = await Context.create_client_context()
-            request = Message(code=Code.GET, uri=uri)
-            response = await context.request(request).response
-            return True if response else False
+            response = await asyncio.wait_for(
+                self.client.request(uri, code=Code.GET, record_stats=False),
+                self.timeout,
+            )
+            if not response.code.is_successful():
+                print(f"❌ Discovery of {host}:{port} failed: {response.code}")
+                return None
+            return parse(response.payload.decode())
         except Exception as e:
-            print(f"❌ Connectivity check failed for {host}:{port} - {e}")
-            return False
+            print(f"❌ Failed to discover {host}:{port}: {str(e) or type(e).__name__}")
+            return None
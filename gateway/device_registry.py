@@ -1,46 +1,146 @@
+import os
 import json
+import asyncio
+import logging
 from pathlib import Path
 from collections import defaultdict
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set, Tuple
 
 REGISTRY_FILE = Path("gateway/registry.json")
 
+# (object_id, room_id, rack_id), the fields a forwarded command is routed by
+ResourceKey = Tuple[Any, Any, Any]
+
 
 class DeviceRegistry:
-    def __init__(self):
+    """
+    Resources discovered on the smart object hosts.
+    Changes are only kept in memory and written to REGISTRY_FILE by ``flush``,
+    once per discovery pass or from the periodic flush loop, so a pass over N
+    resources writes the file once instead of N times.
+    """
+
+    def __init__(self, warm_load: bool = False):
         self.registry: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-        # self._load_registry()
+        self._uri_index: Dict[ResourceKey, str] = {}
+        self._dirty = False
+        self.logger = logging.getLogger("DeviceRegistry")
+        if warm_load:
+            self._load_registry()
 
     def add_resource(
         self, host: str, port: int, path: str, attributes: Dict[str, Any]
-    ) -> None:
-        self.registry[host].append(
-            {"port": port, "path": path, "attributes": attributes}
+    ) -> bool:
+        """Add or refresh a resource, returning True if the registry changed"""
+        for resource in self.registry[host]:
+            if resource["port"] == port and resource["path"] == path:
+                # Rediscovered resource, only refresh its attributes
+                if resource["attributes"] == attributes:
+                    return False
+                resource["attributes"] = attributes
+                self._rebuild_index()
+                self._dirty = True
+                return True
+
+        resource = {"port": port, "path": path, "attributes": attributes}
+        self.registry[host].append(resource)
+        self._index_resource(host, resource)
+        self._dirty = True
+        return True
+
+    def sync_host(
+        self, host: str, port: int, discovered: Dict[str, Dict[str, Any]]
+    ) -> Tuple[int, int]:
+        """
+        Apply a discovery pass of one host and port, given as {path: attributes}.
+        Only the differences are applied: new or changed resources are added
+        and resources that are no longer advertised are removed.
+        Returns the number of added or updated and of removed resources.
+        """
+        changed = sum(
+            self.add_resource(host, port, path, attributes)
+            for path, attributes in discovered.items()
         )
-        self._save_registry()
+
+        resources = self.registry.get(host, [])
+        kept = [
+            resource
+            for resource in resources
+            if resource["port"] != port or resource["path"] in discovered
+        ]
+        removed = len(resources) - len(kept)
+        if removed:
+            if kept:
+                self.registry[host] = kept
+            else:
+                del self.registry[host]
+            self._rebuild_index()
+            self._dirty = True
+        return changed, removed
+
+    def flush(self) -> None:
+        """Persist the registry if it changed since the last flush"""
+        if not self._dirty:
+            return
+        try:
+            self._save_registry()
+            self._dirty = False
+        except OSError as e:
+            self.logger.error(f"Failed to save registry to {REGISTRY_FILE}: {e}")
+
+    async def run_flush_loop(self, interval_s: float) -> None:
+        """Flush pending changes every ``interval_s`` seconds"""
+        while True:
+            await asyncio.sleep(interval_s)
+            self.flush()
 
     def get_all(self) -> Dict[str, List[Dict[str, Any]]]:
         return self.registry
 
+    def get_host_ports(self) -> Set[Tuple[str, int]]:
+        """Every (host, port) with at least one registered resource"""
+        return {
+            (host, resource["port"])
+            for host, resources in self.registry.items()
+            for resource in resources
+        }
+
     def get_resource_uri(
         self, object_id: Any, room_id: Any, rack_id: Any
     ) -> Optional[str]:
         """
         Returns the URI of a resource matching the given object_id, room_id, and rack_id.
         """
+        return self._uri_index.get((object_id, room_id, rack_id))
+
+    def _rebuild_index(self) -> None:
+        self._uri_index.clear()
         for host, resources in self.registry.items():
-            for res in resources:
-                if (
-                    res["attributes"].get("object_id") == object_id
-                    and res["attributes"].get("room_id") == room_id
-                    and res["attributes"].get("rack_id") == rack_id
-                ):
-                    return f"coap://{host}:{res['port']}/{res['path']}"
-        return None
+            for resource in resources:
+                self._index_resource(host, resource)
+
+    def _index_resource(self, host: str, resource: Dict[str, Any]) -> None:
+        """Prebuild the URI of a resource, the first registered match wins"""
+        attributes = resource["attributes"]
+        if attributes.get("object_id") is None:
+            return
+        key = (
+            attributes.get("object_id"),
+            attributes.get("room_id"),
+            attributes.get("rack_id"),
+        )
+        self._uri_index.setdefault(
+            key, f"coap://{host}:{resource['port']}/{resource['path']}"
+        )
 
     def _save_registry(self) -> None:
-        with open(REGISTRY_FILE, "w") as f:
+        """Write to a temporary file and rename it, so readers never see a partial file"""
+        tmp_file = REGISTRY_FILE.with_name(REGISTRY_FILE.name + ".tmp")
+        with open(tmp_file, "w") as f:
             json.dump(self.registry, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, REGISTRY_FILE)
 
     def _load_registry(self) -> None:
         if REGISTRY_FILE.exists():
@@ -51,6 +151,11 @@ class DeviceRegistry:
                     data = {}
                 for host, resources in data.items():
                     self.registry[host] = resources
+                    for resource in resources:
+                        self._index_resource(host, resource)
+            self.logger.info(
+                f"Warm-loaded {sum(len(r) for r in self.registry.values())} resources from {REGISTRY_FILE}"
+            )
 
     def print_registry(self) -> None:
         for host, resources in self.registry.items():
@@ -0,0 +1,178 @@
+import time
+import asyncio
+import logging
+from bisect import bisect_left
+from urllib.parse import urlsplit
+from typing import Any, AsyncIterator, Dict, List, Optional
+from aiocoap import Context, Message, Code
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in milliseconds."""
+
+    BOUNDS_MS: List[float] = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms: float) -> None:
+        self.counts[bisect_left(self.BOUNDS_MS, latency_ms)] += 1
+        self.total += 1
+        self.sum_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of samples"""
+        if not self.total:
+            return None
+        threshold = fraction * self.total
+        seen = 0
+        for bound, count in zip(self.BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= threshold:
+                return min(bound, round(self.max_ms, 3))
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {
+            f"le_{bound:g}ms": count for bound, count in zip(self.BOUNDS_MS, self.counts)
+        }
+        buckets["gt_5000ms"] = self.counts[-1]
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum_ms / self.total, 3) if self.total else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": buckets,
+        }
+
+
+class _HostState:
+    def __init__(self, max_in_flight: int):
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.observations = 0
+        self.latency = LatencyHistogram()
+
+
+class ForwardClient:
+    """
+    CoAP client shared by the gateway resources that talk to smart objects.
+    A single client Context is created when the gateway starts and reused
+    for every request and observation. Outstanding requests are capped per
+    target host and the latency of every host is tracked in a histogram.
+    """
+
+    def __init__(self, max_in_flight_per_host: int = 8, request_timeout: float = 10.0):
+        self.max_in_flight_per_host = max_in_flight_per_host
+        self.request_timeout = request_timeout
+        self.context: Optional[Context] = None
+        self._hosts: Dict[str, _HostState] = {}
+        self.logger = logging.getLogger("ForwardClient")
+
+    async def start(self) -> None:
+        if self.context is None:
+            self.context = await Context.create_client_context()
+
+    async def shutdown(self) -> None:
+        if self.context is not None:
+            await self.context.shutdown()
+            self.context = None
+
+    async def request(
+        self,
+        uri: str,
+        payload: bytes = b"",
+        code: Code = Code.POST,
+        record_stats: bool = True,
+    ) -> Message:
+        """
+        Send a request and wait for its response, honouring the per-host cap.
+        Requests with ``record_stats=False``, such as discovery probes, bypass
+        the cap and are left out of the host statistics.
+        """
+        if self.context is None:
+            await self.start()
+
+        if not record_stats:
+            return await self._send(uri, payload, code)
+
+        host = self._host_state(urlsplit(uri).netloc)
+        async with host.semaphore:
+            host.in_flight += 1
+            started = time.perf_counter()
+            try:
+                response = await self._send(uri, payload, code)
+            except asyncio.TimeoutError:
+                host.timeouts += 1
+                raise
+            except Exception:
+                host.errors += 1
+                raise
+            finally:
+                host.in_flight -= 1
+
+            host.latency.record((time.perf_counter() - started) * 1000)
+            return response
+
+    async def _send(self, uri: str, payload: bytes, code: Code) -> Message:
+        request = Message(code=code, uri=uri, payload=payload)
+        return await asyncio.wait_for(
+            self.context.request(request).response, self.request_timeout
+        )
+
+    async def observe(self, uri: str) -> AsyncIterator[Message]:
+        """
+        Observe a resource, yielding its first response and every notification.
+        The upstream observation is cancelled when the caller stops iterating.
+        """
+        if self.context is None:
+            await self.start()
+
+        host = self._host_state(urlsplit(uri).netloc)
+        request = self.context.request(Message(code=Code.GET, uri=uri, observe=0))
+        host.observations += 1
+        try:
+            try:
+                yield await asyncio.wait_for(request.response, self.request_timeout)
+            except asyncio.TimeoutError:
+                host.timeouts += 1
+                raise
+            async for notification in request.observation:
+                yield notification
+        except Exception:
+            host.errors += 1
+            raise
+        finally:
+            host.observations -= 1
+            if not request.observation.cancelled:
+                request.observation.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight_per_host": self.max_in_flight_per_host,
+            "request_timeout": self.request_timeout,
+            "hosts": {
+                host: {
+                    "in_flight": state.in_flight,
+                    "errors": state.errors,
+                    "timeouts": state.timeouts,
+                    "observations": state.observations,
+                    "latency": state.latency.to_dict(),
+                }
+                for host, state in self._hosts.items()
+            },
+        }
+
+    def _host_state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.max_in_flight_per_host)
+        return state
@@ -3,36 +3,48 @@ from aiocoap import Context
 from aiocoap.resource import Site, WKCResource
 from gateway.device_discoverer import DeviceDiscoverer
 from gateway.device_registry import DeviceRegistry
+from gateway.forward_client import ForwardClient
 from gateway.resources.forward_resource import ForwardResource
+from gateway.resources.forward_batch_resource import ForwardBatchResource
+from gateway.resources.observe_resource import ObserveResource
+from gateway.resources.stats_resource import StatsResource
 from config.coap_conf_params import CoapConfigurationParameters
 
 
 async def start_gateway_coap_server():
-    registry = DeviceRegistry()
-    discoverer = DeviceDiscoverer(registry)
+    # Serve the saved registry right away, discovery refreshes it in background
+    registry = DeviceRegistry(warm_load=True)
+    # One client context shared by every forwarded request and by discovery
+    forward_client = ForwardClient(
+        CoapConfigurationParameters.FORWARD_MAX_IN_FLIGHT_PER_HOST,
+        CoapConfigurationParameters.FORWARD_REQUEST_TIMEOUT,
+    )
+    await forward_client.start()
+    discoverer = DeviceDiscoverer(
+        registry,
+        forward_client,
+        concurrency=CoapConfigurationParameters.DISCOVERY_CONCURRENCY,
+        timeout=CoapConfigurationParameters.DISCOVERY_TIMEOUT,
+    )
 
     print("🚀 Starting CoAP Gateway...")
-    devices = [CoapConfigurationParameters.COAP_SERVER_ADDRESS]
-
-    print("🔍 Checking device connectivity...")
-    for ip in devices:
-        is_reachable = await discoverer.check_connectivity(ip)
-        if is_reachable:
-            print(f"✅ {ip} is reachable")
-            await discoverer.discover(ip)
-        else:
-            print(f"❌ {ip} is not reachable - skipping discovery")
-
-    """ print("\n📚 Registry aggiornato:")
-    registry.print_registry() """
 
     site = Site()
     site.add_resource(
         (".well-known", "core"), WKCResource(site.get_resources_as_linkheader)
     )
-    site.add_resource(("proxy", "forward",), ForwardResource(registry))
+    site.add_resource(("proxy", "forward",), ForwardResource(registry, forward_client))
+    site.add_resource(
+        ("proxy", "forward-batch"),
+        ForwardBatchResource(
+            registry,
+            forward_client,
+            CoapConfigurationParameters.FORWARD_BATCH_MAX_ITEMS,
+        ),
+    )
+    site.add_resource(("proxy", "observe"), ObserveResource(registry, forward_client))
+    site.add_resource(("proxy", "stats"), StatsResource(forward_client))
 
-    print(f"🌐 CoAP Proxy Gateway running at {CoapConfigurationParameters.GATEWAY_URI}")
     await Context.create_server_context(
         site,
         bind=(
@@ -40,7 +52,26 @@ async def start_gateway_coap_server():
             CoapConfigurationParameters.COAP_GATEWAY_PORT,
         ),
     )
-    await asyncio.get_running_loop().create_future()
+    print(f"🌐 CoAP Proxy Gateway running at {CoapConfigurationParameters.GATEWAY_URI}")
+
+    background_tasks = [
+        asyncio.create_task(
+            discoverer.run_periodic(
+                CoapConfigurationParameters.DISCOVERY_TARGETS,
+                CoapConfigurationParameters.DISCOVERY_INTERVAL,
+            )
+        ),
+        asyncio.create_task(
+            registry.run_flush_loop(CoapConfigurationParameters.REGISTRY_FLUSH_INTERVAL)
+        ),
+    ]
+    try:
+        await asyncio.get_running_loop().create_future()
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        registry.flush()
+        await forward_client.shutdown()
 
 
 def main():
@@ -0,0 +1,100 @@
+import json
+import asyncio
+import logging
+from typing import Any, Dict, List
+from aiocoap import Message, Code
+from aiocoap.numbers.contentformat import ContentFormat
+from aiocoap.resource import Resource
+from gateway.device_registry import DeviceRegistry
+from gateway.forward_client import ForwardClient
+
+
+class ForwardBatchResource(Resource):
+    """
+    Forwards a list of commands in one request.
+    The payload is a JSON list of {room_id, rack_id, object_id, command}
+    entries; they are sent concurrently over the shared client and the
+    response holds one result per entry, in the same order. Large payloads
+    are transferred block-wise by aiocoap.
+    """
+
+    def __init__(
+        self, registry: DeviceRegistry, client: ForwardClient, max_items: int
+    ):
+        super().__init__()
+        self.registry = registry
+        self.client = client
+        self.max_items = max_items
+        self.logger = logging.getLogger("ForwardBatchResource")
+
+    async def render_post(self, request: Message) -> Message:
+        try:
+            items = json.loads(request.payload.decode())
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            return self._error(f"Invalid JSON payload: {str(e)}")
+
+        if not isinstance(items, list) or not items:
+            return self._error("Payload must be a non-empty list of commands")
+        if len(items) > self.max_items:
+            return self._error(f"Too many commands, the limit is {self.max_items}")
+
+        self.logger.info(
+            f"Forwarding batch of {len(items)} commands from {request.remote}"
+        )
+        results: List[Dict[str, Any]] = await asyncio.gather(
+            *(self._forward(index, item) for index, item in enumerate(items))
+        )
+
+        payload = json.dumps({"results": results}).encode()
+        return Message(
+            code=Code.CHANGED, payload=payload, content_format=ContentFormat.JSON
+        )
+
+    async def _forward(self, index: int, item: Any) -> Dict[str, Any]:
+        if not isinstance(item, dict):
+            return {
+                "index": index,
+                "code": str(Code.BAD_REQUEST),
+                "error": "Command must be an object",
+            }
+
+        object_id = item.get("object_id")
+        room_id = item.get("room_id")
+        rack_id = item.get("rack_id")
+        command = item.get("command")
+        result: Dict[str, Any] = {
+            "index": index,
+            "object_id": object_id,
+            "room_id": room_id,
+            "rack_id": rack_id,
+        }
+
+        if not object_id or not room_id or not command:
+            result["code"] = str(Code.BAD_REQUEST)
+            result["error"] = "Missing required fields: object_id, room_id, or command"
+            return result
+
+        uri = self.registry.get_resource_uri(object_id, room_id, rack_id)
+        if not uri:
+            result["code"] = str(Code.NOT_FOUND)
+            result["error"] = (
+                "Resource not found for the given object_id, room_id, and rack_id"
+            )
+            return result
+
+        try:
+            response = await self.client.request(uri, json.dumps(command).encode())
+        except Exception as e:
+            self.logger.error(f"Failed to forward command to {uri}: {e}")
+            timed_out = isinstance(e, asyncio.TimeoutError)
+            result["code"] = str(Code.GATEWAY_TIMEOUT if timed_out else Code.BAD_GATEWAY)
+            result["error"] = str(e) or type(e).__name__
+            return result
+
+        result["code"] = str(response.code)
+        result["payload"] = response.payload.decode(errors="replace")
+        return result
+
+    @staticmethod
+    def _error(message: str) -> Message:
+        return Message(code=Code.BAD_REQUEST, payload=message.encode())
@@ -1,18 +1,21 @@
 import json
+import asyncio
 import traceback
 import logging
 import os
 from datetime import datetime
 from aiocoap.resource import Resource
 from typing import Any, Dict, Optional
-from aiocoap import Context, Message, Code
+from aiocoap import Message, Code
 from gateway.device_registry import DeviceRegistry
+from gateway.forward_client import ForwardClient
 
 
 class ForwardResource(Resource):
-    def __init__(self, registry: DeviceRegistry):
+    def __init__(self, registry: DeviceRegistry, client: ForwardClient):
         super().__init__()
         self.registry = registry
+        self.client = client
         self.logger = self._setup_logger()
 
     def _setup_logger(self) -> logging.Logger:
@@ -76,13 +79,10 @@ class ForwardResource(Resource):
 
             self.logger.info(f"Forwarding command to URI: {uri}")
 
-            context: Context = await Context.create_client_context()
-            forward_request: Message = Message(
-                code=Code.POST, uri=uri, payload=json.dumps(command).encode()
+            response: Message = await self.client.request(
+                uri, json.dumps(command).encode()
             )
 
-            response: Message = await context.request(forward_request).response
-
             self.logger.info(
                 f"Received response from {uri} - Code: {response.code}, Payload size: {len(response.payload)} bytes"
             )
@@ -93,9 +93,12 @@ class ForwardResource(Resource):
             error_msg = f"Invalid JSON payload: {str(e)}"
             self.logger.error(error_msg)
             return Message(code=Code.BAD_REQUEST, payload=error_msg.encode())
+        except asyncio.TimeoutError:
+            error_msg = "Timed out waiting for the smart object response"
+            self.logger.error(error_msg)
+            return Message(code=Code.GATEWAY_TIMEOUT, payload=error_msg.encode())
         except Exception as e:
             error_msg = f"Internal server error: {str(e)}"
             self.logger.error(f"Exception occurred: {error_msg}")
             self.logger.error(f"Traceback: {traceback.format_exc()}")
-            traceback.print_exc()
             return Message(code=Code.INTERNAL_SERVER_ERROR, payload=error_msg.encode())
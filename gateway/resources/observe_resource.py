@@ -0,0 +1,139 @@
+import asyncio
+from typing import Any, Dict, Optional, Set, Tuple
+from aiocoap import Message, Code
+from aiocoap.resource import ObservableResource
+from gateway.device_registry import DeviceRegistry
+from gateway.forward_client import ForwardClient
+
+# (object_id, room_id, rack_id) of an observed resource
+ObserveKey = Tuple[Any, Any, Any]
+
+
+class _Upstream:
+    """One observation of a device resource, shared by its gateway observers"""
+
+    def __init__(self, uri: str):
+        self.uri = uri
+        self.observers: Set[Any] = set()
+        self.latest: Optional[Message] = None
+        self.ready = asyncio.get_running_loop().create_future()
+        self.task: Optional[asyncio.Task] = None
+
+
+class ObserveResource(ObservableResource):
+    """
+    Proxies observations of smart object resources.
+    The target is selected with the object_id, room_id and rack_id query
+    parameters. All gateway observers of the same target share a single
+    upstream observation, whose notifications are relayed to every one of
+    them; the upstream observation is cancelled with its last observer.
+    A plain GET returns the latest notification or forwards the request.
+    """
+
+    def __init__(self, registry: DeviceRegistry, client: ForwardClient):
+        super().__init__()
+        self.registry = registry
+        self.client = client
+        self._upstreams: Dict[ObserveKey, _Upstream] = {}
+
+    async def add_observation(self, request: Message, serverobservation) -> None:
+        key = self._parse_key(request)
+        uri = self.registry.get_resource_uri(*key) if key[0] and key[1] else None
+
+        upstream = self._upstreams.get(key)
+        if upstream is None and uri is not None:
+            upstream = self._upstreams[key] = _Upstream(uri)
+            upstream.task = asyncio.create_task(self._relay(key, upstream))
+        if upstream is not None:
+            upstream.observers.add(serverobservation)
+
+        def _cancel(obs=serverobservation) -> None:
+            if upstream is None:
+                return
+            upstream.observers.discard(obs)
+            if not upstream.observers and self._upstreams.get(key) is upstream:
+                del self._upstreams[key]
+                upstream.task.cancel()
+
+        # Always accepted, an unresolvable target ends with the error response
+        serverobservation.accept(_cancel)
+
+    async def render_get(self, request: Message) -> Message:
+        key = self._parse_key(request)
+        if not key[0] or not key[1]:
+            return Message(
+                code=Code.BAD_REQUEST,
+                payload=b"Missing required query parameters: object_id, room_id",
+            )
+
+        upstream = self._upstreams.get(key)
+        if upstream is not None:
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(upstream.ready), self.client.request_timeout
+                )
+            except asyncio.TimeoutError:
+                return Message(code=Code.GATEWAY_TIMEOUT)
+            return self._copy(upstream.latest)
+
+        uri = self.registry.get_resource_uri(*key)
+        if not uri:
+            return Message(
+                code=Code.NOT_FOUND,
+                payload=b"Resource not found for the given object_id, room_id, and rack_id",
+            )
+        try:
+            response = await self.client.request(uri, code=Code.GET)
+        except Exception as e:
+            return Message(
+                code=Code.BAD_GATEWAY, payload=(str(e) or type(e).__name__).encode()
+            )
+        return self._copy(response)
+
+    async def _relay(self, key: ObserveKey, upstream: _Upstream) -> None:
+        """Follow the upstream observation and notify the gateway observers"""
+        final: Optional[Message] = None
+        try:
+            async for notification in self.client.observe(upstream.uri):
+                upstream.latest = notification
+                if not upstream.ready.done():
+                    upstream.ready.set_result(None)
+                    continue
+                for observer in list(upstream.observers):
+                    observer.trigger(self._copy(notification))
+                if not notification.code.is_successful():
+                    break
+            final = Message(code=Code.BAD_GATEWAY, payload=b"Upstream observation ended")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Observation of {upstream.uri} failed: {str(e) or type(e).__name__}")
+            final = Message(
+                code=Code.BAD_GATEWAY, payload=(str(e) or type(e).__name__).encode()
+            )
+        finally:
+            if self._upstreams.get(key) is upstream:
+                del self._upstreams[key]
+
+        # Unsuccessful responses end the observations, clients can re-register
+        if not upstream.ready.done():
+            upstream.latest = final
+            upstream.ready.set_result(None)
+        elif upstream.latest is None or upstream.latest.code.is_successful():
+            for observer in list(upstream.observers):
+                observer.trigger(self._copy(final))
+
+    @staticmethod
+    def _parse_key(request: Message) -> ObserveKey:
+        query = dict(
+            param.split("=", 1) if "=" in param else (param, "")
+            for param in request.opt.uri_query
+        )
+        return (query.get("object_id"), query.get("room_id"), query.get("rack_id"))
+
+    @staticmethod
+    def _copy(response: Message) -> Message:
+        """Fresh message for one observer, the observe option is set per observer"""
+        message = Message(code=response.code, payload=response.payload)
+        message.opt.content_format = response.opt.content_format
+        return message
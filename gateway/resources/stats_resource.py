@@ -0,0 +1,19 @@
+import json
+from aiocoap import Message, Code
+from aiocoap.numbers.contentformat import ContentFormat
+from aiocoap.resource import Resource
+from gateway.forward_client import ForwardClient
+
+
+class StatsResource(Resource):
+    """Exposes the per-host request statistics of the gateway client"""
+
+    def __init__(self, client: ForwardClient):
+        super().__init__()
+        self.client = client
+
+    async def render_get(self, request: Message) -> Message:
+        payload = json.dumps(self.client.get_stats()).encode()
+        return Message(
+            code=Code.CONTENT, payload=payload, content_format=ContentFormat.JSON
+        )
@@ -2,13 +2,16 @@ import json
 import logging
 import paho.mqtt.client as mqtt
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, Any, Dict
+from typing import Generic, TypeVar, Any, Dict, Optional
 from smart_objects.models.Actuator import Actuator
-from smart_objects.messages.GenericMessage import GenericMessage
+from smart_objects.models.Sensor import Sensor
+from smart_objects.messages.GenericMessage import GenericMessage, dump_json
+from smart_objects.messages.message_codec import MessageCodec
 from smart_objects.messages.control_message import ControlMessage
 from smart_objects.messages.telemetry_message import TelemetryMessage
 from smart_objects.resources.SmartObjectResource import SmartObjectResource
 from smart_objects.resources.ResourceDataListener import ResourceDataListener
+from smart_objects.resources.TelemetryBatcher import TelemetryBatcher
 
 T = TypeVar("T")
 
@@ -26,9 +29,22 @@ class SmartObject(ABC, Generic[T]):
         self.rack_id = rack_id
         self.mqtt_client = mqtt_client
         self.resource_map: Dict[str, SmartObjectResource] = {}
+        self.telemetry_batcher: Optional[TelemetryBatcher] = None
+        # Codec of the published payloads, JSON when None
+        self.payload_codec: Optional[MessageCodec] = None
 
         self.logger = logging.getLogger(f"{object_id}")
 
+    def set_payload_codec(self, codec: MessageCodec) -> None:
+        self.payload_codec = codec
+
+    def set_telemetry_batcher(self, batcher: TelemetryBatcher) -> None:
+        """Publish the telemetry of this object in the batches of a shared batcher"""
+        self.telemetry_batcher = batcher
+        for resource in self.resource_map.values():
+            if isinstance(resource, Sensor):
+                batcher.align(resource)
+
     def get_resource(self, name: str) -> SmartObjectResource:
         return self.resource_map[name]
 
@@ -115,6 +131,19 @@ class SmartObject(ABC, Generic[T]):
                 "rack_id": self.rack_id,
             }
         )
+        # Serialized once, the metadata of a resource never changes
+        metadata_json = dump_json(metadata)
+
+        batcher = self.telemetry_batcher
+        if message_type == TelemetryMessage and batcher is not None:
+            object_id = self.object_id
+            batcher.expect(object_id, resource_id)
+
+            class BatchListener(ResourceDataListener[data_type]):
+                def on_data_changed(self, resource, updated_value, **kwargs):
+                    batcher.add(resource.type, object_id, resource_id, updated_value)
+
+            return BatchListener()
 
         class Listener(ResourceDataListener[data_type]):
             def on_data_changed(self, resource, updated_value, **kwargs):
@@ -124,6 +153,7 @@ class SmartObject(ABC, Generic[T]):
                         payload = message_type(
                             type_=resource.type,
                             metadata=metadata,
+                            metadata_json=metadata_json,
                             timestamp=None,
                             **kwargs,
                         )
@@ -132,6 +162,7 @@ class SmartObject(ABC, Generic[T]):
                             type_=resource.type,
                             data_value=updated_value,
                             metadata=metadata,
+                            metadata_json=metadata_json,
                         )
 
                     publish_data(topic, payload, qos, retain)
@@ -154,7 +185,7 @@ class SmartObject(ABC, Generic[T]):
             self.logger.info(f"📤 Sending to topic: {topic} -> Data: {payload}")
 
             if self.mqtt_client is not None and self.mqtt_client.is_connected():
-                message_payload = payload.to_json()
+                message_payload = payload.encode(self.payload_codec)
                 self.mqtt_client.publish(topic, message_payload, qos, retain)
                 self.logger.info(f"✅ Data published to topic: {topic}")
             else:
@@ -1,11 +1,25 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional, TYPE_CHECKING
 import time
 import json
 
+if TYPE_CHECKING:
+    from .message_codec import MessageCodec
+
+
+# Built once, json.dumps creates a new encoder when given any option
+_json_encoder = json.JSONEncoder(separators=(",", ":"))
+
+
+def dump_json(obj: Any) -> str:
+    """Compact JSON used by the message encoders"""
+    return _json_encoder.encode(obj)
+
 
 class GenericMessage(ABC):
 
+    __slots__ = ("type", "metadata", "timestamp")
+
     def __init__(self, type_: str, metadata: Dict[str, Any] = None):
         self.type = type_
         self.metadata = metadata if metadata is not None else {}
@@ -16,8 +30,14 @@ class GenericMessage(ABC):
         pass
 
     def to_json(self) -> str:
-        return json.dumps(self, default=lambda o: o.__dict__)
-    
+        return dump_json(self.to_dict())
+
+    def encode(self, codec: Optional["MessageCodec"] = None) -> bytes:
+        """Encode the message as an MQTT payload, JSON unless a codec is given"""
+        if codec is None or codec.name == "json":
+            return self.to_json().encode()
+        return codec.encode(self.to_dict())
+
     @abstractmethod
     def __str__(self) -> str:
         pass
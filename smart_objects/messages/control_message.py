@@ -1,8 +1,6 @@
-from dataclasses import asdict
 import time
-import json
-from typing import Any, Dict
-from .GenericMessage import GenericMessage
+from typing import Any, Dict, Optional
+from .GenericMessage import GenericMessage, dump_json
 
 
 class ControlMessage(GenericMessage):
@@ -15,11 +13,14 @@ class ControlMessage(GenericMessage):
     - Eventi di sistema
     """
 
+    __slots__ = ("event_type", "event_data", "metadata_json")
+
     def __init__(
         self,
         type_: str,
         timestamp: int = None,
         metadata: Dict[str, Any] = None,
+        metadata_json: Optional[str] = None,
         **kwargs: Any,
     ):
         event_type = kwargs.get("event_type")
@@ -29,6 +30,7 @@ class ControlMessage(GenericMessage):
         self.event_type = event_type
         self.event_data = event_data
         self.timestamp = timestamp if timestamp is not None else int(time.time() * 1000)
+        self.metadata_json = metadata_json
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -39,8 +41,13 @@ class ControlMessage(GenericMessage):
             "metadata": self.metadata,
         }
 
-    def to_json(self):
-        return json.dumps(self, default=lambda o: o.__dict__)
+    def to_json(self) -> str:
+        metadata_json = self.metadata_json or dump_json(self.metadata)
+        return (
+            f'{{"type":{dump_json(self.type)},"metadata":{metadata_json},'
+            f'"timestamp":{self.timestamp},"event_type":{dump_json(self.event_type)},'
+            f'"event_data":{dump_json(self.event_data)}}}'
+        )
 
     def __str__(self) -> str:
         return f"ControlMessage(type='{self.type}', event_type='{self.event_type}', event_data={self.event_data}, timestamp={self.timestamp})"
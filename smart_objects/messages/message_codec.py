@@ -0,0 +1,99 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+try:
+    import orjson
+except ImportError:  # optional faster JSON backend
+    orjson = None
+
+try:
+    import cbor2
+except ImportError:  # optional CBOR codec
+    cbor2 = None
+
+try:
+    import msgpack
+except ImportError:  # optional MessagePack codec
+    msgpack = None
+
+
+class MessageCodec(ABC):
+    """Encodes message dicts to MQTT payloads and back."""
+
+    name: str = ""
+
+    @abstractmethod
+    def encode(self, obj: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, payload: bytes) -> Any:
+        pass
+
+
+class JsonCodec(MessageCodec):
+    name = "json"
+
+    def encode(self, obj: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(obj)
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    def decode(self, payload: bytes) -> Any:
+        if orjson is not None:
+            return orjson.loads(payload)
+        return json.loads(payload)
+
+
+class CborCodec(MessageCodec):
+    name = "cbor"
+
+    def encode(self, obj: Any) -> bytes:
+        return cbor2.dumps(obj)
+
+    def decode(self, payload: bytes) -> Any:
+        return cbor2.loads(payload)
+
+
+class MsgpackCodec(MessageCodec):
+    name = "msgpack"
+
+    def encode(self, obj: Any) -> bytes:
+        return msgpack.packb(obj)
+
+    def decode(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload)
+
+
+JSON_CODEC = JsonCodec()
+CODECS: Dict[str, MessageCodec] = {"json": JSON_CODEC}
+if cbor2 is not None:
+    CODECS["cbor"] = CborCodec()
+if msgpack is not None:
+    CODECS["msgpack"] = MsgpackCodec()
+
+
+def get_codec(name: str) -> MessageCodec:
+    """Return a codec by name, failing if its optional dependency is missing."""
+    codec = CODECS.get(name)
+    if codec is None:
+        if name in ("cbor", "msgpack"):
+            package = "cbor2" if name == "cbor" else "msgpack"
+            raise ValueError(f"Payload codec '{name}' requires the {package} package")
+        raise ValueError(f"Unknown payload codec: {name}")
+    return codec
+
+
+def sniff_codec(payload: bytes) -> MessageCodec:
+    """
+    Detect the codec of a payload from its first byte. Messages are maps:
+    JSON starts with "{", MessagePack maps with 0x80-0x8f or 0xde-0xdf and
+    CBOR maps with 0xa0-0xbf.
+    """
+    first = payload[0] if payload else 0
+    if 0x80 <= first <= 0x8F or first in (0xDE, 0xDF):
+        return get_codec("msgpack")
+    if 0xA0 <= first <= 0xBF:
+        return get_codec("cbor")
+    return JSON_CODEC
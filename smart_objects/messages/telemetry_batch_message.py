@@ -0,0 +1,64 @@
+import time
+from typing import Any, Dict, List, Tuple
+from .GenericMessage import GenericMessage
+
+
+class TelemetryBatchMessage(GenericMessage):
+    """
+    Telemetry samples of several resources published as a single message.
+    The room and rack are sent once in the metadata and every sample is a
+    compact list in SAMPLE_FIELDS order. ``expand`` turns a decoded batch
+    back into the TelemetryMessage dicts it stands for.
+    """
+
+    __slots__ = ("samples",)
+
+    MESSAGE_TYPE = "telemetry_batch"
+    SAMPLE_FIELDS = ("type", "object_id", "resource_id", "timestamp", "data_value")
+
+    def __init__(
+        self,
+        samples: List[Tuple[str, str, str, int, Any]],
+        timestamp: int = None,
+        metadata: Dict[str, Any] = None,
+    ):
+        super().__init__(self.MESSAGE_TYPE, metadata)
+        self.samples = samples
+        self.timestamp = timestamp if timestamp is not None else int(time.time() * 1000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "metadata": self.metadata,
+            "timestamp": self.timestamp,
+            "samples": [list(sample) for sample in self.samples],
+        }
+
+    @staticmethod
+    def expand(batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Rebuild the single-resource telemetry dicts of a decoded batch"""
+        metadata = batch.get("metadata") or {}
+        room_id = metadata.get("room_id")
+        rack_id = metadata.get("rack_id")
+        return [
+            {
+                "type": type_,
+                "metadata": {
+                    "object_id": object_id,
+                    "resource_id": resource_id,
+                    "room_id": room_id,
+                    "rack_id": rack_id,
+                },
+                "timestamp": timestamp,
+                "data_value": data_value,
+            }
+            for type_, object_id, resource_id, timestamp, data_value in batch.get(
+                "samples", []
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"TelemetryBatchMessage(samples={len(self.samples)}, metadata={self.metadata}, timestamp={self.timestamp})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
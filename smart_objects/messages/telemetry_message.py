@@ -1,18 +1,19 @@
-from dataclasses import asdict
 import time
-import json
-from typing import Any, Dict
-from .GenericMessage import GenericMessage
+from typing import Any, Dict, Optional
+from .GenericMessage import GenericMessage, dump_json
 
 
 class TelemetryMessage(GenericMessage):
 
+    __slots__ = ("data_value", "metadata_json")
+
     def __init__(
         self,
         type_: str,
         data_value: Any,
         timestamp: int = None,
         metadata: Dict[str, Any] = None,
+        metadata_json: Optional[str] = None,
     ):
         if not type_:
             raise ValueError("Type must be a non-empty string.")
@@ -20,12 +21,23 @@ class TelemetryMessage(GenericMessage):
         super().__init__(type_, metadata)
         self.data_value = data_value
         self.timestamp = timestamp if timestamp is not None else int(time.time() * 1000)
+        # The metadata of a resource never changes, listeners serialize it once
+        self.metadata_json = metadata_json
 
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
-
-    def to_json(self):
-        return json.dumps(self, default=lambda o: o.__dict__)
+        return {
+            "type": self.type,
+            "metadata": self.metadata,
+            "timestamp": self.timestamp,
+            "data_value": self.data_value,
+        }
+
+    def to_json(self) -> str:
+        metadata_json = self.metadata_json or dump_json(self.metadata)
+        return (
+            f'{{"type":{dump_json(self.type)},"metadata":{metadata_json},'
+            f'"timestamp":{self.timestamp},"data_value":{dump_json(self.data_value)}}}'
+        )
 
     def __str__(self) -> str:
         return f"TelemetryMessage(type='{self.type}', data_value={self.data_value}, timestamp={self.timestamp})"
@@ -1,11 +1,21 @@
+import random
 from ..resources.SmartObjectResource import SmartObjectResource
+from ..resources.SensorScheduler import ScheduledTask, SensorScheduler
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar
+from typing import ClassVar, Generic, Optional, TypeVar
 
 T = TypeVar("T")
 
 
 class Sensor(SmartObjectResource[float], ABC):
+
+    UPDATE_PERIOD: ClassVar[float] = 10
+    TASK_DELAY_TIME: ClassVar[float] = 5
+    # Phase offset of the updates within the period, random when None
+    UPDATE_PHASE: ClassVar[Optional[float]] = None
+    # Maximum random shift of every update, in seconds
+    UPDATE_JITTER: ClassVar[float] = 0.5
+
     def __init__(
         self,
         resource_id: str,
@@ -25,6 +35,11 @@ class Sensor(SmartObjectResource[float], ABC):
         self.timestamp = timestamp
         self.min = min
         self.max = max
+        self._scheduled_task: Optional[ScheduledTask] = None
+        # Set when the updates are driven by a SensorFleet or a ThermalModel
+        self.externally_driven = False
+        # Whether the owning smart object is running and publishing updates
+        self.update_enabled = False
 
     @abstractmethod
     def load_updated_value(self) -> float:
@@ -35,15 +50,49 @@ class Sensor(SmartObjectResource[float], ABC):
         """Abstract method to be implemented by subclasses for measuring sensor values."""
         pass
 
-    @abstractmethod
     def start_periodic_event_value_update_task(self) -> None:
-        """Abstract method to be implemented by subclasses for starting periodic updates."""
-        pass
+        """Measure and notify the new value every UPDATE_PERIOD seconds."""
+        self.update_enabled = True
+        if self._scheduled_task is not None or self.externally_driven:
+            return
+        phase = self.UPDATE_PHASE
+        if phase is None:
+            phase = random.uniform(0, self.UPDATE_PERIOD)
+
+        self.logger.debug(
+            f"Starting periodic {self.type} measurement task for {self.resource_id}, will update every {self.UPDATE_PERIOD} seconds."
+        )
+        self._scheduled_task = SensorScheduler.get_default().schedule(
+            self._periodic_value_update,
+            period=self.UPDATE_PERIOD,
+            delay=self.TASK_DELAY_TIME,
+            phase=phase,
+            jitter=self.UPDATE_JITTER,
+            name=self.resource_id,
+        )
 
-    @abstractmethod
     def stop_periodic_event_value_update_task(self) -> None:
-        """Abstract method to be implemented by subclasses for stopping periodic updates."""
-        pass
+        self.update_enabled = False
+        if self._scheduled_task is not None:
+            self._scheduled_task.cancel()
+            self._scheduled_task = None
+            self.logger.debug(
+                f"Stopped periodic {self.type} measurement task for {self.resource_id}."
+            )
+
+    def set_externally_driven(self) -> None:
+        """Hand the updates over to a simulation engine, which notifies the listeners."""
+        if self._scheduled_task is not None:
+            self._scheduled_task.cancel()
+            self._scheduled_task = None
+        self.externally_driven = True
+
+    def _periodic_value_update(self) -> None:
+        try:
+            updated_value = self.load_updated_value()
+            self.notify_update(updated_value)
+        except RuntimeError as e:
+            self.logger.error(f"Error during {self.type} update task: {e}")
 
     def _set_min(self, min_value: float) -> None:
         """Set the minimum value for the sensor."""
@@ -0,0 +1,174 @@
+import heapq
+import random
+import logging
+import threading
+import itertools
+from time import monotonic
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+
+class ScheduledTask:
+    """Handle of a periodic task registered on a SensorScheduler"""
+
+    def __init__(
+        self,
+        callback: Callable[[], None],
+        period: float,
+        jitter: float,
+        name: str,
+    ):
+        self.callback = callback
+        self.period = period
+        self.jitter = jitter
+        self.name = name
+        self.cancelled = False
+        self.running = False
+        self.runs = 0
+        self.skipped = 0
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class SensorScheduler:
+    """
+    Runs the periodic tasks of all the sensors of the process.
+    A single timer thread keeps the tasks in a heap ordered by due time and
+    hands the due ones to a small worker pool, instead of every sensor
+    chaining its own threading.Timer threads. Each task runs at its phase
+    offset plus multiples of its period, shifted by a random jitter so tasks
+    registered together do not fire together. A run that is due while the
+    previous one is still executing is skipped.
+    """
+
+    _default: Optional["SensorScheduler"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, num_workers: int = 4):
+        self.num_workers = num_workers
+        self._heap: List[Tuple[float, int, float, ScheduledTask]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.logger = logging.getLogger("SensorScheduler")
+
+    @classmethod
+    def get_default(cls) -> "SensorScheduler":
+        """Process-wide scheduler, started on first use"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+                cls._default.start()
+            return cls._default
+
+    def start(self) -> None:
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.num_workers, thread_name_prefix="sensor-worker"
+            )
+            self._thread = threading.Thread(
+                target=self._run, name="sensor-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        # A stopped scheduler is not restarted, the next get_default() makes a new one
+        with SensorScheduler._default_lock:
+            if SensorScheduler._default is self:
+                SensorScheduler._default = None
+        with self._condition:
+            self._running = False
+            self._heap.clear()
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def schedule(
+        self,
+        callback: Callable[[], None],
+        period: float,
+        delay: float = 0.0,
+        phase: float = 0.0,
+        jitter: float = 0.0,
+        name: str = "",
+    ) -> ScheduledTask:
+        """
+        Run ``callback`` every ``period`` seconds, the first time after
+        ``delay + phase`` seconds. Every run is shifted by up to ``jitter``
+        seconds, without accumulating over the runs, and at most half a period.
+        """
+        if period <= 0:
+            raise ValueError(f"Period must be positive, got: {period}")
+        task = ScheduledTask(callback, period, min(jitter, period / 2), name)
+        self._push(task, monotonic() + delay + phase)
+        return task
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            tasks = [entry[3] for entry in self._heap if not entry[3].cancelled]
+        return {
+            "workers": self.num_workers,
+            "tasks": len(tasks),
+            "runs": sum(task.runs for task in tasks),
+            "skipped": sum(task.skipped for task in tasks),
+        }
+
+    def _push(self, task: ScheduledTask, base_due: float) -> None:
+        """Queue a run, ``base_due`` is the time without jitter"""
+        due = base_due + random.uniform(-task.jitter, task.jitter)
+        with self._condition:
+            heapq.heappush(self._heap, (due, next(self._counter), base_due, task))
+            if self._heap[0][3] is task:
+                self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._running and (
+                    not self._heap or self._heap[0][0] > monotonic()
+                ):
+                    timeout = self._heap[0][0] - monotonic() if self._heap else None
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+                _, _, base_due, task = heapq.heappop(self._heap)
+
+            if task.cancelled:
+                continue
+
+            # Next run from the base schedule, so the period does not drift
+            next_due = base_due + task.period
+            now = monotonic()
+            if next_due <= now:
+                next_due += ((now - next_due) // task.period + 1) * task.period
+            self._push(task, next_due)
+
+            if task.running:
+                task.skipped += 1
+                continue
+            task.running = True
+            try:
+                self._executor.submit(self._execute, task)
+            except RuntimeError:
+                # The executor was shut down by stop()
+                task.running = False
+                return
+
+    def _execute(self, task: ScheduledTask) -> None:
+        try:
+            task.callback()
+        except Exception as e:
+            self.logger.error(f"Scheduled task {task.name} failed: {e}")
+        finally:
+            task.runs += 1
+            task.running = False
@@ -0,0 +1,145 @@
+import time
+import random
+import logging
+import threading
+import paho.mqtt.client as mqtt
+from typing import Any, Dict, List, Optional, Set, Tuple
+from config.mqtt_conf_params import MqttConfigurationParameters
+from smart_objects.messages.message_codec import MessageCodec
+from smart_objects.messages.telemetry_batch_message import TelemetryBatchMessage
+from smart_objects.models.Sensor import Sensor
+from smart_objects.resources.SensorScheduler import ScheduledTask, SensorScheduler
+
+# (object_id, resource_id)
+ResourceKey = Tuple[str, str]
+
+
+class TelemetryBatcher:
+    """
+    Collects the telemetry of a group of smart objects, a rack or the room
+    level objects of a room, and publishes every tick as one
+    TelemetryBatchMessage on the batch topic of the group.
+    A batch is published as soon as every expected resource reported, or
+    when a resource reports again, or after ``max_delay`` seconds for
+    resources that stopped reporting. The sensors of the group are aligned
+    on the same phase so their samples of a tick arrive together.
+    """
+
+    def __init__(
+        self,
+        mqtt_client: mqtt.Client,
+        room_id: str,
+        rack_id: Optional[str] = None,
+        max_delay: float = MqttConfigurationParameters.TELEMETRY_BATCH_MAX_DELAY,
+        qos: int = 0,
+        codec: Optional[MessageCodec] = None,
+    ):
+        self.mqtt_client = mqtt_client
+        self.codec = codec
+        self.room_id = room_id
+        self.rack_id = rack_id
+        self.max_delay = max_delay
+        self.qos = qos
+        if rack_id is None:
+            self.topic = MqttConfigurationParameters.build_telemetry_batch_room_topic(
+                room_id
+            )
+        else:
+            self.topic = MqttConfigurationParameters.build_telemetry_batch_rack_topic(
+                room_id, rack_id
+            )
+        self.phase = random.uniform(0, Sensor.UPDATE_PERIOD)
+        self.stats = {"batches": 0, "samples": 0, "bytes": 0, "dropped": 0}
+
+        self._metadata = {"room_id": room_id, "rack_id": rack_id}
+        self._expected: Set[ResourceKey] = set()
+        self._pending: Dict[ResourceKey, Tuple[str, str, str, int, Any]] = {}
+        self._pending_since = 0.0
+        self._lock = threading.Lock()
+        self._flush_task: Optional[ScheduledTask] = None
+        self.logger = logging.getLogger(f"TelemetryBatcher[{self.topic}]")
+
+    def start(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = SensorScheduler.get_default().schedule(
+                self._flush_expired,
+                period=self.max_delay / 2,
+                name=f"batch:{self.topic}",
+            )
+
+    def stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self.flush()
+
+    def align(self, sensor: Sensor) -> None:
+        """Run a sensor of the group on the phase shared by the group"""
+        sensor.UPDATE_PHASE = self.phase
+
+    def expect(self, object_id: str, resource_id: str) -> None:
+        """Declare a resource whose samples complete a tick"""
+        with self._lock:
+            self._expected.add((object_id, resource_id))
+
+    def add(
+        self,
+        type_: str,
+        object_id: str,
+        resource_id: str,
+        data_value: Any,
+        timestamp: Optional[int] = None,
+    ) -> None:
+        if timestamp is None:
+            timestamp = int(time.time() * 1000)
+        key = (object_id, resource_id)
+        ready: List[List[Tuple[str, str, str, int, Any]]] = []
+        with self._lock:
+            if key in self._pending:
+                # The resource already reported in this tick, a new tick started
+                ready.append(self._take())
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending[key] = (type_, object_id, resource_id, timestamp, data_value)
+            if self._expected <= self._pending.keys():
+                ready.append(self._take())
+
+        for samples in ready:
+            self._publish(samples)
+
+    def flush(self) -> None:
+        with self._lock:
+            samples = self._take()
+        if samples:
+            self._publish(samples)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"topic": self.topic, "resources": len(self._expected), **self.stats}
+
+    def _flush_expired(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            if time.monotonic() - self._pending_since < self.max_delay:
+                return
+            samples = self._take()
+        self._publish(samples)
+
+    def _take(self) -> List[Tuple[str, str, str, int, Any]]:
+        samples = list(self._pending.values())
+        self._pending.clear()
+        return samples
+
+    def _publish(self, samples: List[Tuple[str, str, str, int, Any]]) -> None:
+        if self.mqtt_client is None or not self.mqtt_client.is_connected():
+            self.stats["dropped"] += len(samples)
+            self.logger.error("⚠️ MQTT Client is not connected!")
+            return
+
+        message = TelemetryBatchMessage(samples, metadata=self._metadata)
+        payload = message.encode(self.codec)
+        self.mqtt_client.publish(self.topic, payload, self.qos)
+        self.stats["batches"] += 1
+        self.stats["samples"] += len(samples)
+        self.stats["bytes"] += len(payload)
+        self.logger.debug(f"📤 Published {len(samples)} samples to {self.topic}")
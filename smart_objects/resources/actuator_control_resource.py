@@ -1,15 +1,71 @@
 from aiocoap import resource, Message, Code
 import json
+import asyncio
 import traceback
+from config.coap_conf_params import CoapConfigurationParameters
 from smart_objects.models.Actuator import Actuator
+from smart_objects.resources.ResourceDataListener import ResourceDataListener
 from typing import Optional, Dict, Any
 
 
-class ActuatorControlResource(resource.Resource):
-    def __init__(self, actuator: Actuator, attributes: Dict[str, Optional[str]]):
+class ActuatorControlResource(resource.ObservableResource):
+    """
+    CoAP control resource of an actuator.
+    Observers are notified whenever a command changes the actuator state.
+    Notifications are sent at most once every ``min_notify_interval`` seconds,
+    changes in between are coalesced and observers get the latest state.
+    """
+
+    def __init__(
+        self,
+        actuator: Actuator,
+        attributes: Dict[str, Optional[str]],
+        min_notify_interval: float = CoapConfigurationParameters.ACTUATOR_NOTIFY_MIN_INTERVAL,
+    ):
         super().__init__()
         self.actuator = actuator
         self.attributes = attributes
+        self.min_notify_interval = min_notify_interval
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending_notify: Optional[asyncio.TimerHandle] = None
+        self._last_notify: float = float("-inf")
+        self.actuator.add_data_listener(self._StateListener(self))
+
+    class _StateListener(ResourceDataListener[Dict[str, Any]]):
+        def __init__(self, control_resource: "ActuatorControlResource"):
+            self.control_resource = control_resource
+
+        def on_data_changed(self, resource, updated_value, **kwargs):
+            self.control_resource.state_changed()
+
+    async def add_observation(self, request, serverobservation):
+        # Commands may be applied from other threads, notifications are
+        # always sent from the loop of the CoAP server
+        self._loop = asyncio.get_running_loop()
+        await super().add_observation(request, serverobservation)
+
+    def state_changed(self) -> None:
+        """Schedule a notification of the observers, callable from any thread"""
+        if self._loop is None or not self._observations:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._schedule_notify)
+        except RuntimeError:
+            # The server loop is closed
+            self._loop = None
+
+    def _schedule_notify(self) -> None:
+        if self._pending_notify is not None:
+            return
+        delay = self._last_notify + self.min_notify_interval - self._loop.time()
+        self._pending_notify = self._loop.call_later(max(delay, 0.0), self._notify)
+
+    def _notify(self) -> None:
+        self._pending_notify = None
+        self._last_notify = self._loop.time()
+        # Observers render the state current at this time
+        self.updated_state()
 
     def get_link_description(self):
         """Return CoAP link attributes for this actuator resource"""
@@ -34,6 +90,7 @@ class ActuatorControlResource(resource.Resource):
         else:
             attributes["ct"] = "0 50"
 
+        attributes["obs"] = None
         attributes.update(self.attributes)
 
         return attributes
@@ -83,7 +140,7 @@ class ActuatorControlResource(resource.Resource):
             )
 
     async def render_get(self, request):
-        """Optional: allow GET to fetch current actuator state"""
+        """Fetch the current actuator state, also rendered for notifications"""
         return Message(
             code=Code.CONTENT,
             payload=json.dumps(self.actuator.get_current_state()).encode(),
@@ -1,7 +1,6 @@
 import time
 import random
 import logging
-import threading
 from smart_objects.models.Sensor import Sensor
 from typing import Dict, Any, ClassVar
 
@@ -13,8 +12,6 @@ class HumiditySensor(Sensor):
     DEFAULT_MIN_HUMIDITY: ClassVar[float] = 0.0
     DEFAULT_MAX_HUMIDITY: ClassVar[float] = 70.0
     MEASUREMENT_PRECISION: ClassVar[int] = 2
-    UPDATE_PERIOD: ClassVar[int] = 10
-    TASK_DELAY_TIME: ClassVar[int] = 5
 
     def __init__(self, resource_id):
         super().__init__(
@@ -29,7 +26,6 @@ class HumiditySensor(Sensor):
         )
 
         self.logger = logging.getLogger(f"{resource_id}")
-        self._timer = None
 
     def load_updated_value(self) -> float:
         try:
@@ -51,32 +47,6 @@ class HumiditySensor(Sensor):
             self.logger.error(f"Failed to measure humidity: {e}")
             raise RuntimeError(f"Humidity measurement failed: {e}")
 
-    def start_periodic_event_value_update_task(self) -> None:
-        self.logger.debug(
-            f"Starting periodic humidity measurement task for {self.resource_id}, will update every {self.UPDATE_PERIOD} seconds."
-        )
-
-        def update_task():
-            try:
-                updated_value = self.load_updated_value()
-                self.notify_update(updated_value)
-            except RuntimeError as e:
-                self.logger.error(f"Error during humidity update task: {e}")
-
-            self._timer = threading.Timer(self.UPDATE_PERIOD, update_task)
-            self._timer.start()
-
-        self._timer = threading.Timer(self.TASK_DELAY_TIME, update_task)
-        self._timer.start()
-
-    def stop_periodic_event_value_update_task(self) -> None:
-        if self._timer is not None:
-            self._timer.cancel()
-            self._timer = None
-            self.logger.debug(
-                f"Stopped periodic humidity measurement task for {self.resource_id}."
-            )
-
     def to_dict(self) -> Dict[str, Any]:
         return {
             "resource_id": self.resource_id,
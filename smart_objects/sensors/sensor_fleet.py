@@ -0,0 +1,173 @@
+import time
+import logging
+import numpy as np
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+from smart_objects.models.Sensor import Sensor
+from smart_objects.resources.SensorScheduler import ScheduledTask, SensorScheduler
+
+# Called with the fleet, the new values of every sensor and the timestamp
+BatchListener = Callable[["SensorFleet", np.ndarray, int], None]
+
+
+class SensorFleet:
+    """
+    Drives many sensors of the same type with one vectorized step per tick.
+    Values, bounds and precision of the sensors are kept in NumPy arrays and
+    every tick draws all the new values at once. The sensors added to a
+    fleet are marked as externally driven, so their own periodic update is
+    not scheduled; they still hold the current value and, while their smart
+    object is started, notify their listeners through ``notify_update``.
+    Batch listeners get the whole value array of the tick instead.
+    """
+
+    def __init__(
+        self,
+        sensor_class: Type[Sensor],
+        seed: Optional[int] = None,
+        notify_sensors: bool = True,
+    ):
+        self.sensor_class = sensor_class
+        self.notify_sensors = notify_sensors
+        self.sensors: List[Sensor] = []
+        self.values = np.zeros(0)
+        self.mins = np.zeros(0)
+        self.maxs = np.zeros(0)
+        self.precision = np.zeros(0, dtype=np.int8)
+        self.timestamp = 0
+        self.ticks = 0
+
+        self._rng = np.random.default_rng(seed)
+        self._batch_listeners: List[BatchListener] = []
+        self._scheduled_task: Optional[ScheduledTask] = None
+        self.logger = logging.getLogger(f"SensorFleet[{sensor_class.__name__}]")
+
+    def __len__(self) -> int:
+        return len(self.sensors)
+
+    def add(self, sensor: Sensor) -> int:
+        """Take over the updates of a sensor, returning its index in the fleet"""
+        return self.add_many([sensor])
+
+    def add_many(self, sensors: Iterable[Sensor]) -> int:
+        """Take over the updates of several sensors, returning the first index"""
+        sensors = list(sensors)
+        for sensor in sensors:
+            if not isinstance(sensor, self.sensor_class):
+                raise TypeError(
+                    f"Expected {self.sensor_class.__name__}, got: {type(sensor).__name__}"
+                )
+            sensor.set_externally_driven()
+
+        first = len(self.sensors)
+        self.sensors.extend(sensors)
+        self.values = np.concatenate(
+            [self.values, [sensor.value for sensor in sensors]]
+        )
+        self.mins = np.concatenate([self.mins, [sensor.min for sensor in sensors]])
+        self.maxs = np.concatenate([self.maxs, [sensor.max for sensor in sensors]])
+        self.precision = np.concatenate(
+            [
+                self.precision,
+                np.full(len(sensors), self.sensor_class.MEASUREMENT_PRECISION, np.int8),
+            ]
+        )
+        return first
+
+    def create_sensors(self, resource_ids: Iterable[str]) -> List[Sensor]:
+        """Instantiate fleet-driven sensors of the fleet type"""
+        sensors = [self.sensor_class(resource_id) for resource_id in resource_ids]
+        self.add_many(sensors)
+        return sensors
+
+    def refresh_bounds(self) -> None:
+        """Reload the bounds after changing the min/max of fleet sensors"""
+        self.mins = np.array([sensor.min for sensor in self.sensors], dtype=float)
+        self.maxs = np.array([sensor.max for sensor in self.sensors], dtype=float)
+
+    def add_batch_listener(self, listener: BatchListener) -> None:
+        if listener not in self._batch_listeners:
+            self._batch_listeners.append(listener)
+
+    def remove_batch_listener(self, listener: BatchListener) -> None:
+        if listener in self._batch_listeners:
+            self._batch_listeners.remove(listener)
+
+    def measure(self) -> np.ndarray:
+        """Draw a new value for every sensor of the fleet"""
+        values = self._rng.uniform(self.mins, self.maxs)
+        for decimals in np.unique(self.precision):
+            mask = self.precision == decimals
+            values[mask] = np.round(values[mask], int(decimals))
+        self.values = values
+        self.timestamp = int(time.time())
+        return values
+
+    def step(self) -> np.ndarray:
+        """Advance the fleet by one tick and deliver the new values"""
+        values = self.measure()
+        self.ticks += 1
+
+        if self.notify_sensors:
+            timestamp = self.timestamp
+            for sensor, value in zip(self.sensors, values.tolist()):
+                sensor.value = value
+                sensor.timestamp = timestamp
+                if sensor.update_enabled and sensor.resource_listener_list:
+                    try:
+                        sensor.notify_update(value)
+                    except RuntimeError as e:
+                        self.logger.error(f"Error notifying {sensor.resource_id}: {e}")
+
+        for listener in self._batch_listeners:
+            try:
+                listener(self, values, self.timestamp)
+            except Exception as e:
+                self.logger.error(f"Batch listener failed: {e}")
+        return values
+
+    def start(self, period: Optional[float] = None, delay: Optional[float] = None) -> None:
+        """Step the fleet periodically on the shared sensor scheduler"""
+        if self._scheduled_task is not None:
+            return
+        self._scheduled_task = SensorScheduler.get_default().schedule(
+            self.step,
+            period=period or self.sensor_class.UPDATE_PERIOD,
+            delay=self.sensor_class.TASK_DELAY_TIME if delay is None else delay,
+            jitter=self.sensor_class.UPDATE_JITTER,
+            name=f"fleet:{self.sensor_class.__name__}",
+        )
+
+    def stop(self) -> None:
+        if self._scheduled_task is not None:
+            self._scheduled_task.cancel()
+            self._scheduled_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "sensor_type": self.sensor_class.RESOURCE_TYPE,
+            "sensors": len(self.sensors),
+            "ticks": self.ticks,
+            "timestamp": self.timestamp,
+        }
+
+
+def assign_to_fleets(
+    fleets: Dict[Type[Sensor], SensorFleet], sensors: Iterable[Sensor]
+) -> int:
+    """
+    Hand sensors over to the fleet of their class, creating it if needed.
+    Sensors already driven by another engine, such as the thermal model, are
+    left alone. Returns the number of sensors added.
+    """
+    by_class: Dict[Type[Sensor], List[Sensor]] = {}
+    for sensor in sensors:
+        if sensor.externally_driven:
+            continue
+        by_class.setdefault(type(sensor), []).append(sensor)
+
+    for sensor_class, class_sensors in by_class.items():
+        fleet = fleets.get(sensor_class)
+        if fleet is None:
+            fleet = fleets[sensor_class] = SensorFleet(sensor_class)
+        fleet.add_many(class_sensors)
+    return sum(len(class_sensors) for class_sensors in by_class.values())
@@ -1,7 +1,6 @@
 import time
 import random
 import logging
-import threading
 from typing import Dict, Any, ClassVar
 from smart_objects.models.Sensor import Sensor
 
@@ -14,8 +13,6 @@ class TemperatureSensor(Sensor):
     DEFAULT_MIN_TEMP: ClassVar[float] = 0.0
     DEFAULT_MAX_TEMP: ClassVar[float] = 60.0
     MEASUREMENT_PRECISION: ClassVar[int] = 2
-    UPDATE_PERIOD: ClassVar[int] = 10
-    TASK_DELAY_TIME: ClassVar[int] = 5
 
     def __init__(self, resource_id: str):
 
@@ -31,7 +28,6 @@ class TemperatureSensor(Sensor):
         )
 
         self.logger = logging.getLogger(f"{resource_id}")
-        self._timer = None
 
     def measure(self) -> None:
         try:
@@ -57,32 +53,6 @@ class TemperatureSensor(Sensor):
             self.logger.error(f"Failed to load updated temperature value: {e}")
             raise RuntimeError(f"Failed to get updated temperature: {e}")
 
-    def start_periodic_event_value_update_task(self) -> None:
-        self.logger.debug(
-            f"Starting periodic temperature measurement task for {self.resource_id}, will update every {self.UPDATE_PERIOD} seconds."
-        )
-
-        def update_task():
-            try:
-                updated_value = self.load_updated_value()
-                self.notify_update(updated_value)
-            except RuntimeError as e:
-                self.logger.error(f"Error during temperature update task: {e}")
-
-            self._timer = threading.Timer(self.UPDATE_PERIOD, update_task)
-            self._timer.start()
-
-        self._timer = threading.Timer(self.TASK_DELAY_TIME, update_task)
-        self._timer.start()
-
-    def stop_periodic_event_value_update_task(self) -> None:
-        if self._timer is not None:
-            self._timer.cancel()
-            self._timer = None
-            self.logger.debug(
-                f"Stopped periodic temperature measurement task for {self.resource_id}."
-            )
-
     def to_dict(self) -> Dict[str, Any]:
         return {
             "resource_id": self.resource_id,
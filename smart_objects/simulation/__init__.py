@@ -0,0 +1 @@
+# Smart Objects simulation package
@@ -0,0 +1,316 @@
+import time
+import logging
+import numpy as np
+from typing import Any, ClassVar, Dict, Iterable, List, Optional, Tuple
+from smart_objects.models.Actuator import Actuator
+from smart_objects.models.Sensor import Sensor
+from smart_objects.devices.SmartObject import SmartObject
+from smart_objects.sensors.energy_sensor import EnergySensor
+from smart_objects.sensors.temperature_sensor import TemperatureSensor
+from smart_objects.resources.ResourceDataListener import ResourceDataListener
+from smart_objects.resources.SensorScheduler import ScheduledTask, SensorScheduler
+
+
+class ThermalModel:
+    """
+    First-order thermal model of the racks and rooms, stepped for all of
+    them at once with NumPy.
+
+    Every rack is a heat capacity heated by its IT load, taken from the
+    last reading of its EnergySensor, and cooled towards the room air
+    through a conductance growing with its fan speed and airflow cooling
+    level, and towards the supply water through its pump speed. Every room
+    is a heat capacity receiving the heat of its air-cooled racks, exchanging
+    heat with the outside and cooled by its cooling hub level. Over a step
+    the inputs are held constant and each temperature moves exponentially
+    towards its equilibrium, which stays stable for any step length.
+
+    The temperature sensors attached to the model are externally driven:
+    after every step they read the model temperature plus measurement noise
+    and notify their listeners, so the telemetry reacts to the actuators.
+    """
+
+    OUTSIDE_TEMP: ClassVar[float] = 30.0  # °C
+    INITIAL_ROOM_TEMP: ClassVar[float] = 24.0  # °C
+    SUPPLY_WATER_TEMP: ClassVar[float] = 18.0  # °C
+    HUB_SUPPLY_TEMP: ClassVar[float] = 12.0  # °C, air supplied by the cooling hub
+
+    RACK_HEAT_CAPACITY: ClassVar[float] = 300.0  # kJ/°C
+    ROOM_HEAT_CAPACITY: ClassVar[float] = 5000.0  # kJ/°C
+    # kW of heat per unit of EnergySensor reading, 0-1000 maps to 0-20 kW
+    HEAT_PER_ENERGY: ClassVar[float] = 0.02
+
+    # Conductances in kW/°C, actuator terms are at full speed or level
+    RACK_BASE_CONDUCTANCE: ClassVar[float] = 0.2
+    FAN_CONDUCTANCE: ClassVar[float] = 2.0
+    AIRFLOW_CONDUCTANCE: ClassVar[float] = 1.0
+    PUMP_CONDUCTANCE: ClassVar[float] = 2.5
+    ROOM_ENVELOPE_CONDUCTANCE: ClassVar[float] = 0.5
+    HUB_CONDUCTANCE: ClassVar[float] = 6.0
+
+    SENSOR_NOISE: ClassVar[float] = 0.1  # °C, standard deviation
+
+    def __init__(self, seed: Optional[int] = None):
+        self.room_ids: List[str] = []
+        self.rack_keys: List[Tuple[str, str]] = []
+        self._room_index: Dict[str, int] = {}
+        self._rack_index: Dict[Tuple[str, str], int] = {}
+
+        self.room_temp = np.zeros(0)
+        self.room_hub = np.zeros(0)
+        self.rack_temp = np.zeros(0)
+        self.rack_room = np.zeros(0, dtype=np.intp)
+        self.rack_load_kw = np.zeros(0)
+        self.rack_fan = np.zeros(0)
+        self.rack_airflow = np.zeros(0)
+        self.rack_pump = np.zeros(0)
+
+        # (actuator, array name, index, state key, full scale)
+        self._actuators: List[Tuple[Actuator, str, int, str, float]] = []
+        self._energy_sensors: List[Tuple[Sensor, int]] = []
+        self._rack_sensors: List[Sensor] = []
+        self._rack_sensor_index: List[int] = []
+        self._room_sensors: List[Sensor] = []
+        self._room_sensor_index: List[int] = []
+
+        self.simulated_s = 0.0
+        self.steps = 0
+        self._rng = np.random.default_rng(seed)
+        self._scheduled_task: Optional[ScheduledTask] = None
+        self._last_step: Optional[float] = None
+        self.logger = logging.getLogger("ThermalModel")
+
+    def add_room(
+        self,
+        room_id: str,
+        temperature_sensors: Iterable[Sensor] = (),
+        cooling_levels: Optional[Actuator] = None,
+    ) -> int:
+        index = self._room_index.get(room_id)
+        if index is None:
+            index = self._room_index[room_id] = len(self.room_ids)
+            self.room_ids.append(room_id)
+            self.room_temp = np.append(self.room_temp, self.INITIAL_ROOM_TEMP)
+            self.room_hub = np.append(self.room_hub, 0.0)
+
+        for sensor in temperature_sensors:
+            sensor.set_externally_driven()
+            self._room_sensors.append(sensor)
+            self._room_sensor_index.append(index)
+        if cooling_levels is not None:
+            self._attach_actuator(cooling_levels, "room_hub", index)
+        return index
+
+    def add_rack(
+        self,
+        room_id: str,
+        rack_id: str,
+        temperature_sensors: Iterable[Sensor] = (),
+        energy_sensor: Optional[Sensor] = None,
+        fan: Optional[Actuator] = None,
+        pump: Optional[Actuator] = None,
+        cooling_levels: Optional[Actuator] = None,
+    ) -> int:
+        room = self.add_room(room_id)
+        key = (room_id, rack_id)
+        index = self._rack_index.get(key)
+        if index is None:
+            index = self._rack_index[key] = len(self.rack_keys)
+            self.rack_keys.append(key)
+            self.rack_temp = np.append(self.rack_temp, self.room_temp[room])
+            self.rack_room = np.append(self.rack_room, room)
+            self.rack_load_kw = np.append(self.rack_load_kw, 0.0)
+            self.rack_fan = np.append(self.rack_fan, 0.0)
+            self.rack_airflow = np.append(self.rack_airflow, 0.0)
+            self.rack_pump = np.append(self.rack_pump, 0.0)
+
+        for sensor in temperature_sensors:
+            sensor.set_externally_driven()
+            self._rack_sensors.append(sensor)
+            self._rack_sensor_index.append(index)
+        if energy_sensor is not None:
+            energy_sensor.add_data_listener(self._LoadListener(self, index))
+            self._energy_sensors.append((energy_sensor, index))
+        if fan is not None:
+            self._attach_actuator(fan, "rack_fan", index)
+        if pump is not None:
+            self._attach_actuator(pump, "rack_pump", index)
+        if cooling_levels is not None:
+            self._attach_actuator(cooling_levels, "rack_airflow", index)
+        return index
+
+    def add_smart_objects(self, smart_objects: Iterable[SmartObject]) -> None:
+        """
+        Attach the resources of the given smart objects, grouped by room and
+        rack: smart objects without a rack belong to their room.
+        """
+        for smart_object in smart_objects:
+            resources = smart_object.resource_map
+            temperature = [
+                resource
+                for resource in resources.values()
+                if isinstance(resource, TemperatureSensor)
+            ]
+            cooling_levels = resources.get("cooling_levels")
+
+            if smart_object.rack_id is None:
+                self.add_room(smart_object.room_id, temperature, cooling_levels)
+                continue
+
+            energy = [
+                resource
+                for resource in resources.values()
+                if isinstance(resource, EnergySensor)
+            ]
+            self.add_rack(
+                smart_object.room_id,
+                smart_object.rack_id,
+                temperature_sensors=temperature,
+                energy_sensor=energy[0] if energy else None,
+                fan=resources.get("fan"),
+                pump=resources.get("pump"),
+                cooling_levels=cooling_levels,
+            )
+
+    def set_rack_load(self, room_id: str, rack_id: str, load_kw: float) -> None:
+        self.rack_load_kw[self._rack_index[(room_id, rack_id)]] = load_kw
+
+    def get_rack_temperature(self, room_id: str, rack_id: str) -> float:
+        return float(self.rack_temp[self._rack_index[(room_id, rack_id)]])
+
+    def get_room_temperature(self, room_id: str) -> float:
+        return float(self.room_temp[self._room_index[room_id]])
+
+    def step(self, dt: float) -> None:
+        """Advance the model by ``dt`` simulated seconds and update the sensors"""
+        self._read_inputs()
+        self._advance(dt)
+        self.simulated_s += dt
+        self.steps += 1
+        self._update_sensors()
+
+    def start(
+        self, period: float = TemperatureSensor.UPDATE_PERIOD, time_scale: float = 1.0
+    ) -> None:
+        """
+        Step the model every ``period`` seconds on the shared sensor scheduler,
+        simulating ``time_scale`` seconds per elapsed second.
+        """
+        if self._scheduled_task is not None:
+            return
+
+        def tick() -> None:
+            now = time.monotonic()
+            dt = (now - self._last_step) if self._last_step is not None else period
+            self._last_step = now
+            self.step(dt * time_scale)
+
+        self._last_step = None
+        self._scheduled_task = SensorScheduler.get_default().schedule(
+            tick, period=period, delay=TemperatureSensor.TASK_DELAY_TIME, name="thermal"
+        )
+
+    def stop(self) -> None:
+        if self._scheduled_task is not None:
+            self._scheduled_task.cancel()
+            self._scheduled_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rooms": len(self.room_ids),
+            "racks": len(self.rack_keys),
+            "steps": self.steps,
+            "simulated_s": round(self.simulated_s, 1),
+            "room_temp": {
+                room_id: round(float(temp), 2)
+                for room_id, temp in zip(self.room_ids, self.room_temp)
+            },
+            "rack_temp_mean": (
+                round(float(self.rack_temp.mean()), 2) if self.rack_keys else None
+            ),
+            "rack_temp_max": (
+                round(float(self.rack_temp.max()), 2) if self.rack_keys else None
+            ),
+        }
+
+    class _LoadListener(ResourceDataListener[float]):
+        def __init__(self, model: "ThermalModel", index: int):
+            self.model = model
+            self.index = index
+
+        def on_data_changed(self, resource, updated_value, **kwargs):
+            self.model.rack_load_kw[self.index] = (
+                updated_value * self.model.HEAT_PER_ENERGY
+            )
+
+    def _attach_actuator(self, actuator: Actuator, array: str, index: int) -> None:
+        if "level" in actuator.state:
+            key, scale = "level", getattr(actuator, "MAX_LEV", 5)
+        else:
+            key, scale = "speed", getattr(actuator, "MAX_SPEED", 100)
+        self._actuators.append((actuator, array, index, key, float(scale)))
+
+    def _read_inputs(self) -> None:
+        """Load the actuator outputs as fractions of their full scale"""
+        for actuator, array, index, key, scale in self._actuators:
+            state = actuator.state
+            on = state.get("status", "ON") == "ON" and actuator.is_operational
+            getattr(self, array)[index] = state.get(key, 0) / scale if on else 0.0
+        # A stopped rack draws no power
+        for sensor, index in self._energy_sensors:
+            if not sensor.update_enabled:
+                self.rack_load_kw[index] = 0.0
+
+    def _advance(self, dt: float) -> None:
+        rooms = len(self.room_ids)
+        room_of_rack = self.room_temp[self.rack_room]
+
+        # Racks, with the room and water temperatures held over the step
+        g_air = (
+            self.RACK_BASE_CONDUCTANCE
+            + self.FAN_CONDUCTANCE * self.rack_fan
+            + self.AIRFLOW_CONDUCTANCE * self.rack_airflow
+        )
+        g_water = self.PUMP_CONDUCTANCE * self.rack_pump
+        g_rack = g_air + g_water
+        rack_eq = (
+            self.rack_load_kw + g_air * room_of_rack + g_water * self.SUPPLY_WATER_TEMP
+        ) / g_rack
+        decay = np.exp(-g_rack * dt / self.RACK_HEAT_CAPACITY)
+        self.rack_temp = rack_eq + (self.rack_temp - rack_eq) * decay
+
+        # Rooms, exchanging heat with their racks at the new rack temperatures
+        g_racks = np.bincount(self.rack_room, weights=g_air, minlength=rooms)
+        q_racks = np.bincount(
+            self.rack_room, weights=g_air * self.rack_temp, minlength=rooms
+        )
+        g_hub = self.HUB_CONDUCTANCE * self.room_hub
+        g_room = self.ROOM_ENVELOPE_CONDUCTANCE + g_hub + g_racks
+        room_eq = (
+            self.ROOM_ENVELOPE_CONDUCTANCE * self.OUTSIDE_TEMP
+            + g_hub * self.HUB_SUPPLY_TEMP
+            + q_racks
+        ) / g_room
+        decay = np.exp(-g_room * dt / self.ROOM_HEAT_CAPACITY)
+        self.room_temp = room_eq + (self.room_temp - room_eq) * decay
+
+    def _update_sensors(self) -> None:
+        for sensors, indexes, temps in (
+            (self._rack_sensors, self._rack_sensor_index, self.rack_temp),
+            (self._room_sensors, self._room_sensor_index, self.room_temp),
+        ):
+            if not sensors:
+                continue
+            readings = temps[indexes] + self._rng.normal(
+                0.0, self.SENSOR_NOISE, len(sensors)
+            )
+            readings = np.round(readings, TemperatureSensor.MEASUREMENT_PRECISION)
+            timestamp = int(time.time())
+            for sensor, value in zip(sensors, readings.tolist()):
+                sensor.value = value
+                sensor.timestamp = timestamp
+                if sensor.update_enabled and sensor.resource_listener_list:
+                    try:
+                        sensor.notify_update(value)
+                    except RuntimeError as e:
+                        self.logger.error(f"Error notifying {sensor.resource_id}: {e}")
@@ -0,0 +1,7 @@
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+# The cloud simulator modules are imported as top-level modules by its app
+sys.path.insert(0, os.path.join(project_root, "cloud_simulator"))
@@ -0,0 +1,61 @@
+import time
+
+from data_collector.core.data_collector import DataCollector
+from data_collector.core.telemetry_spool import TelemetrySpool
+
+
+def make_collector(tmp_path, **kwargs):
+    return DataCollector(
+        "room_A1",
+        str(tmp_path / "policy.json"),
+        "http://127.0.0.1:9",
+        spool_dir=str(tmp_path / "spool"),
+        **kwargs,
+    )
+
+
+def telemetry(i):
+    return {"type": "iot:sensor:temperature", "timestamp": i, "data_value": 20.0}
+
+
+def test_close_persists_spooled_telemetry(tmp_path):
+    collector = make_collector(tmp_path, sync_interval=3600)
+    for i in range(3):
+        collector._collect_telemetry(telemetry(i))
+    collector.close()
+
+    spool = TelemetrySpool(str(tmp_path / "spool" / "room_A1"))
+    assert spool.recovered == 3
+
+
+def test_sync_thread_flushes_idle_spool(tmp_path):
+    # The flush tick follows the spool fsync interval, 1 s by default
+    collector = make_collector(tmp_path, sync_interval=3600)
+    spool = collector.telemetry_buffer
+    try:
+        collector._collect_telemetry(telemetry(0))
+        assert spool._unsynced == 1
+        deadline = time.monotonic() + 5
+        while spool._unsynced and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert spool._unsynced == 0
+    finally:
+        collector.close()
+
+
+def test_sync_loop_survives_errors(tmp_path, monkeypatch):
+    calls = []
+
+    def failing_sync(self):
+        calls.append(1)
+        raise IOError("Corrupted record")
+
+    monkeypatch.setattr(DataCollector, "_sync_with_cloud", failing_sync)
+    collector = make_collector(tmp_path, sync_interval=0.02)
+    try:
+        deadline = time.monotonic() + 5
+        while len(calls) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(calls) >= 3
+    finally:
+        collector.close()
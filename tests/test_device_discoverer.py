@@ -0,0 +1,43 @@
+import asyncio
+
+from aiocoap import Code
+
+from gateway.device_discoverer import DeviceDiscoverer
+from gateway.device_registry import DeviceRegistry
+
+
+class LinkFormatResponse:
+    """Answer of a host to /.well-known/core"""
+
+    def __init__(self, payload):
+        self.code = Code.CONTENT
+        self.payload = payload.encode()
+
+
+class FakeClient:
+    def __init__(self, hosts):
+        self.hosts = hosts
+        self.probed = []
+
+    async def request(self, uri, code=None, record_stats=True):
+        host = uri.split("/")[2]
+        self.probed.append(host)
+        if host not in self.hosts:
+            raise asyncio.TimeoutError()
+        return LinkFormatResponse(self.hosts[host])
+
+
+def test_first_pass_prunes_untargeted_warm_hosts():
+    registry = DeviceRegistry()
+    registry.add_resource("10.0.0.1", 5683, "cooling", {"object_id": "unit_1"})
+    registry.add_resource("10.0.0.9", 5683, "cooling", {"object_id": "stale"})
+
+    client = FakeClient({"10.0.0.1:5683": '</cooling>;object_id="unit_1"'})
+    discoverer = DeviceDiscoverer(registry, client)
+    # Keep the tracked gateway/registry.json untouched
+    registry.flush = lambda: None
+    asyncio.run(discoverer.discover_all(["10.0.0.1"]))
+
+    assert set(registry.get_all()) == {"10.0.0.1"}
+    assert client.probed == ["10.0.0.1:5683"]
+    assert registry.get_resource_uri("stale", None, None) is None
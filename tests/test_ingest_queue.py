@@ -0,0 +1,157 @@
+import time
+import threading
+
+import pytest
+
+from ingest_queue import IngestQueue
+
+
+class FlakySink:
+    """Records the stored batches, failing the first ``failures`` calls"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, room_id, entries):
+        with self.lock:
+            self.calls += 1
+            if self.calls <= self.failures:
+                raise ConnectionError("InfluxDB unavailable")
+            self.batches.append((room_id, [e["seq"] for e in entries]))
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(sinks, **kwargs):
+        queue = IngestQueue(
+            str(tmp_path / "ingest.db"), sinks, retry_delay_s=0.01, **kwargs
+        )
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.stop()
+
+
+def batch(*seqs):
+    return [{"type": "t", "timestamp": 0, "seq": seq} for seq in seqs]
+
+
+def test_failing_sink_does_not_repeat_other_sinks(make_queue):
+    archive = FlakySink()
+    influx = FlakySink(failures=13)
+    queue = make_queue({"archive": archive, "influxdb": influx}, num_workers=1)
+    queue.start()
+
+    queue.enqueue("room_A1", batch(0, 1, 2, 3, 4), "key-1")
+
+    assert wait_until(lambda: queue.get_lag()["pending_batches"] == 0)
+    assert archive.batches == [("room_A1", [0, 1, 2, 3, 4])]
+    assert influx.batches == [("room_A1", [0, 1, 2, 3, 4])]
+    assert influx.calls == 14
+    assert queue.processed == 1
+
+
+def test_batch_kept_until_every_sink_stored_it(make_queue):
+    archive = FlakySink()
+    influx = FlakySink(failures=10**9)
+    queue = make_queue({"archive": archive, "influxdb": influx}, num_workers=1)
+    queue.start()
+
+    queue.enqueue("room_A1", batch(0), "key-1")
+
+    assert wait_until(lambda: archive.batches)
+    lag = queue.get_lag()
+    assert lag["pending_batches"] == 1
+    assert lag["pending_per_sink"] == {"archive": 0, "influxdb": 1}
+
+
+def test_progress_survives_restart(make_queue):
+    archive = FlakySink()
+    queue = make_queue(
+        {"archive": archive, "influxdb": FlakySink(failures=10**9)}, num_workers=1
+    )
+    queue.start()
+    queue.enqueue("room_A1", batch(0), "key-1")
+    assert wait_until(lambda: archive.batches)
+    queue.stop()
+
+    # Only the sink that did not store the batch gets it after a restart
+    archive = FlakySink()
+    influx = FlakySink()
+    queue = make_queue({"archive": archive, "influxdb": influx}, num_workers=1)
+    queue.start()
+    assert wait_until(lambda: queue.get_lag()["pending_batches"] == 0)
+    assert archive.batches == []
+    assert influx.batches == [("room_A1", [0])]
+
+
+def test_room_order_and_idempotency(make_queue):
+    archive = FlakySink()
+    influx = FlakySink(failures=3)
+    queue = make_queue({"archive": archive, "influxdb": influx}, num_workers=2)
+    queue.start()
+
+    for seq in range(5):
+        assert queue.enqueue("room_A1", batch(seq), f"key-{seq}")
+    assert not queue.enqueue("room_A1", batch(0), "key-0")
+
+    assert wait_until(lambda: queue.get_lag()["pending_batches"] == 0)
+    expected = [("room_A1", [seq]) for seq in range(5)]
+    assert archive.batches == expected
+    assert influx.batches == expected
+    assert queue.duplicates == 1
+
+
+def test_pending_batches_follow_fewer_workers(make_queue):
+    stuck = FlakySink(failures=10**9)
+    queue = make_queue({"archive": stuck}, num_workers=8)
+    rooms = [f"room_{i}" for i in range(16)]
+    for seq, room_id in enumerate(rooms):
+        queue.enqueue(room_id, batch(seq), f"key-{seq}")
+    assert queue.get_lag()["pending_batches"] == len(rooms)
+
+    # Restarted with fewer workers: every room is drained, in order
+    archive = FlakySink()
+    queue = make_queue({"archive": archive}, num_workers=2)
+    queue.start()
+    queue.enqueue("room_0", batch(100), "key-100")
+
+    assert wait_until(lambda: queue.get_lag()["pending_batches"] == 0)
+    assert sorted(archive.batches) == sorted(
+        [(room_id, [seq]) for seq, room_id in enumerate(rooms)] + [("room_0", [100])]
+    )
+    room_0 = [seqs for room_id, seqs in archive.batches if room_id == "room_0"]
+    assert room_0 == [[0], [100]]
+
+
+def test_counters_under_concurrent_enqueues(make_queue):
+    queue = make_queue({"archive": FlakySink()}, num_workers=2)
+
+    def producer(offset):
+        for i in range(50):
+            queue.enqueue(f"room_{i % 4}", batch(i), f"key-{offset}-{i % 25}")
+
+    threads = [threading.Thread(target=producer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert queue.accepted == 100
+    assert queue.duplicates == 100
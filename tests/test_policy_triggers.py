@@ -0,0 +1,164 @@
+import json
+
+import pytest
+
+from data_collector.core.policy_manager import PolicyManager
+
+
+class RecordingDispatcher:
+    """Collects the submitted actions instead of sending them to the gateway"""
+
+    def __init__(self):
+        self.payloads = []
+        self.accept = True
+
+    def submit(self, payload):
+        if not self.accept:
+            return False
+        self.payloads.append(payload)
+        return True
+
+
+def make_manager(tmp_path, **condition):
+    policy = {
+        "id": "cool_rack",
+        "type": "smart_object",
+        "room_id": "room_A1",
+        "rack_id": "rack_A1",
+        "object_id": "rack_cooling_unit",
+        "resource_id": "temperature",
+        "sensor_type": "iot:sensor:temperature",
+        "condition": {"operator": ">", "value": 30, **condition},
+        "action": {"command": {"status": "ON"}},
+    }
+    policy_file = tmp_path / "policy.json"
+    policy_file.write_text(json.dumps({"rooms": {"room_A1": [policy]}}))
+    dispatcher = RecordingDispatcher()
+    manager = PolicyManager("room_A1", str(policy_file), action_dispatcher=dispatcher)
+    return manager, dispatcher, policy
+
+
+def telemetry(value):
+    return {
+        "type": "iot:sensor:temperature",
+        "metadata": {
+            "room_id": "room_A1",
+            "rack_id": "rack_A1",
+            "object_id": "rack_cooling_unit",
+            "resource_id": "temperature",
+        },
+        "data_value": value,
+    }
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(
+        "data_collector.core.policy_manager.time.monotonic", lambda: now[0]
+    )
+    return now
+
+
+def test_fires_once_while_condition_holds(tmp_path, clock):
+    manager, dispatcher, _ = make_manager(tmp_path)
+
+    for value in (31, 32, 33):
+        manager.evaluate(telemetry(value))
+
+    assert len(dispatcher.payloads) == 1
+    assert manager.get_policy_stats()[0]["suppressed_count"] == 2
+
+
+def test_hysteresis_band_delays_release(tmp_path, clock):
+    manager, dispatcher, _ = make_manager(tmp_path, hysteresis=2)
+
+    manager.evaluate(telemetry(31))
+    # Below the threshold but inside the band: still active
+    manager.evaluate(telemetry(29))
+    manager.evaluate(telemetry(31))
+    assert len(dispatcher.payloads) == 1
+
+    # Past the band: released, the next crossing fires again
+    manager.evaluate(telemetry(27))
+    manager.evaluate(telemetry(31))
+    assert len(dispatcher.payloads) == 2
+
+
+def test_cooldown_suppresses_refire(tmp_path, clock):
+    manager, dispatcher, _ = make_manager(tmp_path, cooldown_s=60)
+
+    manager.evaluate(telemetry(31))
+    manager.evaluate(telemetry(20))
+    clock[0] += 30
+    manager.evaluate(telemetry(31))
+    assert len(dispatcher.payloads) == 1
+
+    clock[0] += 31
+    manager.evaluate(telemetry(31))
+    assert len(dispatcher.payloads) == 2
+
+
+def test_consecutive_samples_required(tmp_path, clock):
+    manager, dispatcher, _ = make_manager(tmp_path, consecutive_samples=3)
+
+    for value in (31, 31, 20, 31, 31):
+        manager.evaluate(telemetry(value))
+    assert dispatcher.payloads == []
+
+    manager.evaluate(telemetry(31))
+    assert len(dispatcher.payloads) == 1
+    assert dispatcher.payloads[0]["object_id"] == "rack_cooling_unit"
+
+
+def test_dropped_action_rearms_policy(tmp_path, clock):
+    manager, dispatcher, _ = make_manager(tmp_path, cooldown_s=60)
+
+    dispatcher.accept = False
+    manager.evaluate(telemetry(31))
+    assert dispatcher.payloads == []
+
+    # The condition still holds: the action is retried without a release
+    dispatcher.accept = True
+    manager.evaluate(telemetry(31))
+    assert len(dispatcher.payloads) == 1
+    stats = manager.get_policy_stats()[0]
+    assert stats["trigger_count"] == 1
+    assert stats["dropped_count"] == 1
+
+
+def test_redundant_action_rearms_policy(tmp_path, clock):
+    manager, dispatcher, _ = make_manager(tmp_path)
+
+    class StaleCache:
+        redundant = True
+
+        def is_redundant(self, payload):
+            return self.redundant
+
+    manager.state_cache = StaleCache()
+    manager.evaluate(telemetry(31))
+    assert dispatcher.payloads == []
+
+    manager.state_cache.redundant = False
+    manager.evaluate(telemetry(31))
+    assert len(dispatcher.payloads) == 1
+
+
+def test_update_keeps_trigger_state(tmp_path, clock):
+    manager, dispatcher, policy = make_manager(tmp_path, cooldown_s=60)
+    manager.evaluate(telemetry(31))
+    assert len(dispatcher.payloads) == 1
+
+    updated = dict(policy, condition={"operator": ">", "value": 30, "cooldown_s": 60})
+    manager.update_policy("cool_rack", updated)
+
+    # Still active and in cooldown: no second action
+    manager.evaluate(telemetry(32))
+    manager.evaluate(telemetry(20))
+    manager.evaluate(telemetry(32))
+    assert len(dispatcher.payloads) == 1
+    assert manager.get_policy_stats()[0]["trigger_count"] == 1
+
+    manager.update_policies(list(manager.policies))
+    assert manager.get_policy_stats()[0]["trigger_count"] == 1
@@ -0,0 +1,54 @@
+from smart_objects.resources.ResourceDataListener import ResourceDataListener
+from smart_objects.sensors.humidity_sensor import HumiditySensor
+from smart_objects.sensors.sensor_fleet import assign_to_fleets
+from smart_objects.sensors.temperature_sensor import TemperatureSensor
+
+
+class RecordingListener(ResourceDataListener):
+    def __init__(self):
+        self.updates = []
+
+    def on_data_changed(self, resource, updated_value, **kwargs):
+        self.updates.append((resource.resource_id, updated_value))
+
+
+def test_fleet_driven_sensors_notify_listeners():
+    sensors = [
+        TemperatureSensor("temperature_1"),
+        TemperatureSensor("temperature_2"),
+        HumiditySensor("humidity_1"),
+    ]
+    listener = RecordingListener()
+    for sensor in sensors:
+        sensor.add_data_listener(listener)
+
+    fleets = {}
+    assert assign_to_fleets(fleets, sensors) == 3
+    assert set(fleets) == {TemperatureSensor, HumiditySensor}
+    assert all(sensor.externally_driven for sensor in sensors)
+
+    # The sensors are started as usual but leave the updates to their fleet
+    for sensor in sensors:
+        sensor.start_periodic_event_value_update_task()
+    for fleet in fleets.values():
+        fleet.step()
+
+    assert sorted(listener.updates) == sorted(
+        (sensor.resource_id, sensor.value) for sensor in sensors
+    )
+    for sensor in sensors:
+        assert sensor.min <= sensor.value <= sensor.max
+
+
+def test_sensors_driven_elsewhere_are_skipped():
+    thermal = TemperatureSensor("temperature_thermal")
+    thermal.set_externally_driven()
+    free = TemperatureSensor("temperature_free")
+
+    fleets = {}
+    assert assign_to_fleets(fleets, [thermal, free]) == 1
+    assert fleets[TemperatureSensor].sensors == [free]
+
+    # Later rooms join the fleet of their sensor type
+    assign_to_fleets(fleets, [TemperatureSensor("temperature_other")])
+    assert len(fleets[TemperatureSensor]) == 2
@@ -0,0 +1,28 @@
+import threading
+
+from smart_objects.resources.SensorScheduler import SensorScheduler
+
+
+def test_default_scheduler_replaced_after_stop():
+    scheduler = SensorScheduler.get_default()
+    scheduler.stop()
+
+    fired = threading.Event()
+    replacement = SensorScheduler.get_default()
+    try:
+        assert replacement is not scheduler
+        replacement.schedule(fired.set, period=10, delay=0.01)
+        assert fired.wait(2)
+    finally:
+        replacement.stop()
+
+
+def test_stopping_other_scheduler_keeps_default():
+    default = SensorScheduler.get_default()
+    other = SensorScheduler(num_workers=1)
+    other.start()
+    other.stop()
+    try:
+        assert SensorScheduler.get_default() is default
+    finally:
+        default.stop()
@@ -0,0 +1,204 @@
+import os
+import time
+import shutil
+import threading
+
+import pytest
+
+from telemetry_archive import SEGMENT_SUFFIX, TelemetryArchive
+
+
+def entry(seq, resource_id="temperature"):
+    return {
+        "type": "iot:sensor:temperature",
+        "metadata": {
+            "room_id": "room_A1",
+            "rack_id": "rack_A1",
+            "object_id": "cooling_unit",
+            "resource_id": resource_id,
+        },
+        "timestamp": 1000 + seq,
+        "data_value": float(seq),
+    }
+
+
+def seqs(entries):
+    return [int(e["data_value"]) for e in entries]
+
+
+def test_failed_write_does_not_publish_offsets(tmp_path):
+    archive = TelemetryArchive(str(tmp_path))
+    archive.write("room_A1", [entry(0), entry(1)])
+    segment = archive._open["room_A1"]
+    handle = segment.handle
+
+    class FailingHandle:
+        def write(self, data):
+            handle.write(data[: len(data) // 2])
+            raise OSError("disk full")
+
+        def __getattr__(self, name):
+            return getattr(handle, name)
+
+    segment.handle = FailingHandle()
+    with pytest.raises(OSError):
+        archive.write("room_A1", [entry(2, "humidity"), entry(3, "humidity")])
+    segment.handle = handle
+
+    assert segment.index.count == 2
+    assert seqs(archive.query("room_A1")) == [0, 1]
+    assert seqs(archive.query("room_A1", resource_id="humidity")) == []
+
+    archive.write("room_A1", [entry(4)])
+    assert seqs(archive.query("room_A1")) == [0, 1, 4]
+
+
+def test_recovery_finalizes_open_segment(tmp_path):
+    archive = TelemetryArchive(str(tmp_path))
+    archive.write("room_A1", [entry(0), entry(1)])
+    # Simulated crash: the open segment is never closed
+    archive._open["room_A1"].handle.flush()
+
+    recovered = TelemetryArchive(str(tmp_path))
+    assert seqs(recovered.query("room_A1")) == [0, 1]
+    assert seqs(recovered.query("room_A1", start_ms=1001)) == [1]
+
+
+def test_recovery_skips_segment_finalized_before_crash(tmp_path):
+    archive = TelemetryArchive(str(tmp_path))
+    archive.write("room_A1", [entry(0), entry(1)])
+    segment = archive._open["room_A1"]
+    leftover = segment.path + ".bak"
+    shutil.copy(segment.path, leftover)
+    archive.close()
+
+    # Crash after the .gz and index were written but before the .jsonl removal
+    os.replace(leftover, segment.path)
+    assert os.path.exists(segment.path)
+
+    recovered = TelemetryArchive(str(tmp_path))
+    assert seqs(recovered.query("room_A1")) == [0, 1]
+    assert not os.path.exists(segment.path)
+    room_dir = os.path.dirname(segment.path)
+    assert not [n for n in os.listdir(room_dir) if n.endswith(SEGMENT_SUFFIX)]
+
+
+def test_query_while_writing(tmp_path):
+    archive = TelemetryArchive(str(tmp_path))
+    archive.write("room_A1", [entry(0)])
+    stop = threading.Event()
+    errors = []
+
+    def writer():
+        seq = 1
+        while not stop.is_set():
+            # New series keep being added to the open segment index
+            archive.write("room_A1", [entry(seq, f"resource_{seq}"), entry(seq + 1)])
+            seq += 2
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 1.0
+        previous = 0
+        while time.monotonic() < deadline:
+            try:
+                count = len(list(archive.query("room_A1")))
+            except Exception as e:
+                errors.append(e)
+                continue
+            assert count >= previous
+            previous = count
+    finally:
+        stop.set()
+        thread.join()
+
+    assert errors == []
+    assert previous > 1
+
+
+@pytest.fixture(scope="module")
+def cloud_app(tmp_path_factory):
+    # The cloud simulator reads its directories when the module is imported
+    os.environ["TELEMETRY_DIR"] = str(tmp_path_factory.mktemp("telemetry"))
+    import app as cloud_app
+
+    return cloud_app
+
+
+@pytest.fixture
+def api(cloud_app, tmp_path, monkeypatch):
+    archive = TelemetryArchive(str(tmp_path / "archive"))
+    monkeypatch.setattr(cloud_app, "archive", archive)
+    return archive, cloud_app.app.test_client()
+
+
+def sample(timestamp, value, resource_id="temperature"):
+    telemetry = entry(0, resource_id)
+    telemetry["timestamp"] = timestamp
+    telemetry["data_value"] = value
+    return telemetry
+
+
+def test_downsample_bucket_boundaries(cloud_app):
+    entries = [
+        sample(1000, 1.0),
+        sample(1999, 3.0),
+        sample(2000, 10.0),
+        sample(2500, True),
+        sample(2600, "n/a"),
+        sample(1500, 5.0, "humidity"),
+    ]
+    buckets = list(cloud_app.downsample(entries, 1000))
+
+    temperature = [b for b in buckets if b["resource_id"] == "temperature"]
+    assert [(b["bucket_start"], b["count"]) for b in temperature] == [(1000, 2), (2000, 1)]
+    assert (temperature[0]["min"], temperature[0]["max"], temperature[0]["mean"]) == (
+        1.0,
+        3.0,
+        2.0,
+    )
+    humidity = [b for b in buckets if b["resource_id"] == "humidity"]
+    assert [(b["bucket_start"], b["mean"]) for b in humidity] == [(1000, 5.0)]
+
+
+def test_telemetry_api_range_and_limit(api):
+    archive, client = api
+    archive.write("room_A1", [sample(1000 + i * 100, float(i)) for i in range(10)])
+
+    body = client.get("/api/telemetry?room_id=room_A1&start=1200&end=1500").get_json()
+    assert body["status"] == "success"
+    assert [e["timestamp"] for e in body["data"]] == [1200, 1300, 1400, 1500]
+    assert body["count"] == 4
+
+    body = client.get("/api/telemetry?room_id=room_A1&limit=3").get_json()
+    assert [e["data_value"] for e in body["data"]] == [0.0, 1.0, 2.0]
+    assert body["count"] == 3
+
+    body = client.get("/api/telemetry?room_id=room_A1&start=5000").get_json()
+    assert body["data"] == [] and body["count"] == 0
+
+    body = client.get("/api/telemetry?room_id=room_B2").get_json()
+    assert body["data"] == [] and body["count"] == 0
+
+
+def test_telemetry_api_downsampled(api):
+    archive, client = api
+    archive.write("room_A1", [sample(1000 + i * 100, float(i)) for i in range(10)])
+
+    body = client.get("/api/telemetry?room_id=room_A1&bucket_ms=500").get_json()
+    assert [(b["bucket_start"], b["count"], b["mean"]) for b in body["data"]] == [
+        (1000, 5, 2.0),
+        (1500, 5, 7.0),
+    ]
+
+    body = client.get("/api/telemetry?room_id=room_A1&bucket_ms=500&limit=1").get_json()
+    assert body["count"] == 1
+
+
+def test_telemetry_api_rejects_bad_arguments(api):
+    _, client = api
+    assert client.get("/api/telemetry").status_code == 400
+    assert client.get("/api/telemetry?room_id=room_A1&start=abc").status_code == 400
+    assert client.get("/api/telemetry?room_id=room_A1&bucket_ms=0").status_code == 400
+    assert client.get("/api/telemetry?room_id=room_A1&limit=-1").status_code == 400
@@ -0,0 +1,122 @@
+import os
+
+from data_collector.core.telemetry_spool import SEGMENT_SUFFIX, TelemetrySpool
+
+
+def entry(i):
+    return {"type": "iot:sensor:temperature", "timestamp": i, "data_value": float(i)}
+
+
+def values(entries):
+    return [e["timestamp"] for e in entries]
+
+
+def test_unacknowledged_entries_survive_restart(tmp_path):
+    spool = TelemetrySpool(str(tmp_path), segment_bytes=200)
+    for i in range(10):
+        spool.append(entry(i))
+    entries, upto = spool.snapshot(max_entries=4)
+    assert values(entries) == [0, 1, 2, 3]
+    spool.commit(upto)
+    spool.close()
+
+    spool = TelemetrySpool(str(tmp_path), segment_bytes=200)
+    assert spool.recovered == 6
+    entries, upto = spool.snapshot()
+    assert values(entries) == list(range(4, 10))
+
+    # New entries continue the sequence after the recovered ones
+    spool.append(entry(10))
+    entries, _ = spool.snapshot()
+    assert values(entries) == list(range(4, 11))
+
+
+def test_committed_segments_are_deleted(tmp_path):
+    spool = TelemetrySpool(str(tmp_path), segment_bytes=200)
+    for i in range(20):
+        spool.append(entry(i))
+    assert spool.get_stats()["segments"] > 1
+
+    _, upto = spool.snapshot()
+    spool.commit(upto)
+    assert len(spool) == 0
+    names = [n for n in os.listdir(tmp_path) if n.endswith(SEGMENT_SUFFIX)]
+    assert len(names) == 1
+    spool.close()
+
+    spool = TelemetrySpool(str(tmp_path), segment_bytes=200)
+    assert spool.recovered == 0
+    assert spool.snapshot()[0] == []
+
+
+def test_torn_tail_is_truncated_on_recovery(tmp_path):
+    spool = TelemetrySpool(str(tmp_path))
+    for i in range(3):
+        spool.append(entry(i))
+    spool.close()
+
+    (name,) = [n for n in os.listdir(tmp_path) if n.endswith(SEGMENT_SUFFIX)]
+    path = tmp_path / name
+    intact = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(b"\x40\x00\x00\x00\x00\x00\x00\x00{\"partial")
+
+    spool = TelemetrySpool(str(tmp_path))
+    assert path.stat().st_size == intact
+    assert values(spool.snapshot()[0]) == [0, 1, 2]
+
+    spool.append(entry(3))
+    spool.close()
+    spool = TelemetrySpool(str(tmp_path))
+    assert values(spool.snapshot()[0]) == [0, 1, 2, 3]
+
+
+def test_size_cap_evicts_oldest_entries(tmp_path):
+    spool = TelemetrySpool(str(tmp_path), segment_bytes=200, max_bytes=600)
+    for i in range(50):
+        spool.append(entry(i))
+
+    entries, _ = spool.snapshot()
+    assert spool.evicted > 0
+    assert len(entries) + spool.evicted == 50
+    assert values(entries) == list(range(spool.evicted, 50))
+
+
+def test_corrupted_record_is_quarantined(tmp_path):
+    spool = TelemetrySpool(str(tmp_path), segment_bytes=200)
+    for i in range(20):
+        spool.append(entry(i))
+    spool.flush()
+
+    first = sorted(n for n in os.listdir(tmp_path) if n.endswith(SEGMENT_SUFFIX))[1]
+    with open(tmp_path / first, "r+b") as f:
+        f.seek(20)
+        f.write(b"\xff\xff")
+
+    # Entries before the corrupted segment come first
+    entries, upto = spool.snapshot()
+    assert entries and values(entries) == list(range(len(entries)))
+    spool.commit(upto)
+
+    entries, upto = spool.snapshot()
+    spool.commit(upto)
+    assert spool.corrupted > 0
+    assert values(entries)[-1] == 19
+    assert os.path.exists(tmp_path / (first + ".corrupt"))
+
+    spool.append(entry(20))
+    assert values(spool.snapshot()[0]) == [20]
+    spool.close()
+    spool = TelemetrySpool(str(tmp_path), segment_bytes=200)
+    assert values(spool.snapshot()[0]) == [20]
+
+
+def test_append_after_close_reopens(tmp_path):
+    spool = TelemetrySpool(str(tmp_path))
+    spool.append(entry(0))
+    spool.close()
+    spool.append(entry(1))
+    spool.close()
+
+    spool = TelemetrySpool(str(tmp_path))
+    assert values(spool.snapshot()[0]) == [0, 1]
@@ -0,0 +1,100 @@
+"""
+Message serialization microbenchmark
+
+Compares the encoding of telemetry messages with the previous generic path
+(json.dumps of the message __dict__), the explicit JSON encoder with and
+without the metadata pre-serialized by the listener, and the binary codecs
+(CBOR, MessagePack) when their packages are installed. Decoding goes through
+the data collector decode_payload, which detects the codec of the payload.
+
+Usage:
+    python tests_scripts/codec_benchmark.py [messages]
+"""
+
+import os
+import sys
+import json
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from data_collector.core.payload_codec import decode_payload
+from smart_objects.messages.GenericMessage import dump_json
+from smart_objects.messages.message_codec import CODECS
+from smart_objects.messages.telemetry_message import TelemetryMessage
+
+
+def rate(function, count: int) -> float:
+    """Calls per second of the best of three rounds"""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(count):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def run(count: int = 100_000) -> None:
+    metadata = {
+        "object_id": "cooling_system_rack_A1",
+        "resource_id": "temperature",
+        "room_id": "room_A1",
+        "rack_id": "rack_A1",
+    }
+    metadata_json = dump_json(metadata)
+
+    def legacy():
+        message = TelemetryMessage("iot:sensor:temperature", 27.43, metadata=metadata)
+        return json.dumps(
+            {name: getattr(message, name) for name in ("type", "metadata", "timestamp", "data_value")},
+            default=lambda o: o.__dict__,
+        ).encode()
+
+    def explicit():
+        return TelemetryMessage(
+            "iot:sensor:temperature", 27.43, metadata=metadata
+        ).encode()
+
+    def preserialized():
+        return TelemetryMessage(
+            "iot:sensor:temperature",
+            27.43,
+            metadata=metadata,
+            metadata_json=metadata_json,
+        ).encode()
+
+    encoders = [
+        ("json, generic dumps", legacy),
+        ("json, explicit", explicit),
+        ("json, pre-serialized metadata", preserialized),
+    ]
+    for name, codec in CODECS.items():
+        if name == "json":
+            continue
+        encoders.append(
+            (
+                name,
+                lambda codec=codec: TelemetryMessage(
+                    "iot:sensor:temperature", 27.43, metadata=metadata
+                ).encode(codec),
+            )
+        )
+    missing = [name for name in ("cbor", "msgpack") if name not in CODECS]
+
+    print(f"Telemetry messages: {count} (best of 3)")
+    print(f"  {'encoder':32} {'encode/s':>12} {'decode/s':>12} {'bytes':>7}")
+    for name, encode in encoders:
+        payload = encode()
+        assert decode_payload(payload)["data_value"] == 27.43
+        encode_rate = rate(encode, count)
+        decode_rate = rate(lambda: decode_payload(payload), count)
+        print(f"  {name:32} {encode_rate:12,.0f} {decode_rate:12,.0f} {len(payload):7}")
+    if missing:
+        print(f"  skipped, package not installed: {', '.join(missing)}")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:2]]
+    run(*args)
@@ -0,0 +1,200 @@
+"""
+PolicyManager evaluation microbenchmark
+
+Compares the telemetry evaluation throughput of the original implementation
+(linear scan over every policy, interpreting the policy dict on each message),
+an indexed lookup that still interprets the policy dict, and the current
+PolicyManager (hash index + compiled policies).
+
+Usage:
+    python tests_scripts/policy_benchmark.py [num_policies] [num_messages]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import operator
+import tempfile
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from data_collector.core.policy_manager import PolicyManager
+
+ROOM_ID = "room_bench"
+LEGACY_MESSAGES = 500
+SENSORS = [
+    ("rack_cooling_unit", "rack_cooling_unit_temp", "iot:sensor:temperature"),
+    ("airflow_manager", "airflow_manager_air_speed", "iot:sensor:air_speed"),
+    ("water_loop_controller", "water_loop_controller_pressure", "iot:sensor:pressure"),
+    ("energy_metering_unit", "energy_metering_unit_energy", "iot:sensor:energy"),
+]
+
+OPERATORS = {
+    ">": operator.gt,
+    "<": operator.lt,
+    "==": operator.eq,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "!=": operator.ne,
+}
+
+
+def build_policies(num_policies: int, num_racks: int) -> list:
+    policies = []
+    for i in range(num_policies):
+        object_id, resource_id, sensor_type = SENSORS[i % len(SENSORS)]
+        policies.append(
+            {
+                "id": f"bench_policy_{i}",
+                "type": "smart_object",
+                "room_id": ROOM_ID,
+                "rack_id": f"rack_{i % num_racks}",
+                "object_id": object_id,
+                "resource_id": resource_id,
+                "sensor_type": sensor_type,
+                # Thresholds are out of range so no action is ever fired
+                "condition": {"operator": ">", "value": 1_000_000.0},
+                "action": {"command": {"status": "ON"}},
+            }
+        )
+    return policies
+
+
+def build_telemetries(num_messages: int, num_racks: int) -> list:
+    telemetries = []
+    for _ in range(num_messages):
+        object_id, resource_id, sensor_type = random.choice(SENSORS)
+        telemetries.append(
+            {
+                "type": sensor_type,
+                "data_value": round(random.uniform(0, 100), 2),
+                "timestamp": int(time.time() * 1000),
+                "metadata": {
+                    "room_id": ROOM_ID,
+                    "rack_id": f"rack_{random.randrange(num_racks)}",
+                    "object_id": object_id,
+                    "resource_id": resource_id,
+                },
+            }
+        )
+    return telemetries
+
+
+def legacy_matches(policy: dict, telemetry: dict) -> bool:
+    """Policy matching as implemented before the policy index."""
+    telemetry_metadata = telemetry.get("metadata", {})
+    if telemetry_metadata.get("room_id") != policy["room_id"]:
+        return False
+
+    policy_type = policy.get("type", "unknown")
+    if policy_type == "room":
+        if telemetry_metadata.get("rack_id") is not None:
+            return False
+        return (
+            telemetry_metadata.get("object_id") == policy.get("object_id")
+            and telemetry_metadata.get("resource_id") == policy.get("resource_id")
+            and telemetry.get("type") == policy.get("sensor_type")
+        )
+    elif policy_type == "smart_object":
+        return (
+            telemetry_metadata.get("rack_id") == policy.get("rack_id")
+            and telemetry_metadata.get("object_id") == policy.get("object_id")
+            and telemetry_metadata.get("resource_id") == policy.get("resource_id")
+            and telemetry.get("type") == policy.get("sensor_type")
+        )
+    return False
+
+
+def legacy_evaluate(policies: list, telemetry: dict) -> int:
+    """Linear scan with per-message dict interpretation."""
+    triggered = 0
+    for policy in policies:
+        if legacy_matches(policy, telemetry):
+            value = float(telemetry.get("data_value", 0))
+            operator_fn = OPERATORS[policy["condition"]["operator"]]
+            threshold = policy["condition"]["value"]
+            if operator_fn(value, threshold):
+                triggered += 1
+    return triggered
+
+
+def legacy_index(policies: list) -> dict:
+    index = {}
+    for policy in policies:
+        key = (
+            policy["room_id"],
+            policy.get("rack_id"),
+            policy["object_id"],
+            policy["resource_id"],
+            policy["sensor_type"],
+        )
+        index.setdefault(key, []).append(policy)
+    return index
+
+
+def indexed_evaluate(index: dict, telemetry: dict) -> int:
+    """Indexed lookup, still interpreting the policy dict on each message."""
+    metadata = telemetry.get("metadata", {})
+    key = (
+        metadata.get("room_id"),
+        metadata.get("rack_id"),
+        metadata.get("object_id"),
+        metadata.get("resource_id"),
+        telemetry.get("type"),
+    )
+    triggered = 0
+    for policy in index.get(key, ()):
+        value = float(telemetry.get("data_value", 0))
+        operator_fn = OPERATORS[policy["condition"]["operator"]]
+        threshold = policy["condition"]["value"]
+        if operator_fn(value, threshold):
+            triggered += 1
+    return triggered
+
+
+def throughput(evaluate, target, telemetries: list, repeat: int = 3) -> float:
+    """Best-of-N evaluation rate in messages per second."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for telemetry in telemetries:
+            evaluate(target, telemetry)
+        best = min(best, time.perf_counter() - start)
+    return len(telemetries) / best
+
+
+def run(num_policies: int = 10_000, num_messages: int = 50_000) -> None:
+    num_racks = max(1, num_policies // (len(SENSORS) * 2))
+    policies = build_policies(num_policies, num_racks)
+    telemetries = build_telemetries(num_messages, num_racks)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        policy_file = os.path.join(tmp_dir, "policy.json")
+        with open(policy_file, "w") as f:
+            json.dump({"rooms": {ROOM_ID: policies}}, f)
+
+        policy_manager = PolicyManager(ROOM_ID, policy_file)
+        policy_manager.logger.setLevel(logging.WARNING)
+
+        # The linear scan is orders of magnitude slower, so it gets a subset
+        legacy_rate = throughput(
+            legacy_evaluate, policies, telemetries[:LEGACY_MESSAGES], repeat=1
+        )
+        indexed_rate = throughput(indexed_evaluate, legacy_index(policies), telemetries)
+        compiled_rate = throughput(PolicyManager.evaluate, policy_manager, telemetries)
+
+    print(f"Policies: {num_policies}, messages: {num_messages}, racks: {num_racks}")
+    print(f"  legacy (linear scan):     {legacy_rate:12.0f} msg/s")
+    print(f"  indexed, interpreted:     {indexed_rate:12.0f} msg/s")
+    print(f"  indexed + compiled:       {compiled_rate:12.0f} msg/s")
+    print(f"  speedup vs legacy:        {compiled_rate / legacy_rate:12.1f}x")
+    print(f"  speedup vs interpreted:   {compiled_rate / indexed_rate:12.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,63 @@
+"""
+SensorFleet step microbenchmark
+
+Compares the time needed to produce one reading of every sensor with the
+per-object sensors (one random draw and round per sensor) and with a
+SensorFleet (one vectorized draw per tick), both writing the values back
+to the sensor objects, and with a fleet only delivering the value array.
+
+Usage:
+    python tests_scripts/sensor_fleet_benchmark.py [num_sensors] [ticks]
+"""
+
+import os
+import sys
+import time
+import logging
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from smart_objects.sensors.sensor_fleet import SensorFleet
+from smart_objects.sensors.temperature_sensor import TemperatureSensor
+
+
+def best_tick(step, ticks: int) -> float:
+    best = float("inf")
+    for _ in range(ticks):
+        start = time.perf_counter()
+        step()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(num_sensors: int = 100_000, ticks: int = 5) -> None:
+    logging.disable(logging.WARNING)
+    resource_ids = [f"rack_{i}_temp" for i in range(num_sensors)]
+
+    sensors = [TemperatureSensor(resource_id) for resource_id in resource_ids]
+
+    def per_object_step():
+        for sensor in sensors:
+            sensor.measure()
+
+    fleet = SensorFleet(TemperatureSensor, seed=0)
+    fleet.create_sensors(resource_ids)
+    array_fleet = SensorFleet(TemperatureSensor, seed=0, notify_sensors=False)
+    array_fleet.create_sensors(resource_ids)
+
+    per_object = best_tick(per_object_step, ticks)
+    vectorized = best_tick(fleet.step, ticks)
+    array_only = best_tick(array_fleet.step, ticks)
+
+    print(f"Sensors: {num_sensors}, ticks: {ticks} (best tick)")
+    print(f"  per-object sensors:       {per_object * 1000:10.2f} ms")
+    print(f"  fleet, objects updated:   {vectorized * 1000:10.2f} ms")
+    print(f"  fleet, values only:       {array_only * 1000:10.2f} ms")
+    print(f"  speedup, objects updated: {per_object / vectorized:10.1f}x")
+    print(f"  speedup, values only:     {per_object / array_only:10.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,126 @@
+"""
+ThermalModel benchmark
+
+Measures the time of one vectorized model step for a large number of racks
+and runs a closed control loop on top of the model: every rack fan is
+driven by a threshold controller like the room policies, and the script
+reports how long it takes to bring all the racks back below the high
+threshold, the racks above it at the end, and
+how many commands the controller sent, in total and in the last hour,
+where a threshold controller keeps oscillating around its band.
+
+Usage:
+    python tests_scripts/thermal_model_benchmark.py [num_racks] [racks_per_room]
+"""
+
+import os
+import sys
+import time
+import logging
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+from smart_objects.actuators.fan_actuator import FanActuator
+from smart_objects.actuators.cooling_level_actuator import CoolingLevelsActuator
+from smart_objects.simulation.thermal_model import ThermalModel
+
+STEP_S = 10.0
+SIM_HOURS = 2
+HIGH_TEMP = 35.0
+LOW_TEMP = 30.0
+FAN_STEP = 20
+
+
+def build_model(num_racks: int, racks_per_room: int, with_fans: bool):
+    model = ThermalModel(seed=0)
+    rng = np.random.default_rng(0)
+    fans = []
+    for i in range(num_racks):
+        room_id = f"room_{i // racks_per_room}"
+        rack_id = f"rack_{i}"
+        if i % racks_per_room == 0:
+            hub = CoolingLevelsActuator(f"{room_id}_hub")
+            hub.apply_command({"status": "ON", "level": 5}, "MANUAL", {})
+            model.add_room(room_id, cooling_levels=hub)
+
+        fan = None
+        if with_fans:
+            fan = FanActuator(f"{rack_id}_fan", is_operational=True)
+            fan.apply_command({"status": "ON", "speed": 0}, "MANUAL", {})
+            fans.append(fan)
+        model.add_rack(room_id, rack_id, fan=fan)
+        model.set_rack_load(room_id, rack_id, rng.uniform(3.0, 12.0))
+    return model, fans
+
+
+def control(model: ThermalModel, fans: list) -> int:
+    """Threshold controller on the fan speeds, returns the commands sent"""
+    commands = 0
+    for temp, fan in zip(model.rack_temp.tolist(), fans):
+        speed = fan.state["speed"]
+        if temp > HIGH_TEMP and speed < fan.MAX_SPEED:
+            speed = min(speed + FAN_STEP, fan.MAX_SPEED)
+        elif temp < LOW_TEMP and speed > 0:
+            speed = max(speed - FAN_STEP, 0)
+        else:
+            continue
+        fan.apply_command({"speed": speed}, "POLICY", {})
+        commands += 1
+    return commands
+
+
+def run(num_racks: int = 10_000, racks_per_room: int = 10) -> None:
+    logging.disable(logging.WARNING)
+
+    model, _ = build_model(num_racks, racks_per_room, with_fans=False)
+    best = float("inf")
+    for _ in range(20):
+        start = time.perf_counter()
+        model.step(STEP_S)
+        best = min(best, time.perf_counter() - start)
+    print(f"Racks: {num_racks}, rooms: {len(model.room_ids)}")
+    print(f"  model step (no actuators):   {best * 1000:10.3f} ms")
+
+    model, fans = build_model(num_racks, racks_per_room, with_fans=True)
+    best = float("inf")
+    commands = 0
+    last_hour_commands = 0
+    exceeded_at = None
+    cooled_at = None
+    steps = int(SIM_HOURS * 3600 / STEP_S)
+    for step in range(steps):
+        start = time.perf_counter()
+        model.step(STEP_S)
+        best = min(best, time.perf_counter() - start)
+
+        sent = control(model, fans)
+        commands += sent
+        if step >= steps - int(3600 / STEP_S):
+            last_hour_commands += sent
+        # Racks start at room temperature: time from the first rack above the
+        # threshold until the controller has brought all of them below it
+        hot = bool((model.rack_temp > HIGH_TEMP).any())
+        if hot and exceeded_at is None:
+            exceeded_at = (step + 1) * STEP_S
+        elif not hot and exceeded_at is not None and cooled_at is None:
+            cooled_at = (step + 1) * STEP_S - exceeded_at
+
+    hot = int((model.rack_temp > HIGH_TEMP).sum())
+    print(f"  model step (with fans):      {best * 1000:10.3f} ms")
+    print(f"  simulated:                   {SIM_HOURS:10d} h in {STEP_S:g} s steps")
+    print(
+        f"  all racks back below {HIGH_TEMP:g} °C: "
+        + (f"{cooled_at / 60:7.1f} min" if cooled_at is not None else "never")
+    )
+    print(f"  commands sent:               {commands:10d}")
+    print(f"  commands per rack:           {commands / num_racks:10.2f}")
+    print(f"  commands in the last hour:   {last_hour_commands:10d}")
+    print(f"  rack temp mean / max:        {model.rack_temp.mean():6.2f} / {model.rack_temp.max():.2f} °C")
+    print(f"  racks above {HIGH_TEMP:g} °C:          {hot:10d}")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    run(*args)